@@ -29,11 +29,6 @@ class MainApplication:
         self.root = root
         self.suite = None
 
-        # flag for state changes in workspace. not implemented yet. TODO
-        # might be a better place to store these kinds of flags, maybe
-        # in settings, maybe not.
-        self._anything_changed = True
-
         # init program settings
         self.settings = Settings(self)
 
@@ -66,6 +61,9 @@ class MainApplication:
 
         self._config_window_properties()
 
+        # periodic background saves, if enabled in workspace settings
+        self.tools.saver.start_autosave()
+
     def _config_window_properties(self):
         """Grab bag of window config."""
         self.root.iconbitmap("./assets/generic.ico")
@@ -73,22 +71,51 @@ class MainApplication:
         self.root.resizable(False, False)
         self.root.protocol("WM_DELETE_WINDOW", self.try_quit_app)
 
+    @property
+    def _anything_changed(self):
+        """True if the workspace has changed since it was loaded or saved."""
+        return self.data.gig.dirty
+
     def try_quit_app(self):
-        """What to do when you quit."""
-        self.ask_save() if self._anything_changed else self.root.destroy()
+        """What to do when you quit. If the workspace is clean there's
+        nothing to ask about, so just keep the settings and go."""
+        if self._anything_changed:
+            self.ask_save()
+            return
+        self.settings.dump_settings()
+        self.quit_app()
 
     def ask_save(self):
         choice = messagebox.askyesnocancel("Save State","Save state before quitting?")
         if choice is None:
             return
         elif choice == True:
-            self.do_save()
+            # quit once the save lands. if it fails, stay open.
+            self.do_save(
+                on_done=lambda result: self.quit_app(),
+                on_failed=lambda error: self.tools.helper.popup(
+                    f"Save failed: {error}. Quitting was cancelled.", 10000
+                ),
+            )
+            return
+        self.quit_app()
+
+    def quit_app(self):
+        """Stop the background workers, close the database connections and
+        destroy the tk root."""
+        self.tools.saver.stop()
+        self.tools.song_builder.stop()
+        self.tools.rekeyer.stop()
+        self.tools.db_interface.close()
+        self.tools.parse_cache.close()
         self.root.destroy()
 
-    def do_save(self):
-        """Save app state by dumping settings and gig data."""
+    def do_save(self, on_done=None, on_failed=None):
+        """Save app state by dumping settings, then gig data in the
+        background. on_done(result) is called once the gig is saved,
+        on_failed(error) if it couldn't be."""
         self.settings.dump_settings()
-        self.tools.db_interface.dump_gig(self.data.gig, workspace=True)
+        self.tools.saver.save(workspace=True, on_done=on_done, on_failed=on_failed)
 
 
 def main():
@@ -89,6 +89,68 @@ qualities = (
     # with reasonable attention to formatting.
 
 
+# Prefix trie of qualities, for walking the qualities part of a chord without
+# slicing it up. Each node maps a character to the next node. The key None
+# marks the end of a quality and holds its index in qualities.
+def build_trie(words) -> dict:
+    """Build a prefix trie from words."""
+    trie = {}
+    for i, word in enumerate(words):
+        node = trie
+        for c in word:
+            node = node.setdefault(c, {})
+        node.setdefault(None, i)
+    return trie
+
+def self_overlapping(word) -> bool:
+    """Return True if word can overlap itself, like 'sus' in 'susus'."""
+    return any(word[:n] == word[-n:] for n in range(1, len(word)))
+
+QUALITY_TRIE = build_trie(qualities)
+QUALITY_OVERLAPS = frozenset(q for q in qualities if self_overlapping(q))
+
+def quality_at(string, i):
+    """Return the quality string has at index i, or None. If more than one
+    fits ('m', 'maj') the one listed first in qualities wins."""
+    node, found, n = QUALITY_TRIE, None, len(string)
+    while i < n:
+        node = node.get(string[i])
+        if node is None:
+            break
+        if None in node and (found is None or node[None] < found):
+            found = node[None]
+        i += 1
+    return qualities[found] if found is not None else None
+
+def last_end(string, q, i) -> int:
+    """Index just past the last non-overlapping q in string[i:], which
+    starts with q. This is where string[i:].split(q)[-1] begins."""
+    if q not in QUALITY_OVERLAPS:
+        return string.rfind(q, i) + len(q)
+    found = i
+    while found != -1:
+        end = found + len(q)
+        found = string.find(q, end)
+    return end
+
+def skip_qualities(string, start=0) -> int:
+    """Walk the qualities in string from start, returning the index the walk
+    stopped at, or len(string) if it was all qualities. Each step takes the
+    quality at the current index and jumps past its last occurrence, exactly
+    as the old split based recursive checkers did, so at most one step per
+    quality and no intermediate strings."""
+    i, n = start, len(string)
+    while i < n:
+        q = quality_at(string, i)
+        if q is None:
+            return i
+        i = last_end(string, q, i)
+    return i
+
+def valid_qualities(quals) -> bool:
+    """Return True if quals is a valid qualities part of a chord."""
+    return skip_qualities(quals) == len(quals)
+
 # Nashville numbers tuples. Calling NASH_M...S[i] returns a representation
 # for the chord that is i steps from the root of the current key. Slightly
 # different representations from each tuple.
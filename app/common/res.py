@@ -21,4 +21,21 @@ id_transposible = re.compile(r'''(
 	([A-Za-z0-9'.\-]*)		# 4 qualities
 	(\))?					# 5 right bracket
 	((\/)([A-G][b#]?))?		# 7 slash # 8 bass
-	)''', re.VERBOSE)
\ No newline at end of file
+	)''', re.VERBOSE)
+
+# Master pattern for classifying a slice in one scan. Groups 1-8 are exactly
+# id_transposible's, so a match on them can be used anywhere an
+# id_transposible match is. The named groups catch the non-transposible
+# slices that can be decided from the pattern alone.
+id_token = re.compile(r'''(
+	(\()?					# 2 left bracket
+	([A-G][b#]?)			# 3 root
+	([A-Za-z0-9'.\-]*)		# 4 qualities
+	(\))?					# 5 right bracket
+	((\/)([A-G][b#]?))?		# 7 slash # 8 bass
+	)
+	|(?P<nl>\n\Z)			# newline
+	|(?P<ws>\s*\ \s*\Z)		# whitespace only, with at least one space
+	|(?P<bar>[/|]\Z)		# bar line
+	|(?P<mark>[*:]\Z)		# header characters
+	''', re.VERBOSE)
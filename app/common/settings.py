@@ -175,7 +175,11 @@ class PathSettings(SettingsBaseClass):
     def __init__(self, settings, name):
         SettingsBaseClass.__init__(self, settings, name)
 
-        self.defaults = {"appdata": "./data/appdata.db", "exports": "./data/exports"}
+        self.defaults = {
+            "appdata": "./data/appdata.db",
+            "exports": "./data/exports",
+            "parse_cache": "./data/parse_cache.db",
+        }
 
         inits = merge(self.defaults, self.custom)
 
@@ -192,6 +196,10 @@ class PathSettings(SettingsBaseClass):
         self.db = tk.StringVar()
         self.db.set(inits.get("appdata"))
 
+        # parsed chart files, see tools.parse_cache
+        self.parse_cache = tk.StringVar()
+        self.parse_cache.set(inits.get("parse_cache"))
+
 
 class ChunkScrollSettings(SettingsBaseClass):
     """Class for chunk scroll settings."""
@@ -292,6 +300,7 @@ class ImportSettings(SettingsBaseClass):
             "raw": False,
             "auto_tag": True,
             "valid_ext": (".txt", ".rtf"),
+            "split_rtf_books": False,
         }
 
         # merge default and custom settings to get inits
@@ -308,6 +317,9 @@ class ImportSettings(SettingsBaseClass):
         # valid extensions for imported files
         self.valid_ext = inits.get("valid_ext")
 
+        # bulk import splits rtf files into songs on page breaks and headings
+        self.split_rtf_books = self.setting(tk.BooleanVar, "split_rtf_books", inits)
+
 
 class EditSettings(SettingsBaseClass):
     """Class for editor settings."""
@@ -759,6 +771,8 @@ class WorkspaceSettings(SettingsBaseClass):
             # runs you can save the workspace back to the same gig.
             "last_gig_id": None,
             "reload_at_init": True,
+            "autosave": False,
+            "autosave_minutes": 5,
         }
 
         inits = merge(self.defaults, self.custom)
@@ -767,6 +781,11 @@ class WorkspaceSettings(SettingsBaseClass):
         self.last_gig_id = self.setting(tk.IntVar, "last_gig_id", inits)
         self.reload_at_init = self.setting(tk.BooleanVar, "reload_at_init", inits)
 
+        # save the workspace in the background every autosave_minutes
+        # while it has unsaved changes
+        self.autosave = self.setting(tk.BooleanVar, "autosave", inits)
+        self.autosave_minutes = self.setting(tk.IntVar, "autosave_minutes", inits)
+
 
 class ScalerSettings(SettingsBaseClass):
     """Settings for scaling text / arrow / etc. in talent & editor views."""
@@ -799,6 +818,7 @@ class LibrarySettings(SettingsBaseClass):
             "overwrite_songs": False,
             "overwrite_setlists": False,
             "cue_selection": False,
+            "pack_scripts": True,
         }
 
         inits = merge(self.defaults, self.custom)
@@ -812,3 +832,7 @@ class LibrarySettings(SettingsBaseClass):
             tk.BooleanVar, "overwrite_setlists", inits
         )
         self.cue_selection = self.setting(tk.BooleanVar, "cue_selection", inits)
+
+        # store each song script as one packed blob rather than a db row
+        # per word. much smaller and faster to load.
+        self.pack_scripts = self.setting(tk.BooleanVar, "pack_scripts", inits)
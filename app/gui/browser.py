@@ -151,9 +151,12 @@ class LibraryTab(tk.Frame, PrompToolsAPI):
     def refresh_library(self, data=None, query=None) -> None:
         """Generate the library song list."""
         self.clear_tree()
-        data = self.fetch_library() if data is None else data
-        data = self.filter_library(data, query) if query else data
-        data = self.sort_library(data)
+        if query:
+            # search results come back ranked, so don't re-sort them
+            data = self.filter_library(query)
+        else:
+            data = self.fetch_library() if data is None else data
+            data = self.sort_library(data)
         self.populate_treeview(data)
 
     def clear_tree(self):
@@ -164,18 +167,10 @@ class LibraryTab(tk.Frame, PrompToolsAPI):
         db_interface = self.app.tools.db_interface
         return db_interface.get_all_song_meta_from_db(option='library')
 
-    def filter_library(self, data, query):
-        """Return data filtered by query."""
-
-        if not query:
-            return data
-
-        # TODO: filter() / comprehension?
-        filtered = []
-        for tup in data:
-            filtered.append(tup) if scrub_text(query) in scrub_text(tup[2]) else None
-
-        return filtered
+    def filter_library(self, query):
+        """Return library songs matching query, best match first."""
+        db_interface = self.app.tools.db_interface
+        return db_interface.search_songs(query, option='library')
 
     def sort_library(self, data):
         # sort by song name
@@ -249,12 +244,8 @@ class ScrolledTreeview(tk.Frame, PrompToolsAPI):
         if not sel:
             return
 
-        self.app.deck.cued = self.gen_song_from_sel(sel)
-
-    def gen_song_from_sel(self, sel):
         song_id = self.tree.set(sel, column="song_id")
-        song_data = self.app.tools.db_interface.make_song_dict_from_db(song_id=song_id)
-        return self.app.tools.factory.new_song(dictionary=song_data)
+        self.app.tools.song_builder.build_library_song(song_id, on_done=self.app.tools.loader.cue)
 
 
 class FilesTab(tk.Frame, PrompToolsAPI):
@@ -42,7 +42,8 @@ class AppControls(PrompToolsAPI):
     def _init_monitor_controls(self, monitor, scroller):
         """Controls for the monitor/editor window."""
 
-        # Key bindings to update talent view while editing.
+        # retag edited lines as they change, then update talent view.
+        monitor.text.bind("<<Modified>>", monitor.on_modified)
         monitor.text.bind("<KeyRelease>", monitor.refresh_while_editing)
         # TODO: simpler method for this one
         # self.text.bind("<Button-1>", self.update_talent_view)
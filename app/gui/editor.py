@@ -2,7 +2,9 @@ import tkinter as tk
 from tkinter import messagebox
 import time
 import logging
+import regex as re
 
+import common.res as res
 from gui.prompttoolbar import PromptToolBar
 from gui.edittoolbar import EditToolBar
 from tools.api import PrompToolsAPI
@@ -15,6 +17,26 @@ from tools.api import PrompToolsAPI
 def toggle_bool(arg):
     return not arg
 
+def changed_lines(old: list, new: list):
+    """Compare two lists of lines, return (first, last) indexes of the run
+    of lines in new that differ from old, or None if they're the same."""
+    n = min(len(old), len(new))
+    first = 0
+    while first < n and old[first] == new[first]:
+        first += 1
+    if first == len(old) == len(new):
+        return None
+
+    # common tail, not overlapping the common head
+    o, w = len(old), len(new)
+    while o > first and w > first and old[o - 1] == new[w - 1]:
+        o -= 1
+        w -= 1
+
+    # lines deleted outright still leave the line they joined onto dirty
+    last = len(new) - 1
+    return min(first, last), min(max(w - 1, first), last)
+
 
 class EditorMonitor(tk.Frame, PrompToolsAPI):
     """Class for Text field that shows
@@ -42,6 +64,9 @@ class EditorMonitor(tk.Frame, PrompToolsAPI):
         self._song = None
         self.load_time = time.time()
 
+        # text lines as of the last retag, to find what an edit changed
+        self.lines = None
+
     def _init_scroll_interface(self):
         """Scaffolding to handle local scroll."""
         self.scroll_action = self.periodic_update
@@ -136,6 +161,7 @@ class EditorMonitor(tk.Frame, PrompToolsAPI):
         live, previous = self.deck.live, self.deck.previous 
         reset = False if live is previous else True
         self.loader.push(frame=self, song=live, reset=reset)
+        self.sync_lines()
 
     @property
     def song(self):
@@ -240,6 +266,50 @@ class EditorMonitor(tk.Frame, PrompToolsAPI):
         self.talent.receive_edits(dump)
         self.talent.match_editor_yview() if self.tfollow else None
 
+    def sync_lines(self):
+        """Take the current text as already tagged, eg. after loading a song,
+        so the next <<Modified>> only retags what the operator changes."""
+        self.lines = self.text.get("1.0", "end-1c").split("\n")
+        self.text.edit_modified(False)
+
+    def on_modified(self, event=None):
+        """On <<Modified>>, retag the lines that changed since last time.
+        Only the dirty lines go back through the WordFactory, with
+        ambiguities resolved per line as usual, and only their tags are
+        replaced. Tk only fires <<Modified>> when the modified flag is set,
+        so it's cleared each time."""
+
+        # clearing the flag fires the event again
+        if not self.text.edit_modified():
+            return
+        self.text.edit_modified(False)
+
+        lines = self.text.get("1.0", "end-1c").split("\n")
+        changed = changed_lines(self.lines, lines) if self.lines is not None else None
+        self.lines = lines
+        if changed and self.editable.get():
+            self.retag_lines(*changed, lines)
+
+    def retag_lines(self, first: int, last: int, lines: list):
+        """Reclassify lines first to last (0 based indexes into lines) and
+        reapply their type tags. Style tags are left alone."""
+
+        string = "\n".join(lines[first:last + 1]) + "\n"
+        slices = [s for s in re.split(res.id_slices, string) if s]
+        tagger = self.tools.factory.tagger
+        tuples = tagger.tag_slices(slices, self.song, first_line=first + 1)
+
+        # one tag_add per tag, with all its ranges
+        ranges = {}
+        for pos, tag, word in tuples:
+            ranges.setdefault(tag, []).extend((pos, f"{pos}+{len(word)}c"))
+
+        start, end = f"{first + 1}.0", f"{last + 1}.end+1c"
+        for tag in set(self.settings.tags.types) | ranges.keys():
+            self.text.tag_remove(tag, start, end)
+        for tag, indexes in ranges.items():
+            self.text.tag_add(tag, *indexes)
+
     @property
     def contents(self):
         # self.__contents = self.text.get(start)
@@ -263,6 +333,7 @@ class EditorMonitor(tk.Frame, PrompToolsAPI):
         """Reload extant script from song object with prompt."""
         if messagebox.askokcancel("Confirm Reload", "Reload song? Changes will be lost."):
             self.tools.loader.push(frame=self, song=self.song, reset=False)
+            self.sync_lines()
 
     def save_song(self):
         """Push tktext back to song obj."""
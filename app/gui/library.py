@@ -118,10 +118,7 @@ class SongViewTop(tk.Frame, PrompToolsAPI):
         self.tree = self.treeview.tree
 
         # dump library into tree
-        for i, meta in enumerate(self.song_data):
-            song_id, lib_id, name, created, modified, comments, confidence, def_key = meta
-            ordered = [song_id, lib_id, name, created, modified, confidence, def_key, comments]
-            self.tree.insert(parent='', index="end", iid=i, values=ordered)
+        self.treeview.populate(self.song_data)
 
         # infobox (right side)
         self.songdetail = SongDetailView(self)
@@ -172,6 +169,29 @@ class SongTreeFrame(tk.Frame, PrompToolsAPI):
         self.search_filters = SearchFilters(self)
         self.search_filters.pack(side="top", fill="both")
 
+    def populate(self, data):
+        """Replace the tree contents with song_meta rows."""
+        self.tree.delete(*self.tree.get_children())
+        for i, meta in enumerate(data):
+            song_id, lib_id, name, created, modified, comments, confidence, def_key = meta
+            ordered = [song_id, lib_id, name, created, modified, confidence, def_key, comments]
+            self.tree.insert(parent='', index="end", iid=i, values=ordered)
+
+    def refresh(self):
+        """Re-run the search with the current query and filters."""
+        query = self.search.query.get()
+        if not query:
+            self.populate(self.parent.song_data)
+            return
+
+        filters = self.search_filters
+        columns = filters.columns
+        # gig limits results to songs in the saved workspace pool
+        gig_id = 0 if filters.gig.get() else None
+        data = self.tools.db_interface.search_songs(
+            query, columns=columns, gig_id=gig_id) if columns else []
+        self.populate(data)
+
 
 class SearchBar(tk.Frame, PrompToolsAPI):
     """Class for the Pool header & searchbar."""
@@ -188,8 +208,7 @@ class SearchBar(tk.Frame, PrompToolsAPI):
         self.query = tk.StringVar()
         self.search = tk.Entry(self, textvariable=self.query)
         self.search.pack(side="left", anchor="w", expand=True, fill="both")
-        # self.search.bind("<KeyRelease>", lambda _: self.suite.listbox_update())
-        self.query.trace("w", lambda *args: self.suite.listbox_update())
+        self.query.trace("w", lambda *args: self.parent.refresh())
 
         # clear search
         self.clear = tk.Button(self, text="Clear", command=lambda *args: self.search.delete(0, 'end'))
@@ -202,33 +221,59 @@ class SearchFilters(tk.Frame, PrompToolsAPI):
         tk.Frame.__init__(self, parent)
         PrompToolsAPI.__init__(self, parent)
 
+        # search index column: var. all on by default.
+        self.targets = {
+            "title": tk.BooleanVar(value=True),
+            "lyrics": tk.BooleanVar(value=True),
+            "key": tk.BooleanVar(value=True),
+            "comments": tk.BooleanVar(value=True),
+        }
+        self.gig = tk.BooleanVar(value=False)
+        refresh = lambda *args: self.parent.refresh()
+
         self.target_label = tk.Label(self, text="Targets:")
         self.target_label.pack(side="left", anchor="w")
 
-        self.song_title = tk.Checkbutton(self, text="Title")
+        self.song_title = tk.Checkbutton(self, text="Title", variable=self.targets["title"], command=refresh)
         self.song_title.pack(side="left", anchor="w")
 
-        self.song_artist = tk.Checkbutton(self, text="Artist")
+        self.song_lyrics = tk.Checkbutton(self, text="Lyrics", variable=self.targets["lyrics"], command=refresh)
+        self.song_lyrics.pack(side="left", anchor="w")
+
+        # TODO: no artist / genre data in the library yet
+        self.song_artist = tk.Checkbutton(self, text="Artist", state="disabled")
         self.song_artist.pack(side="left", anchor="w")
 
-        self.song_key = tk.Checkbutton(self, text="Key")
+        self.song_key = tk.Checkbutton(self, text="Key", variable=self.targets["key"], command=refresh)
         self.song_key.pack(side="left", anchor="w")
 
-        self.song_genre = tk.Checkbutton(self, text="Genre")
+        self.song_genre = tk.Checkbutton(self, text="Genre", state="disabled")
         self.song_genre.pack(side="left", anchor="w")
 
-        self.comments = tk.Checkbutton(self, text="Comments")
+        self.comments = tk.Checkbutton(self, text="Comments", variable=self.targets["comments"], command=refresh)
         self.comments.pack(side="left", anchor="w")
 
-        self.confidence = tk.Checkbutton(self, text="Confidence")
+        self.confidence = tk.Checkbutton(self, text="Confidence", state="disabled")
         self.confidence.pack(side="left", anchor="w")
 
-        self.gig_button = tk.Checkbutton(self, text="Gig")
+        self.gig_button = tk.Checkbutton(self, text="Gig", variable=self.gig, command=refresh)
         self.gig_button.pack(side="left", anchor="w")
 
-        self.toggle_all = tk.Button(self, text="Toggle All")
+        self.toggle_all = tk.Button(self, text="Toggle All", command=self.toggle_all_targets)
         self.toggle_all.pack(side="left", anchor="w")
 
+    @property
+    def columns(self) -> list:
+        """Search index columns to search, from the checked targets."""
+        return [k for k, v in self.targets.items() if v.get()]
+
+    def toggle_all_targets(self):
+        """Check all targets, or uncheck them if they're all checked."""
+        new = not all(v.get() for v in self.targets.values())
+        for v in self.targets.values():
+            v.set(new)
+        self.parent.refresh()
+
 
 class ScrolledSongTree(tk.Frame, PrompToolsAPI):
     """Attach a scrollbar to treeview."""
@@ -281,12 +326,11 @@ class ScrolledSongTree(tk.Frame, PrompToolsAPI):
         # get the song id of the selected row
         song_id = self.tree.set(sel, column="song_id")
 
-        # retrieve and assign dict of the song, triggering callbacks
-        song_dict = self.app.tools.db_interface.make_song_dict_from_db(song_id=song_id)
-
-        song = self.app.tools.factory.new_song(dictionary=song_dict)
-        print(f'SONG CREATED IN ON_TREE_SELECT: {song.name}')
+        # song is loaded in the background, then shown
+        self.app.tools.song_builder.build_library_song(song_id, on_done=self.show_song)
 
+    def show_song(self, song):
+        """Show a song loaded from the library selection."""
         self.suite.top.songdetail.push(song)
 
         # if cue_selection in library settings, push to cue.
@@ -3,6 +3,7 @@
 # functions on most things).
 
 import tkinter as tk
+from tkinter import messagebox, filedialog
 import logging
 
 from gui.preferences import PreferencesWindow
@@ -202,7 +203,13 @@ class MenuBar(tk.Frame, PrompToolsAPI):
         # library menu
         library_menu = tk.Menu(menu_bar)
         library_menu.add_command(label='Song Browser', command=lambda *args: self.open_library(tab='songs'))
+        library_menu.add_command(label='Import Folder...', command=lambda *args: self.import_folder())
+        library_menu.add_command(label='Import RTF Book...', command=lambda *args: self.import_rtf_book())
+        library_menu.add_checkbutton(label='Split RTF Books In Folders', variable=self.settings.importer.split_rtf_books)
         library_menu.add_command(label='Delete Orphaned Songs', command=lambda *args: self.delete_orphaned_songs())
+        library_menu.add_command(label='Compact Song Scripts', command=lambda *args: self.pack_all_scripts())
+        library_menu.add_command(label='Rebuild Search Index', command=lambda *args: self.rebuild_search_index())
+        library_menu.add_command(label='Clear Parsed File Cache', command=lambda *args: self.clear_parse_cache())
 
         # gig menu. gig includes a list of setlists, and metadata about gig (venue, date, etc).
         # does not affect the pool
@@ -210,6 +217,7 @@ class MenuBar(tk.Frame, PrompToolsAPI):
         gig_menu.add_command(label="DUMP GIG (TEMP)", command=self.on_dump_gig)
         gig_menu.add_command(label="DUMP WORKSPACE", command=self.on_dump_workspace)
         gig_menu.add_command(label="LOAD WORKSPACE", command=self.on_load_workspace)
+        gig_menu.add_checkbutton(label="Autosave Workspace", variable=self.settings.workspace.autosave)
         gig_menu.add_command(label="Gig Name Here", state="disabled")
         gig_menu.add_separator()
         gig_menu.add_command(label="Gig Info",state="disabled")
@@ -333,8 +341,8 @@ class MenuBar(tk.Frame, PrompToolsAPI):
         self.app.library.lift() if exists else None
 
     def on_dump_gig(self):
-        """TEMP function, dumps workspace/gig to db."""
-        self.app.data.gig.dump(workspace=True)
+        """TEMP function, dumps workspace/gig to db in the background."""
+        self.app.tools.saver.save(workspace=True)
 
     def on_load_gig(self):
         """TEMP function, reloads workspace/gig from db, overwriting whatever is loaded."""
@@ -342,8 +350,8 @@ class MenuBar(tk.Frame, PrompToolsAPI):
         self.app.data.gig.load(gig_id=0)
 
     def on_dump_workspace(self):
-        """Dump gig to the workspace slot."""
-        self.app.data.gig.dump(workspace=True)
+        """Dump gig to the workspace slot in the background."""
+        self.app.tools.saver.save(workspace=True)
 
     def on_load_workspace(self):
         self.app.data.gig.load(gig_id=0)
@@ -434,10 +442,60 @@ class MenuBar(tk.Frame, PrompToolsAPI):
 
 
     def delete_orphaned_songs(self):
-        """Delete orphaned songs from library."""
-        # TODO: popup confirmation
+        """Delete orphaned songs from library, after confirming with
+        a dry run count."""
         # TODO: fn into the library manager
-        self.db_interface.delete_orphaned_songs()
+        report = self.db_interface.delete_orphaned_songs(dry_run=True)
+        if not report["orphans"]:
+            self.helper.popup("No orphaned songs in library.")
+            return
+        msg = f"Delete {report['orphans']} orphaned songs from the library?"
+        if not messagebox.askokcancel("Delete Orphaned Songs", msg):
+            return
+        report = self.db_interface.delete_orphaned_songs()
+        self.helper.popup(f"Deleted {report['orphans']} orphaned songs.")
+
+    def import_folder(self):
+        """Bulk import every chart in a folder (and its subfolders) into
+        the library, in the background."""
+        root = filedialog.askdirectory(
+            title="Import Folder", initialdir=self.settings.paths.texts.get()
+        )
+        if not root:
+            return
+        refresh = lambda report: self.gui.browser.library.refresh_library()
+        self.app.tools.importer.start(root, on_done=refresh)
+
+    def import_rtf_book(self):
+        """Split one rtf file of many songs into the library, a song per page
+        or heading, in the background."""
+        path = filedialog.askopenfilename(
+            title="Import RTF Book",
+            initialdir=self.settings.paths.texts.get(),
+            filetypes=[("RTF", "*.rtf")],
+        )
+        if not path:
+            return
+        refresh = lambda report: self.gui.browser.library.refresh_library()
+        self.app.tools.importer.start(path, on_done=refresh, split_books=True)
+
+    def clear_parse_cache(self):
+        """Forget every parsed chart file, so they're all parsed fresh."""
+        self.app.tools.parse_cache.clear()
+        self.helper.popup("Cleared parsed file cache.")
+
+    def pack_all_scripts(self):
+        """Convert library scripts stored row-per-word to packed blobs."""
+        count = self.db_interface.pack_all_scripts()
+        self.helper.popup(f"Compacted {count} song scripts.")
+
+    def rebuild_search_index(self):
+        """Reindex every library song for search."""
+        if not self.db_interface.search_index:
+            self.helper.popup("No search index to rebuild, this sqlite build has no FTS5.")
+            return
+        count = self.db_interface.rebuild_search_index()
+        self.helper.popup(f"Indexed {count} songs for search.")
 
     def on_txt_export(self):
         self.txt_export_window = TxtExportWindow(self)
@@ -98,6 +98,10 @@ class FastTransposer(tk.Frame):
         self.current_button = tk.Button(self, text="Apply to Current", pady=5)
         self.current_button.pack(side="top", anchor="n")
 
+        # re-key the live setlist into alternate versions in the entered key
+        self.setlist_button = tk.Button(self, text="Re-key Setlist", pady=5, command=self.rekey_setlist)
+        self.setlist_button.pack(side="top", anchor="n")
+
     def toggle_enable(self):
         if self.enabled.get():
             self.entry.configure(state="normal")
@@ -125,5 +129,14 @@ class FastTransposer(tk.Frame):
 
         self.refresh()
 
+    def rekey_setlist(self):
+        """Transpose every song in the live setlist to the entered key,
+        a key like 'Bb' or semitones like '+2'."""
+        key = self.key.get()
+        if not key:
+            self.app.tools.helper.popup("Enter a key to re-key the setlist to.")
+            return
+        self.app.data.gigdata.live_setlist.rekey(key)
+
     def push_updates(self):
         self.refresh()
\ No newline at end of file
@@ -0,0 +1,7 @@
+# tests import the app's modules the way the app does (common.ids,
+# tools.words, ...), so app/ goes on the path, whichever directory pytest
+# is run from.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,96 @@
+# golden output corpus for the tagger: the demo charts, seeded synthetic
+# charts and some hand picked edge cases, and a hash of each chart's tags
+# (after resolve_ambiguities) as recorded in data/golden_tags.json.
+# test_golden_tags.py checks the tagger still agrees, so a refactor can be
+# shown to change nothing. re-record only for intended changes.
+# run from app/:  python -m tests.golden_tags [check|record]
+import os
+import json
+import hashlib
+import argparse
+
+from tools.bench_tagger import DEMO, load_corpus
+from tools.bench import slice_chart
+from tools.chart_gen import ChartSpec, ChartGenerator
+from tools.song import Song, SongFactory
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "golden_tags.json")
+
+# synthetic corpora, by name: (spec, charts)
+SPECS = {
+    "default": (ChartSpec(), 100),
+    "dense": (ChartSpec(lines=30, chord_density=0.9, slash_chords=0.4), 50),
+    "messy": (ChartSpec(lines=40, headers=0.3, typos=0.2), 50),
+}
+
+# lines the context rules have opinions about
+EDGES = (
+    "A\nAm\nA Am\nAm A\nA A A A\n",
+    "A   D   E   A\nA girl I knew\nAm I the one\n",
+    "VERSE 1:\nA\nCHORUS A\n",
+    "1 2 3 4\nC 1 G 2\nverse 2 of 3\n2\n",
+    "I\nI I\nI am here\nHEADER I\n",
+    "A B C D E F G A B C D E F G Am Am Am Am hello A\n",
+    "| C | G/B | Am | F | C | G/B | A | Am | 1 | 2 |\n",
+    "(C)\n(C\nC)\nCxz Am7 A hello\n",
+    "words words words words A words 7 words\n",
+    "*\n: A\nA :\nINTRO: A D E\n",
+)
+
+
+# helpers
+def digest(tk_tuples) -> str:
+    return hashlib.blake2b(repr(list(tk_tuples)).encode(), digest_size=16).hexdigest()
+
+def corpus(factory) -> dict:
+    """Sliced charts by name."""
+    charts = {}
+    for i, slices in enumerate(load_corpus(factory, DEMO)):
+        charts[f"demo/{i}"] = slices
+    for name, (spec, count) in SPECS.items():
+        for i, chart in enumerate(ChartGenerator(spec, seed=i).charts(count)):
+            charts[f"{name}/{i}"] = slice_chart(factory, chart)
+    for i, chart in enumerate(EDGES):
+        charts[f"edge/{i}"] = slice_chart(factory, chart)
+    return charts
+
+def load_golden(path=GOLDEN) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def changed_charts(golden, tags) -> list:
+    """Names of the charts whose tags differ, or are only in one of them."""
+    return sorted(name for name in golden.keys() | tags.keys() if golden.get(name) != tags.get(name))
+
+def tag_corpus(factory) -> dict:
+    """Hash of the tags of every chart, by name."""
+    tagger = factory.tagger
+    return {
+        name: digest(tagger.auto_tag(Song(None), slices).tk_tuples)
+        for name, slices in corpus(factory).items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check tagger output against the golden tags.")
+    parser.add_argument("command", nargs="?", choices=("check", "record"), default="check")
+    parser.add_argument("--golden", default=GOLDEN, help="golden json file")
+    args = parser.parse_args(argv)
+
+    tags = tag_corpus(SongFactory())
+
+    if args.command == "record":
+        with open(args.golden, "w") as f:
+            json.dump(tags, f, indent=0, sort_keys=True)
+        print(f"recorded {len(tags)} charts to {args.golden}")
+        return 0
+
+    changed = changed_charts(load_golden(args.golden), tags)
+    print(f"{len(tags)} charts tagged, {len(changed)} differ from {args.golden}")
+    for name in changed[:20]:
+        print(f"  {name}")
+    return 1 if changed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,19 @@
+# the tagger's output on the golden corpus matches data/golden_tags.json.
+# to re-record after an intended change, from app/:
+#   python -m tests.golden_tags record
+import pytest
+
+from golden_tags import changed_charts, load_golden, tag_corpus
+from tools.song import SongFactory
+
+
+@pytest.fixture(scope="module")
+def tags():
+    return tag_corpus(SongFactory())
+
+
+def test_corpus_matches_golden(tags):
+    golden = load_golden()
+    assert tags.keys() == golden.keys(), "the corpus changed, re-record the golden tags"
+    changed = changed_charts(golden, tags)
+    assert not changed, f"{len(changed)} of {len(golden)} charts tagged differently: {changed[:20]}"
@@ -0,0 +1,95 @@
+# ParseCache hits, reparses and locking against a second cache on the same db.
+import os
+import types
+
+import pytest
+
+from tools.parse_cache import ParseCache
+from tools.song import SongFactory
+
+CHART = "Amazing Grace\n\nG C G\nAmazing grace how sweet the sound\n"
+
+
+class Value:
+    """Stands in for a tk variable."""
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class CountingFactory(SongFactory):
+    """Counts parses, and runs during() in the middle of each one."""
+    def __init__(self, app, during=None):
+        SongFactory.__init__(self, app, cache_songs=False)
+        self.parses = 0
+        self.during = during
+
+    def new_song(self, meta=None, **kwargs):
+        if "file" in kwargs:
+            self.parses += 1
+            self.during() if self.during else None
+        return SongFactory.new_song(self, meta, **kwargs)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = types.SimpleNamespace(
+        suite=None,
+        settings=types.SimpleNamespace(
+            paths=types.SimpleNamespace(parse_cache=Value(str(tmp_path / "parse_cache.db"))),
+            importer=types.SimpleNamespace(valid_ext=(".txt", ".rtf")),
+        ),
+    )
+    app.app = app
+    return app
+
+@pytest.fixture
+def chart(tmp_path):
+    path = tmp_path / "grace.txt"
+    path.write_text(CHART, encoding="utf-8")
+    return str(path)
+
+def make_cache(app, during=None):
+    return ParseCache(app, factory=CountingFactory(app, during))
+
+
+def test_unchanged_file_is_a_hit(app, chart):
+    cache = make_cache(app)
+    first = cache.new_song(chart)
+    second = cache.new_song(chart)
+    assert cache.factory.parses == 1 and cache.hits == 1
+    assert second.tk_tuples == first.tk_tuples
+    assert second.name == first.name
+    cache.close()
+
+def test_touched_file_is_a_hit(app, chart):
+    cache = make_cache(app)
+    cache.new_song(chart)
+    stat = os.stat(chart)
+    os.utime(chart, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.new_song(chart)
+    cache.new_song(chart)
+    assert cache.factory.parses == 1 and cache.hits == 2
+    cache.close()
+
+def test_edited_file_is_reparsed(app, chart):
+    cache = make_cache(app)
+    first = cache.new_song(chart)
+    with open(chart, "a", encoding="utf-8") as f:
+        f.write("D G D\nWas blind but now I see\n")
+    second = cache.new_song(chart)
+    assert cache.factory.parses == 2
+    assert len(second.tk_tuples) > len(first.tk_tuples)
+    cache.close()
+
+def test_parse_doesnt_lock_the_db(app, chart):
+    """Another cache on the same db can write while a file is parsed."""
+    other = make_cache(app)
+    other.connection.connection.execute("PRAGMA busy_timeout = 0")
+    cache = make_cache(app, during=other.clear)
+    cache.new_song(chart)
+    assert cache.factory.parses == 1
+    cache.close()
+    other.close()
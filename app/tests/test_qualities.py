@@ -0,0 +1,112 @@
+# parity of the trie based quality walk in common/ids.py with the split based
+# recursive checkers it replaced in words.py and transposer.py. the old
+# versions live on here as the reference.
+import random
+import itertools
+
+import pytest
+
+import common.ids as ids
+from tools import transposer
+from tools.words import WordFactory
+
+# characters the walk cares about, plus a few it should reject
+ALPHABET = sorted(set("".join(ids.qualities)) | set("/#b CGxs"))
+
+
+# reference implementations, as they were
+def split_qual_checker(quals) -> bool:
+    if not quals:
+        return True
+    for q in ids.qualities:
+        if quals.startswith(q):
+            return split_qual_checker(quals.split(q)[-1])
+    return False
+
+def split_chord_id(chord, slash_flag=False) -> bool:
+    if not chord and not slash_flag:
+        return True
+    elif not chord and slash_flag:
+        return False
+    for t in ids.diatonics:
+        if chord.startswith(t):
+            chord = chord.split(t)[-1]
+            for a in ids.accidentals:
+                chord = chord.split(a)[-1] if chord.startswith(a) else chord
+            return False if chord else True if slash_flag else split_qual_id(chord)
+    return False
+
+def split_qual_id(chord) -> bool:
+    if not chord:
+        return True
+    if chord.startswith("/"):
+        return split_chord_id(chord.split("/")[-1], slash_flag=True)
+    for q in ids.qualities:
+        if chord.startswith(q):
+            return split_qual_id(chord.split(q)[-1])
+    return False
+
+
+# helpers
+def candidates(length=3, count=20000, seed=0):
+    """Every string over ALPHABET up to length, then count random strings
+    glued together from qualities, notes and noise."""
+    for n in range(length + 1):
+        for chars in itertools.product(ALPHABET, repeat=n):
+            yield "".join(chars)
+
+    parts = ids.qualities + ids.chromatics + ("/", "x", " ", "sus", "susus")
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rnd.choice(parts) for _ in range(rnd.randint(1, 12)))
+
+
+TAGGER = WordFactory()
+CHECKS = {
+    "recursive_qual_checker": (split_qual_checker, TAGGER.recursive_qual_checker),
+    "transposer.recursive_qual_checker": (split_qual_checker, transposer.recursive_qual_checker),
+    "valid_qualities": (split_qual_checker, ids.valid_qualities),
+    "recursive_chord_id": (split_chord_id, TAGGER.recursive_chord_id),
+    "recursive_qual_id": (split_qual_id, TAGGER.recursive_qual_id),
+}
+
+EDGE_CASES = {
+    "empty": "",
+    "prefix of a quality": "su",
+    "prefix of a longer quality": "ma",
+    "quality then its prefix": "7su",
+    "unknown tail": "maj7x",
+    "unknown head": "xmaj7",
+    "repeated quality": "sussus",
+    "quality overlapping the next": "susus",
+    "space": "m 7",
+    "slash chord": "m7/G",
+    "slash to nothing": "m7/",
+    "slash to a sharp": "7/F#",
+    "slash to a quality": "7/Gm",
+    "double slash": "7/G/B",
+    "non ascii": "°Δ7",
+}
+
+
+@pytest.mark.parametrize("name", CHECKS)
+def test_matches_reference(name):
+    reference, function = CHECKS[name]
+    failures = [
+        (word, reference(word), function(word))
+        for word in candidates()
+        if bool(reference(word)) != bool(function(word))
+    ]
+    assert not failures, f"{len(failures)} disagreements, first: {failures[:5]}"
+
+
+@pytest.mark.parametrize("name", CHECKS)
+@pytest.mark.parametrize("word", EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_edge_cases(name, word):
+    reference, function = CHECKS[name]
+    assert bool(function(word)) == bool(reference(word))
+
+
+@pytest.mark.parametrize("word, valid", [("", True), ("su", False), ("maj7x", False), ("sus4", True)])
+def test_valid_qualities(word, valid):
+    assert ids.valid_qualities(word) is valid
@@ -0,0 +1,73 @@
+# library search, with the fts5 index and with the LIKE fallback used when
+# sqlite has no fts5.
+import pytest
+
+import tools.db_interface as db_interface
+from tools.bench import HeadlessApp
+from tools.check_db import make_songs
+
+
+@pytest.fixture
+def no_fts5(monkeypatch):
+    monkeypatch.setattr(db_interface, "has_fts5", lambda cur: False)
+
+def open_app(tmp_path, songs=0):
+    """An app on tmp_path's library, first adding songs titled Song 1.. Song n."""
+    app = HeadlessApp(str(tmp_path / "library.db"))
+    if songs:
+        add_songs(app, [f"Song {i}" for i in range(1, songs + 1)])
+    return app
+
+def add_songs(app, names):
+    songs = make_songs(app, len(names))
+    for song, name in zip(songs, names):
+        song.meta.name = name
+    app.db_interface.dump_songs(songs)
+
+def titles(rows) -> list:
+    return [row[2] for row in rows]
+
+def has_table(db, name) -> bool:
+    with db.open_db() as cur:
+        return cur.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def test_index_search(tmp_path):
+    app = open_app(tmp_path, 12)
+    db = app.db_interface
+    assert db.search_index
+    assert titles(db.search_songs("song 7", columns=["title"])) == ["Song 7"]
+    assert db.search_songs("zzyzx") == []
+    db.close()
+
+def test_starts_without_fts5(tmp_path, no_fts5):
+    app = open_app(tmp_path, 12)
+    db = app.db_interface
+    assert not db.search_index and not has_table(db, "song_search")
+    with db.open_db() as cur:
+        assert cur.execute("PRAGMA user_version").fetchone()[0] == len(db.migrations)
+
+    assert titles(db.search_songs("song 7")) == ["Song 7"]
+    assert titles(db.search_songs("SONG 1", columns=["title"]))[:4] == ["Song 1", "Song 10", "Song 11", "Song 12"]
+    assert db.search_songs("song", columns=["lyrics"]) == []
+    assert db.search_songs("  ") == []
+    assert db.rebuild_search_index() == 0
+    assert db.delete_orphaned_songs()["orphans"] == 0
+    db.close()
+
+def test_like_search_is_literal(tmp_path, no_fts5):
+    app = open_app(tmp_path)
+    db = app.db_interface
+    add_songs(app, ["a_b", "axb"])
+    assert titles(db.search_songs("a_b")) == ["a_b"]
+    db.close()
+
+def test_index_added_once_fts5_is_there(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_interface, "has_fts5", lambda cur: False)
+    open_app(tmp_path, 5).db_interface.close()
+    monkeypatch.undo()
+
+    db = open_app(tmp_path).db_interface
+    assert db.search_index and has_table(db, "song_search")
+    assert titles(db.search_songs("song 3", columns=["title"])) == ["Song 3"]
+    db.close()
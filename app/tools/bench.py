@@ -0,0 +1,336 @@
+# headless benchmark suite. times tagging, transposition (cold and cached),
+# text layout, tk dump conversion and library round trips over synthetic
+# charts (see tools.chart_gen), writes the results as json, and compares two
+# result files for regressions.
+# run from app/:
+#   python -m tools.bench run [--songs N] [--repeat N] [--out results.json]
+#   python -m tools.bench compare old.json new.json [--threshold 0.1]
+import os
+import sys
+import json
+import time
+import types
+import sqlite3
+import platform
+import argparse
+import tempfile
+import statistics
+import tkinter as tk
+from urllib.request import pathname2url
+
+import regex as re
+
+import common.res as res
+from common.settings import LibrarySettings, TagSettings, TransposerSettings
+from tools.chart_gen import ChartSpec, ChartGenerator
+from tools.db_interface import DatabaseManager
+from tools.song import Song, SongFactory, timestamp
+from tools.tk_text_interface import TkTextInterface
+from tools.transposer import Transposer
+
+# bump when cases change meaning, compare refuses to mix versions
+RESULTS_VERSION = 2
+
+# relative slowdown flagged by compare
+THRESHOLD = 0.1
+
+
+# helpers
+def slice_chart(factory, string) -> list:
+    """Slice a chart the way SongFactory.ingest_string_new does."""
+    song, string = factory.strip_meta_from_string(Song(None), string)
+    return [s for s in re.split(res.id_slices, string) if s]
+
+def tk_dump(tk_tuples) -> list:
+    """What Text.dump(tag=True, text=True) returns for a song pushed to a
+    text widget, built without one."""
+    dump = []
+    for pos, tag, word in tk_tuples:
+        dump.extend((("tagon", tag, pos), ("text", word, pos), ("tagoff", tag, pos)))
+    return dump
+
+def copy_db(db, folder) -> str:
+    """Copy db into folder and return the copy's path. Opening a db with
+    DatabaseManager migrates it, so benchmarks run on a copy and never
+    write to the user's library. db itself is only opened read only."""
+    copy = os.path.join(folder, os.path.basename(db))
+    source = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db))}?mode=ro", uri=True)
+    target = sqlite3.connect(copy)
+    try:
+        # the backup api takes in anything still in db's write ahead log
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return copy
+
+def time_runs(function, repeat) -> list:
+    """Seconds taken by each of repeat calls to function."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+class HeadlessApp:
+    """Just enough app for the benchmarked tools to run without a display.
+    Settings are the real settings modules, at their defaults so runs on
+    different machines are comparable, with tk variables living in a tcl
+    interpreter instead of a window."""
+
+    def __init__(self, db):
+        self.app = self
+        self.suite = None
+
+        # tk variables need a default root. tcl alone doesn't need a display.
+        tk._default_root = tk._default_root or tk.Tcl()
+
+        self.custom = {}
+        self.settings = types.SimpleNamespace(
+            app=self,
+            custom=self.custom,
+            library=LibrarySettings(self, "LibrarySettings"),
+            tags=TagSettings(self, "TagSettings"),
+            transposer=TransposerSettings(self, "TransposerSettings"),
+            paths=types.SimpleNamespace(db=tk.StringVar(value=db)),
+        )
+        self.settings.transposer.enabled.set(True)
+
+        self.factory = SongFactory()
+        self.transposer = Transposer(self)
+        self.tk_text_interface = TkTextInterface(self)
+        self.db_interface = DatabaseManager(self)
+
+
+class Bench:
+    """Runs each benchmark case over the same corpus. A case returns the
+    number of items it processed and the unit they're counted in."""
+
+    def __init__(self, app, charts, repeat=5, transposition=2):
+        self.app = app
+        self.repeat = repeat
+        self.transposition = transposition
+
+        factory = app.factory
+        self.corpus = [slice_chart(factory, chart) for chart in charts]
+        self.songs = [factory.tagger.auto_tag(Song(None), s) for s in self.corpus]
+        self.scripts = [list(song.tk_tuples) for song in self.songs]
+        self.dumps = [tk_dump(script) for script in self.scripts]
+
+        # the transposer raises on some mangled words the tagger lets through,
+        # its cases skip the songs with those
+        self.transposable = [song for song in self.songs if self.can_transpose(song)]
+
+        self.cases = {
+            "tag": self.tag,
+            "transpose": self.transpose,
+            "transpose_view": self.transpose_view,
+            "layout": self.layout,
+            "tkt_to_ptt": self.tkt_to_ptt,
+            "db_dump": self.db_dump,
+            "db_load": self.db_load,
+        }
+
+        # ids of the songs written by db_dump, for db_load
+        self.song_ids = []
+
+    def can_transpose(self, song) -> bool:
+        try:
+            self.app.transposer.transpose_script(song=song, target=str(self.transposition))
+            return True
+        except (IndexError, KeyError, TypeError, ValueError):
+            return False
+
+    def tag(self):
+        """WordFactory.auto_tag over every chart, starting from a cold cache."""
+        tagger = self.app.factory.tagger
+        tagger.clear_cache()
+        for slices in self.corpus:
+            tagger.auto_tag(Song(None), slices)
+        return sum(len(slices) for slices in self.corpus), "tokens"
+
+    def transpose(self):
+        """Transposer.transpose_script on every song, uncached: the compiled
+        script and views are dropped first, so each call compiles the song."""
+        transposer = self.app.transposer
+        target = str(self.transposition)
+        for song in self.transposable:
+            song.compiled = None
+            song.views = {}
+            transposer.transpose_script(song=song, target=target)
+        return sum(len(song.tk_tuples) for song in self.transposable), "tokens"
+
+    def transpose_view(self):
+        """Transposer.view flipping every song between two cached keys."""
+        transposer = self.app.transposer
+        for song in self.transposable:
+            transposer.view(song=song, target=str(self.transposition))
+            transposer.view(song=song, target="0")
+        return 2 * len(self.transposable), "views"
+
+    def layout(self):
+        """Transposer.layout_tk on every song, the python half of rendering
+        a song into a text widget."""
+        transposer = self.app.transposer
+        for song in self.songs:
+            transposer.layout_tk(song)
+        return sum(len(script) for script in self.scripts), "tokens"
+
+    def tkt_to_ptt(self):
+        """TkTextInterface.tkt_to_ptt on a text widget dump of every song."""
+        interface = self.app.tk_text_interface
+        for dump in self.dumps:
+            interface.tkt_to_ptt(dump)
+        return sum(len(dump) for dump in self.dumps), "entries"
+
+    def db_dump(self):
+        """DatabaseManager.dump_songs, every song as a new library entry."""
+        for song, script in zip(self.songs, self.scripts):
+            song.song_id = song.library_id = None
+            song.tk_tuples = script
+        self.app.db_interface.dump_songs(self.songs)
+        self.song_ids = [song.song_id for song in self.songs]
+        return len(self.songs), "songs"
+
+    def db_load(self):
+        """Load the songs db_dump wrote back into song objects."""
+        self.song_ids or self.db_dump()
+        pool = self.app.db_interface.load_many_songs_to_d(self.song_ids)
+        songs = self.app.factory.make_many_songs(pool.values())
+        return len(songs), "songs"
+
+    def check_round_trip(self) -> bool:
+        """True if songs come back from the db with the scripts they went in with."""
+        self.db_dump()
+        pool = self.app.db_interface.load_many_songs_to_d(self.song_ids)
+        return [pool[i]["tk_tuples"] for i in self.song_ids] == self.scripts
+
+    def run(self, case) -> dict:
+        function = self.cases[case]
+        items, unit = function()  # warm up, and count
+        runs = time_runs(function, self.repeat)
+        return {
+            "items": items,
+            "unit": f"{unit}/sec",
+            "runs": runs,
+            "throughput": items / min(runs),
+            "median": items / statistics.median(runs),
+        }
+
+
+def run(args) -> int:
+    spec = ChartSpec(
+        lines=args.lines,
+        chord_density=args.chord_density,
+        keys=tuple(args.keys.split(",")),
+        headers=args.headers,
+        slash_chords=args.slash_chords,
+        typos=args.typos,
+    )
+    charts = ChartGenerator(spec, args.seed).charts(args.songs)
+    cases = args.cases.split(",") if args.cases else None
+
+    with tempfile.TemporaryDirectory() as folder:
+        app = HeadlessApp(os.path.join(folder, "bench.db"))
+        bench = Bench(app, charts, args.repeat, args.transposition)
+        unknown = set(cases or ()) - set(bench.cases)
+        if unknown:
+            print(f"unknown cases: {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 2
+
+        results = {}
+        for case in cases or bench.cases:
+            results[case] = bench.run(case)
+            print(f"{case:<12} {results[case]['throughput']:>12.0f} {results[case]['unit']}")
+        round_trip = bench.check_round_trip()
+        app.db_interface.close()
+
+    print("db round trip " + ("ok" if round_trip else "MISMATCH"))
+    report = {
+        "version": RESULTS_VERSION,
+        "created": timestamp(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": spec.as_dict(),
+        "songs": args.songs,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "round_trip": round_trip,
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.out}")
+    return 0 if round_trip else 1
+
+
+def compare(args) -> int:
+    """Print throughput changes from old to new, flagging any case that got
+    slower by more than the threshold. Returns 1 if any did."""
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    if old.get("version") != new.get("version"):
+        print("results come from different versions of the suite", file=sys.stderr)
+        return 2
+    if (old["spec"], old["songs"], old["seed"]) != (new["spec"], new["songs"], new["seed"]):
+        print("warning: runs used different corpora, numbers may not compare")
+
+    regressions = []
+    for case, result in new["results"].items():
+        before = old["results"].get(case)
+        if not before:
+            print(f"{case:<12} {'new':>10}")
+            continue
+        change = result["throughput"] / before["throughput"] - 1
+        flag = change < -args.threshold
+        regressions.append(case) if flag else None
+        print(
+            f"{case:<12} {before['throughput']:>12.0f} -> {result['throughput']:>12.0f} "
+            f"{result['unit']:<12} {change:>+8.1%}" + ("  REGRESSION" if flag else "")
+        )
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tagging, transposing and the library.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    spec = ChartSpec()
+    runner = commands.add_parser("run", help="run the benchmarks")
+    runner.add_argument("--songs", type=int, default=200, help="charts to generate")
+    runner.add_argument("--lines", type=int, default=spec.lines, help="lines per chart")
+    runner.add_argument("--chord-density", type=float, default=spec.chord_density, help="share of chord lines")
+    runner.add_argument("--keys", default=",".join(spec.keys), help="comma separated keys to pick from")
+    runner.add_argument("--headers", type=float, default=spec.headers, help="share of header lines")
+    runner.add_argument("--slash-chords", type=float, default=spec.slash_chords, help="share of slash chords")
+    runner.add_argument("--typos", type=float, default=spec.typos, help="share of mangled words")
+    runner.add_argument("--seed", type=int, default=0)
+    runner.add_argument("--repeat", type=int, default=5, help="timed runs per case, best is kept")
+    runner.add_argument("--transposition", type=int, default=2, help="semitones to transpose by")
+    runner.add_argument("--cases", help="comma separated cases to run, default all")
+    runner.add_argument("--out", help="json file to write results to")
+    runner.set_defaults(function=run)
+
+    comparer = commands.add_parser("compare", help="compare two result files")
+    comparer.add_argument("old")
+    comparer.add_argument("new")
+    comparer.add_argument("--threshold", type=float, default=THRESHOLD, help="slowdown to flag, 0.1 = 10%%")
+    comparer.set_defaults(function=compare)
+
+    args = parser.parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
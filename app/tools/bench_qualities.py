@@ -0,0 +1,55 @@
+# timing of the trie based quality walk in common/ids.py against the split
+# based recursive checker it replaced. parity with the old checkers is
+# covered by tests/test_qualities.py.
+# run from app/:  python -m tools.bench_qualities [--count N]
+import time
+import random
+import argparse
+
+import common.ids as ids
+
+
+# the checker the trie replaced, as it was
+def split_qual_checker(quals) -> bool:
+    if not quals:
+        return True
+    for q in ids.qualities:
+        if quals.startswith(q):
+            return split_qual_checker(quals.split(q)[-1])
+    return False
+
+
+# helpers
+def candidates(count, seed=0) -> list:
+    """count random strings glued together from qualities, notes and noise."""
+    parts = ids.qualities + ids.chromatics + ("/", "x", " ", "sus", "susus")
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(parts) for _ in range(rnd.randint(1, 12))) for _ in range(count)]
+
+def time_function(function, words, repeat=5) -> float:
+    """Return calls/sec of function over words."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for word in words:
+            function(word)
+    return len(words) * repeat / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the quality walk.")
+    parser.add_argument("--count", type=int, default=200000, help="random strings to draw the sample from")
+    args = parser.parse_args(argv)
+
+    # time on the strings a chart actually throws at it
+    words = candidates(args.count)
+    sample = [w for w in words if split_qual_checker(w)] or words
+    before = time_function(split_qual_checker, sample)
+    after = time_function(ids.valid_qualities, sample)
+    print(f"valid qualities, {len(sample)} strings:")
+    print(f"  split:  {before:>10.0f} checks/sec")
+    print(f"  trie:   {after:>10.0f} checks/sec ({after / before:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
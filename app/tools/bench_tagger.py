@@ -0,0 +1,84 @@
+# tokens/sec of WordFactory.auto_tag over a folder of charts, with the single
+# scan classifier vs the strategy-by-strategy reference it replaced, with and
+# without the word cache.
+# run from app/:  python -m tools.bench_tagger [folder] [--repeat N]
+import os
+import time
+import argparse
+
+import regex as re
+
+import common.res as res
+from tools.importer import find_charts
+from tools.song import Song, SongFactory
+from tools.words import WordFactory
+
+DEMO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "demo")
+
+
+# helpers
+def load_corpus(factory, root, valid_ext=(".txt", ".rtf")) -> list:
+    """Read every chart under root and slice it the way
+    SongFactory.ingest_string_new does."""
+    corpus = []
+    for path in find_charts(root, valid_ext):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            string = f.read()
+        string = factory.rtf_importer.strip(string, path) if path.endswith(".rtf") else string
+        song, string = factory.strip_meta_from_string(Song(None), string)
+        corpus.append([s for s in re.split(res.id_slices, string) if s])
+    return corpus
+
+def run_tagger(tagger, corpus, classify=None, repeat=1) -> tuple:
+    """Tag the corpus repeat times, with classify instead of the tagger's
+    own if given. Returns (tokens/sec, tk_tuples of the last pass)."""
+    tagger.clear_cache()
+    tagger.classify = classify or tagger.classify
+    try:
+        tokens = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            output = [tagger.auto_tag(Song(None), slices).tk_tuples for slices in corpus]
+            tokens += sum(len(slices) for slices in corpus)
+        seconds = time.perf_counter() - start
+    finally:
+        del tagger.classify
+    return tokens / seconds, output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark WordFactory tagging.")
+    parser.add_argument("folder", nargs="?", default=DEMO, help="folder of charts")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus")
+    args = parser.parse_args(argv)
+
+    factory = SongFactory()
+    tagger = factory.tagger
+    uncached = WordFactory(cache_size=0)
+    corpus = load_corpus(factory, args.folder)
+    tokens = sum(len(slices) for slices in corpus)
+    print(f"{len(corpus)} charts, {tokens} tokens, {args.repeat} passes")
+    if not tokens:
+        return 1
+
+    before, expected = run_tagger(uncached, corpus, uncached.classify_by_strategies, args.repeat)
+    scan, scan_output = run_tagger(uncached, corpus, None, args.repeat)
+    cached, output = run_tagger(tagger, corpus, None, args.repeat)
+    info = tagger.cache_info()
+
+    print(f"strategies:    {before:>10.0f} tokens/sec")
+    print(f"single scan:   {scan:>10.0f} tokens/sec ({scan / before:.2f}x)")
+    print(f"scan + cache:  {cached:>10.0f} tokens/sec ({cached / before:.2f}x)")
+    print(
+        f"word cache: {info['hits']} hits, {info['misses']} misses "
+        f"({info['hit_rate']:.1%}), {info['size']}/{info['maxsize']} words"
+    )
+    if scan_output != expected or output != expected:
+        print("MISMATCH: tags differ from the strategy reference")
+        return 1
+    print("tags identical")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+# whole library transposition into all 12 keys: the word at a time walk vs
+# the transpose table, song by song and batched over the library, with and
+# without numpy. checks every engine gives the walk's scripts.
+# run from app/:  python -m tools.bench_transpose [--songs N | --db library.db] [--repeat N]
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+import tools.transpose_table as transpose_table
+from tools.bench import HeadlessApp, copy_db, slice_chart
+from tools.chart_gen import ChartSpec, ChartGenerator
+from tools.song import Song
+
+KEYS = tuple(str(k) for k in range(12))
+
+
+# helpers
+def library_songs(app) -> list:
+    """Every song in app's library db."""
+    with app.db_interface.open_db() as cur:
+        song_ids = app.db_interface.get_all_ids(cur, "song_id", "song_meta") or []
+    pool = app.db_interface.load_many_songs_to_d(song_ids)
+    return app.factory.make_many_songs(pool.values())
+
+def synthetic_songs(app, count, seed) -> list:
+    tagger = app.factory.tagger
+    charts = ChartGenerator(ChartSpec(), seed).charts(count)
+    return [tagger.auto_tag(Song(None), slice_chart(app.factory, chart)) for chart in charts]
+
+def transposable(transposer, songs) -> list:
+    """The songs the word at a time walk can take to every key. The rest
+    raise there, and raise the same way through the table."""
+    ok = []
+    for song in songs:
+        try:
+            for target in KEYS:
+                transposer.transpose_tokens(song, transposer.convert_transposition_to_int_tk(song, target))
+            ok.append(song)
+        except Exception:
+            pass
+    return ok
+
+def best(function, repeat) -> tuple:
+    """(fastest of repeat runs in seconds, output of the last run)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        times.append(time.perf_counter() - start)
+    return min(times), output
+
+
+class Engines:
+    """Ways of taking every song to every key. Each returns the scripts,
+    key by key, song by song."""
+
+    def __init__(self, transposer, songs):
+        self.transposer = transposer
+        self.songs = songs
+
+    def walk(self):
+        tr = self.transposer
+        return [
+            [tr.transpose_tokens(song, tr.convert_transposition_to_int_tk(song, key)) for song in self.songs]
+            for key in KEYS
+        ]
+
+    def table_by_song(self):
+        tr = self.transposer
+        return [[tr.transpose_script(song, key) for song in self.songs] for key in KEYS]
+
+    def table_batched(self):
+        return [self.transposer.transpose_scripts(self.songs, key) for key in KEYS]
+
+    def compile(self):
+        """Compiling the library from cold, which the table engines only pay once."""
+        table = transpose_table.TransposeTable()
+        for song in self.songs:
+            song.compiled = None
+            table.compile(song)
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark transposing a whole library into all 12 keys.")
+    parser.add_argument("--songs", type=int, default=1000, help="synthetic songs to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--db", help="library db to transpose instead of synthetic songs. it's copied first, never written to"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per engine, best is kept")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as folder:
+        app = HeadlessApp(copy_db(args.db, folder) if args.db else os.path.join(folder, "bench.db"))
+        songs = library_songs(app) if args.db else synthetic_songs(app, args.songs, args.seed)
+        app.db_interface.close()
+
+    transposer = app.transposer
+    use_numpy = transposer.table.use_numpy
+    library = transposable(transposer, songs)
+    words = sum(len(s.tk_tuples) for s in library)
+    print(f"{len(library)} of {len(songs)} songs transposable, {words} tokens, into {len(KEYS)} keys")
+    if not library:
+        return 1
+
+    engines = Engines(transposer, library)
+    runs = [
+        ("word walk", engines.walk, None),
+        ("table by song", engines.table_by_song, False),
+        ("table batched", engines.table_batched, False),
+    ]
+    if transpose_table.np is not None:
+        runs.append(("table batched + numpy", engines.table_batched, True))
+    else:
+        print("numpy isn't installed, skipping the numpy engine")
+
+    compiled, _ = best(engines.compile, args.repeat)
+    expected = None
+    mismatch = False
+    baseline = None
+    for name, function, numpy in runs:
+        transposer.table.use_numpy = bool(numpy)
+        seconds, output = best(function, args.repeat)
+        baseline = baseline or seconds
+        expected = expected or output
+        mismatch |= output != expected
+        print(
+            f"{name:<22} {seconds * 1000:>9.1f} ms  {len(library) * len(KEYS) / seconds:>10.0f} song-keys/sec  "
+            f"{words * len(KEYS) / seconds:>11.0f} tokens/sec ({baseline / seconds:.2f}x)"
+        )
+    transposer.table.use_numpy = use_numpy
+    print(f"{'compile (once)':<22} {compiled * 1000:>9.1f} ms")
+
+    if mismatch:
+        print("MISMATCH: an engine's scripts differ from the word walk")
+        return 1
+    print("scripts identical")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
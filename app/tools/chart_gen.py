@@ -0,0 +1,146 @@
+# synthetic chord charts for benchmarking the tagger, transposer and library.
+# charts look like the ones people actually import: a title, a bracketed key,
+# section headers, chord lines over lyric lines, with a tunable share of slash
+# chords, typos and the ambiguous 'A' / 'Am' words the tagger has to decide.
+# run from app/:  python -m tools.chart_gen folder [--songs N] [--seed N]
+import os
+import random
+import argparse
+from dataclasses import dataclass, asdict
+
+import common.ids as ids
+
+# scale degrees (semitones above the key) and the triad quality on each
+MAJOR_DEGREES = ((0, ""), (2, "m"), (4, "m"), (5, ""), (7, ""), (9, "m"))
+MINOR_DEGREES = ((0, "m"), (3, ""), (5, "m"), (7, "m"), (8, ""), (10, ""))
+
+# extensions added on top of a triad now and then
+EXTENSIONS = ("7", "maj7", "sus4", "sus2", "add9", "6", "9", "2")
+
+HEADERS = ("VERSE", "CHORUS", "BRIDGE", "PRE-CHORUS", "INTRO", "OUTRO", "TAG")
+
+# lyric vocabulary. 'A', 'Am' and 'I' are in on purpose, they're the words
+# that look like chords
+WORDS = (
+    "A", "Am", "I", "a", "the", "love", "light", "you", "me", "we", "and",
+    "never", "going", "home", "tonight", "heart", "so", "far", "away",
+    "hold", "on", "to", "what", "we", "had", "river", "run", "down",
+    "Every", "day", "Good", "morning", "Bring", "it", "all", "back",
+)
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Shape of the generated charts. Densities are fractions, 0 to 1."""
+    lines: int = 60  # lines per chart, not counting the title
+    chord_density: float = 0.5  # share of lines that are chord lines
+    keys: tuple = ("C", "G", "D", "A", "E", "F", "Bb", "Eb", "Am", "Em", "Dm")
+    headers: float = 0.1  # chance a line is a section header
+    slash_chords: float = 0.1  # chance a chord has a bass note
+    typos: float = 0.02  # chance a word is mangled
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["keys"] = list(self.keys)
+        return d
+
+
+# helpers
+def spell(note_id, flats) -> str:
+    """Spell a note id with the key's accidentals."""
+    return ids.NOTE_ID_ACCIDENTALS[note_id % 12][-1 if flats else 0]
+
+def key_parts(key) -> tuple:
+    """Return (root id, minor, flats) for a key like 'Bb' or 'Am'."""
+    minor = key.endswith("m")
+    root = ids.NOTE_IDS[key[:-1] if minor else key]
+    flats = root in (ids.FLAT_MIN_IDS if minor else ids.FLAT_MAJ_IDS)
+    return root, minor, flats
+
+
+class ChartGenerator:
+    """Builds chart strings to a ChartSpec. Seeded, so the same spec and
+    seed always give the same charts."""
+
+    def __init__(self, spec=None, seed=0):
+        self.spec = spec or ChartSpec()
+        self.random = random.Random(seed)
+
+    def chord(self, key) -> str:
+        """A chord from the key, sometimes extended or over a bass note."""
+        rnd = self.random
+        root, minor, flats = key_parts(key)
+        degree, quality = rnd.choice(MINOR_DEGREES if minor else MAJOR_DEGREES)
+        chord = spell(root + degree, flats) + quality
+        chord += rnd.choice(EXTENSIONS) if rnd.random() < 0.2 else ""
+        if rnd.random() < self.spec.slash_chords:
+            chord += "/" + spell(root + rnd.choice(MAJOR_DEGREES)[0], flats)
+        return chord
+
+    def typo(self, word) -> str:
+        """Mangle a word the way charts get mangled."""
+        rnd = self.random
+        strategies = (
+            lambda: "(" + word,  # unclosed key bracket
+            lambda: word + ")",
+            lambda: word + rnd.choice("xzq"),  # junk qualities
+            lambda: word.lower(),
+        )
+        return rnd.choice(strategies)()
+
+    def maybe_typo(self, word) -> str:
+        return self.typo(word) if self.random.random() < self.spec.typos else word
+
+    def chord_line(self, key) -> str:
+        rnd = self.random
+        chords = [self.maybe_typo(self.chord(key)) for _ in range(rnd.randint(1, 6))]
+        return "".join(c + " " * rnd.randint(1, 8) for c in chords).rstrip()
+
+    def lyric_line(self) -> str:
+        rnd = self.random
+        words = [self.maybe_typo(rnd.choice(WORDS)) for _ in range(rnd.randint(3, 10))]
+        return " ".join(words)
+
+    def chart(self, title="Untitled") -> str:
+        """One chart, as the text a chart file would hold."""
+        rnd = self.random
+        spec = self.spec
+        key = rnd.choice(spec.keys)
+        lines = [f"{title} ({key})", ""]
+        verse = 1
+        while len(lines) < spec.lines + 1:
+            roll = rnd.random()
+            if roll < spec.headers:
+                header = rnd.choice(HEADERS)
+                header += f" {verse}" if header == "VERSE" else ""
+                verse += header.startswith("VERSE")
+                lines.extend(("", header + ":"))
+            elif roll < spec.headers + spec.chord_density:
+                lines.append(self.chord_line(key))
+            else:
+                lines.append(self.lyric_line())
+        return "\n".join(lines[:spec.lines + 1]) + "\n"
+
+    def charts(self, count) -> list:
+        return [self.chart(f"Song {i + 1}") for i in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic charts to a folder.")
+    parser.add_argument("folder", help="folder to write .txt charts to")
+    parser.add_argument("--songs", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=ChartSpec.lines)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.folder, exist_ok=True)
+    generator = ChartGenerator(ChartSpec(lines=args.lines), args.seed)
+    for i, chart in enumerate(generator.charts(args.songs)):
+        with open(os.path.join(args.folder, f"song_{i + 1:04d}.txt"), "w") as f:
+            f.write(chart)
+    print(f"wrote {args.songs} charts to {args.folder}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
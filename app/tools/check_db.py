@@ -0,0 +1,156 @@
+# checks for the library db. each check runs against a fresh db in a temp
+# folder and fails with an AssertionError saying what went wrong.
+# run from app/:  python -m tools.check_db [check ...]
+import os
+import sys
+import argparse
+import tempfile
+import threading
+import traceback
+import types
+
+from tools.bench import HeadlessApp, slice_chart
+from tools.chart_gen import ChartGenerator
+from tools.db_interface import ConnectionManager
+from tools.importer import BulkImporter
+from tools.snapshot import SaveOptions
+from tools.song import Song
+
+
+# helpers
+def make_songs(app, count, seed=0) -> list:
+    """Tagged synthetic songs, not yet in the db."""
+    tagger = app.factory.tagger
+    charts = ChartGenerator(seed=seed).charts(count)
+    return [tagger.auto_tag(Song(None), slice_chart(app.factory, chart)) for chart in charts]
+
+def load_songs(app, song_ids) -> list:
+    pool = app.db_interface.load_many_songs_to_d(song_ids)
+    return app.factory.make_many_songs([pool[i] for i in song_ids])
+
+def import_charts(app, folder, count, seed=0) -> dict:
+    """Write synthetic charts to folder and bulk import them."""
+    for i, chart in enumerate(ChartGenerator(seed=seed).charts(count)):
+        with open(os.path.join(folder, f"chart{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(chart)
+    app.tools = types.SimpleNamespace(db_interface=app.db_interface)
+    importer = BulkImporter(app)
+    return importer.import_directory(folder, (".txt",), SaveOptions.of(app.settings.library), workers=1)
+
+
+def check_dump_loaded_song(app):
+    """A clean song loaded from the library keeps its script when dumped
+    again, as a new entry or overwritten in place."""
+    db = app.db_interface
+    songs = make_songs(app, 2)
+    db.dump_songs(songs)
+
+    for overwrite in (False, True):
+        app.settings.library.overwrite_songs.set(overwrite)
+        loaded = load_songs(app, [songs[0].song_id])[0]
+        assert not loaded.dirty, "a song loaded from the db should start out clean"
+        db.dump_song(loaded)
+        reloaded = load_songs(app, [loaded.song_id])[0]
+        assert reloaded.tk_tuples == songs[0].tk_tuples, (
+            f"script of song {loaded.song_id} didn't survive a dump (overwrite_songs={overwrite})"
+        )
+        assert (loaded.song_id == songs[0].song_id) == overwrite
+
+
+def check_concurrent_writes(app):
+    """A write transaction that reads first still gets to write when another
+    connection writes in the meantime, eg. the saver and the rekeyer, each
+    on its own connection. A deferred BEGIN fails here with 'database is
+    locked', the other connection's commit having made its read stale."""
+    db = app.db_interface
+    db.dump_songs(make_songs(app, 1))
+    first, second = ConnectionManager(db.db), ConnectionManager(db.db)
+    errors = []
+
+    def write_second():
+        try:
+            with second.transaction(write=True) as cur:
+                cur.execute("UPDATE song_meta SET comments = 'second'")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            second.close()
+
+    try:
+        with first.transaction(write=True) as cur:
+            cur.execute("SELECT comments FROM song_meta").fetchall()
+            thread = threading.Thread(target=write_second)
+            thread.start()
+            # give second the chance to write before first does
+            thread.join(0.2)
+            cur.execute("UPDATE song_meta SET comments = 'first'")
+        thread.join()
+        assert not errors, f"second connection failed to write: {errors[0]!r}"
+        comments = first.connection.execute("SELECT comments FROM song_meta").fetchone()[0]
+        assert comments == "second", f"writes weren't made one after the other, got {comments!r}"
+    finally:
+        first.close()
+
+
+def check_orphaned_songs(app):
+    """Imported songs are library songs, never orphans, and so are kept.
+    An alternate version nothing uses is an orphan, and is deleted."""
+    db = app.db_interface
+    with tempfile.TemporaryDirectory() as folder:
+        report = import_charts(app, folder, 5)
+    assert report["imported"] == 5 and not report["failed"], f"import failed: {report}"
+    library = sorted(row[0] for row in db.get_all_song_meta_from_db())
+    assert db.get_orphaned_song_ids() == [], "imported library songs were counted as orphans"
+
+    # saved again as a new entry, a loaded song becomes an alternate version
+    app.settings.library.overwrite_songs.set(False)
+    alternate = load_songs(app, [library[0]])[0]
+    db.dump_song(alternate)
+    assert alternate.song_id not in library and alternate.library_id == library[0]
+    assert db.get_orphaned_song_ids() == [alternate.song_id]
+
+    report = db.delete_orphaned_songs(dry_run=True)
+    assert report["orphans"] == 1
+    assert report["packed_scripts"] + report["unpacked_scripts"] == 1, f"counted scripts wrong: {report}"
+    assert db.delete_orphaned_songs()["orphans"] == 1
+    remaining = sorted(row[0] for row in db.get_all_song_meta_from_db())
+    assert remaining == library, f"expected the library songs {library} to be kept, got {remaining}"
+
+
+CHECKS = {
+    "dump_loaded_song": check_dump_loaded_song,
+    "concurrent_writes": check_concurrent_writes,
+    "orphaned_songs": check_orphaned_songs,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the library db.")
+    parser.add_argument("checks", nargs="*", help=f"checks to run, default all: {', '.join(CHECKS)}")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.checks) - set(CHECKS)
+    if unknown:
+        print(f"unknown checks: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    failed = []
+    for name in args.checks or CHECKS:
+        with tempfile.TemporaryDirectory() as folder:
+            app = HeadlessApp(os.path.join(folder, "check.db"))
+            try:
+                CHECKS[name](app)
+                print(f"ok      {name}")
+            except Exception:
+                failed.append(name)
+                print(f"FAILED  {name}")
+                traceback.print_exc()
+            finally:
+                app.db_interface.close()
+
+    print(f"{len(failed)} of {len(args.checks or CHECKS)} checks failed" if failed else "all checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
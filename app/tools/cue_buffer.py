@@ -0,0 +1,62 @@
+# renders the cued song ahead of time. as soon as a song is cued, its view
+# for the current transposer settings is worked out and laid out for a text
+# widget (see Transposer.layout_tk), while tk is idle. going live then hands
+# the prepared segments straight to the talent and editor windows instead of
+# transposing and laying the song out again for each.
+import logging
+
+from tools.api import PrompToolsAPI
+
+# layouts kept. enough for the cued, live and previewed songs
+SIZE = 4
+
+
+class CueBuffer(PrompToolsAPI):
+    """Layouts of recently shown scripts, for an empty text widget. A layout
+    is reused while it was made from the very same script tuple (scripts and
+    views are immutable, so identity means the content hasn't changed) and
+    the nashville setting it was made with."""
+
+    def __init__(self, app):
+        PrompToolsAPI.__init__(self, app)
+
+        # most recent last: (script, nashville, layout)
+        self.entries = []
+        self.pending = False
+
+    def layout(self, song, script=None) -> tuple:
+        """Return song's script laid out for an empty text widget, from
+        the buffer if it's there."""
+        script = script if script is not None else song.tk_tuples
+        nashville = self.settings.transposer.nashville.get()
+
+        for i, (buffered, buffered_nashville, layout) in enumerate(self.entries):
+            if buffered is script and buffered_nashville == nashville:
+                self.entries.append(self.entries.pop(i))
+                return layout
+
+        layout = self.tools.transposer.layout_tk(song, script)
+        self.entries.append((script, nashville, layout))
+        del self.entries[:-SIZE]
+        return layout
+
+    def prepare_soon(self):
+        """Prepare the cued song once tk is idle, so cueing stays snappy."""
+        if not self.pending:
+            self.pending = True
+            self.gui.after_idle(self.prepare)
+
+    def prepare(self):
+        """Work out the cued song's view and layout, ready for going live."""
+        self.pending = False
+        song = self.deck.cued
+        if not song or song.tk_tuples is None:
+            return
+        loader = self.loader
+        try:
+            self.layout(song, loader.update_song_mods(song, loader.get_key()))
+        except Exception:
+            # it'll fail the same way when it's shown, and be reported then
+            logging.exception(f"CueBuffer: couldn't prepare {song.name}")
+            return
+        logging.info(f"CueBuffer: prepared {song.name}")
@@ -34,6 +34,11 @@ class Setlist:
         # songs contains songs as they are ordered in this setlist
         self.songs = []
 
+        # change tracking, see GigData.dirty
+        self.version = 0
+        self.saved_version = None
+        self.saved_ids = None
+
         # if passing gig data, look to the pool for song associations instead
         # of creating new ones. otherwise, generate new song objects.
         self.link_songs(gig_data, d) if gig_data else self.import_songs(d.get("songs"))
@@ -42,6 +47,9 @@ class Setlist:
         self.setlist_id = d.get("setlist_id")
         self.library_id = d.get("library_id")
 
+        # linked setlists came from the db, so they start out clean
+        self.mark_saved() if gig_data else None
+
     def refresh(method):
         """Decorator that updates markers and does all callbacks."""
 
@@ -71,13 +79,49 @@ class Setlist:
     def add(self, song) -> None:
         if song not in self.songs:
             self.songs.append(song)
+            self.touch()
         if song not in self.parent.pool.songs:
             self.parent.pool.add(song)
 
+    @refresh
+    def replace(self, swaps: dict) -> None:
+        """Put songs in the places of others, {old: new}, eg. alternate
+        versions of them. New songs join the pool."""
+        for i, song in enumerate(self.songs):
+            new = swaps.get(song)
+            if new is not None:
+                self.songs[i] = new
+                self.touch()
+                self.parent.pool.add(new) if new not in self.parent.pool.songs else None
+
+    def rekey(self, keys, on_done=None) -> bool:
+        """Transpose the setlist into alternate versions in the background,
+        see tools.rekeyer. keys maps songs to targets, or is one target
+        for every song."""
+        return self.app.tools.rekeyer.rekey(self, keys, on_done)
+
     @refresh
     def move(self, song_i, dest):
         i = min(dest, len(self.songs) - 1)
         self.songs.insert(i, self.songs.pop(song_i))
+        self.touch()
+
+    def touch(self):
+        self.version += 1
+
+    def mark_saved(self, version=None, ids=None):
+        self.saved_version = self.version if version is None else version
+        self.saved_ids = self.song_ids if ids is None else list(ids)
+
+    @property
+    def song_ids(self):
+        return [song.song_id for song in self.songs]
+
+    @property
+    def dirty(self):
+        """True if the ordering or the song ids it points to have changed
+        since the last save."""
+        return self.saved_version != self.version or self.saved_ids != self.song_ids
 
     @property
     def pool(self):
@@ -93,6 +137,7 @@ class Setlist:
         # TODO: clear song metadata from right pane
         song = self.songs[i]
         self.songs.remove(song)
+        self.touch()
 
 
 class PoolData: 
@@ -103,6 +148,11 @@ class PoolData:
         self.parent = parent
         self.songs = []
 
+        # change tracking, see GigData.dirty
+        self.version = 0
+        self.saved_version = None
+        self.saved_ids = None
+
     def refresh(method):
         """Decorator that updates markers and does all callbacks."""
 
@@ -118,9 +168,28 @@ class PoolData:
 
     def add(self, song):
         self.songs.append(song)
+        self.touch()
 
     def clear(self):
         self.songs.clear()
+        self.touch()
+
+    def touch(self):
+        self.version += 1
+
+    def mark_saved(self, version=None, ids=None):
+        self.saved_version = self.version if version is None else version
+        self.saved_ids = self.song_ids if ids is None else list(ids)
+
+    @property
+    def song_ids(self):
+        return [song.song_id for song in self.songs]
+
+    @property
+    def dirty(self):
+        """True if the ordering or the song ids it points to have changed
+        since the last save."""
+        return self.saved_version != self.version or self.saved_ids != self.song_ids
 
     def load(self, songs: dict):
         # TODO: optional merge-load
@@ -132,6 +201,7 @@ class PoolData:
     @refresh
     def remove(self,song):
         self.songs.remove(song)
+        self.touch()
 
 
 class GigData:
@@ -166,12 +236,18 @@ class GigData:
         self._live_setlist = 0
         self._gig_id = None
 
+        # change tracking. saved_store_id is the gig_id the workspace was
+        # last loaded from or saved to, None if it's never touched the db.
+        self.saved_store_id = None
+        self.saved_name = None
+        self.saved_setlist_ids = None
+
     def reload_workspace(self):
         """Reload the workspace from DB."""
         self.load(gig_id=0)
 
     def dump(self, workspace=False):
-        self.app.tools.db_interface.dump_gig(gig=self, workspace=False)
+        self.app.tools.db_interface.dump_gig(gig=self, workspace=workspace)
 
     @refresh
     def clear(self):
@@ -208,6 +284,64 @@ class GigData:
     def load_with_gig_id(self, gig_id: int):
         gig_data = self.app.tools.db_interface.make_gig_dict(gig_id)
         self.load_from_gig_data(gig_data)
+        self.mark_saved(store_id=gig_id)
+
+    @property
+    def setlist_ids(self):
+        return [setlist.setlist_id for setlist in self.setlists]
+
+    @property
+    def songs(self):
+        """All songs in the pool and setlists, without duplicates."""
+        songs = {id(song): song for song in self.pool.songs}
+        for setlist in self.setlists:
+            songs.update((id(song), song) for song in setlist.songs)
+        return list(songs.values())
+
+    def apply_save(self, snapshot, result):
+        """Apply the ids from a saved GigSnapshot (see db_interface.dump_snapshot)
+        to the objects it was taken from. Anything changed since the snapshot
+        was taken stays dirty."""
+        song_ids = [song_id for song_id, library_id in result["song_ids"]]
+        refs = snapshot.refs
+
+        self.gig_id = result["gig_id"]
+        for song, snap, (song_id, library_id) in zip(refs["songs"], snapshot.songs, result["song_ids"]):
+            song.song_id, song.library_id = song_id, library_id
+            song.mark_saved(snap.version)
+        for setlist, snap, setlist_id in zip(refs["setlists"], snapshot.setlists, result["setlist_ids"]):
+            setlist.setlist_id = setlist_id
+            setlist.mark_saved(snap.version, [song_ids[i] for i in snap.songs])
+        self.pool.mark_saved(snapshot.pool.version, [song_ids[i] for i in snapshot.pool.songs])
+
+        self.saved_store_id = result["store_id"]
+        self.saved_name = snapshot.name
+        self.saved_setlist_ids = list(result["setlist_ids"])
+
+    def mark_saved(self, store_id):
+        """Mark the gig and everything in it as matching what's stored
+        in the db at store_id."""
+        self.saved_store_id = store_id
+        self.saved_name = self.name
+        self.saved_setlist_ids = self.setlist_ids
+        self.pool.mark_saved()
+        for setlist in self.setlists:
+            setlist.mark_saved()
+        for song in self.songs:
+            song.mark_saved()
+
+    @property
+    def dirty(self):
+        """True if anything in the gig has changed since it was last
+        loaded or saved."""
+        return (
+            self.saved_store_id is None
+            or self.saved_name != self.name
+            or self.saved_setlist_ids != self.setlist_ids
+            or self.pool.dirty
+            or any(setlist.dirty for setlist in self.setlists)
+            or any(song.dirty for song in self.songs)
+        )
 
     @refresh
     def load_from_gig_data(self, gig_data: dict) -> None:
@@ -289,9 +423,7 @@ class GigData:
         if song in self.live_setlist.songs:
             self.helper.popup("song already in live setlist")
             return
-        if song not in self.pool.songs:
-            self.pool.append(song)
-        self.live_setlist.songs.append(song) 
+        self.live_setlist.add(song)
 
     @refresh
     def add_song_to_pool(self, song):
@@ -1,38 +1,285 @@
 import sqlite3
 import logging
+import regex as re
+import heapq
+import threading
+import time
+from dataclasses import replace
 from contextlib import contextmanager
 
+from tools.script_packer import pack_script, unpack_script
+from tools.snapshot import GigSnapshot, SaveOptions, SongSnapshot
+
+# pragmas applied to every connection the app opens. WAL lets readers and the
+# writer work side by side and only fsyncs at checkpoints, NORMAL sync is
+# durable enough under WAL, and the rest keeps temp b-trees and hot pages
+# in memory.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", -16000),
+    ("busy_timeout", 5000),
+)
+
 # helpers
-@contextmanager
-def open_db(file_name: str):
-    """Conext manager for sqlite3 connections."""
-    connection = sqlite3.connect(file_name)
-    try:
-        yield connection.cursor()
-    finally:
-        connection.commit()
-        connection.close()
-    # TODO: if an exception occurs, maybe rollback instead of committing...
-
-def lowest_unused(l: list) -> int:
-    """Return lowest int that doesn't appear in a list."""
-
-    l.sort()
-    last = len(l) - 1
-    logging.info(f"lowest unused recieved: {l}")
-
-    for i, curr in enumerate(l):
-        if i == last:
-            return l[-1] + 1
-        n = curr + 1
-        if n != l[i + 1]:
-            logging.info(f'lowest_unused returned {n}')
-            return n
+class ConnectionManager:
+    """Owns a single long-lived sqlite3 connection and hands out cursors
+    wrapped in explicit transactions. Transactions nest, so a method that
+    opens one can be called from inside another and everything commits
+    (or rolls back) together at the outermost level."""
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self._connection = None
+        self._depth = 0
+        self._writing = False
+        self.callbacks = []
+
+    @property
+    def connection(self):
+        """Return the open connection, connecting on first use."""
+        if self._connection is None:
+            self._connection = self.connect(self.file_name)
+        return self._connection
+
+    @staticmethod
+    def connect(file_name: str):
+        """Open a connection in autocommit mode (transactions are managed
+        explicitly) and apply the app pragmas."""
+        logging.info(f"opening db connection: {file_name}")
+        connection = sqlite3.connect(file_name, isolation_level=None)
+        for pragma, value in PRAGMAS:
+            connection.execute(f"PRAGMA {pragma}={value}")
+        return connection
+
+    @contextmanager
+    def transaction(self, write=False):
+        """Context manager yielding a cursor inside a transaction. Commits
+        when the outermost block exits cleanly, rolls back on error.
+
+        Pass write=True for transactions that write. They begin IMMEDIATE,
+        taking the write lock up front (waiting out busy_timeout for it).
+        A deferred transaction that reads first can't take the lock once
+        another connection has committed, so it would fail straight away
+        with 'database is locked'. A nested write=True needs the outermost
+        transaction to be a write too."""
+        cur = self.connection.cursor()
+        outermost = self._depth == 0
+        if outermost:
+            cur.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            self._writing = write
+        elif write and not self._writing:
+            logging.warning("write transaction nested in a read transaction, it may fail to lock")
+        self._depth += 1
+        try:
+            yield cur
+        except BaseException:
+            self._depth -= 1
+            if outermost:
+                logging.warning("db transaction failed, rolling back")
+                self.connection.rollback()
+                self.do_callbacks()
+            raise
+        else:
+            self._depth -= 1
+            if outermost:
+                self.connection.commit()
+        finally:
+            cur.close()
+
+    def add_callback(self, c):
+        """Add a callback to run after a rollback."""
+        self.callbacks.append(c)
+
+    def do_callbacks(self):
+        [c() for c in self.callbacks]
+
+    def close(self):
+        """Close the connection if open."""
+        if self._connection is None:
+            return
+        logging.info(f"closing db connection: {self.file_name}")
+        self._connection.close()
+        self._connection = None
+        self._depth = 0
+
+
+class IdAllocator:
+    """Hands out unused integer ids for a table's primary key. The first
+    request for a table reads its max id and any gaps below it. After
+    that, ids come from an in-memory free-list (lowest first) or from
+    the max + 1. Each candidate is confirmed with a primary key lookup,
+    so a stale free-list never hands out an id that is taken. Shared by
+    every connection (see tools.saver), so access is locked."""
+
+    def __init__(self):
+        # (key, table): [free-list heap, lowest id above everything used]
+        self.state = {}
+        self.lock = threading.RLock()
+
+    def allocate(self, cur, key, table) -> int:
+        """Return the lowest known unused id. Starts at 1 for an empty table."""
+        with self.lock:
+            return self._allocate(cur, key, table)
+
+    def _allocate(self, cur, key, table) -> int:
+        if (key, table) not in self.state:
+            self.load(cur, key, table)
+        state = self.state[(key, table)]
+        free = state[0]
+
+        while free:
+            candidate = heapq.heappop(free)
+            if self.in_use(cur, key, table, candidate):
+                continue
+            # the next id up may be free too, it gets checked when popped
+            follow = candidate + 1
+            if follow < state[1] and follow not in free:
+                heapq.heappush(free, follow)
+            return candidate
+
+        candidate = state[1]
+        if self.in_use(cur, key, table, candidate):
+            # something else wrote past our mark, resync
+            candidate = self.max_id(cur, key, table) + 1
+        state[1] = candidate + 1
+        return candidate
+
+    def load(self, cur, key, table):
+        """Read the max id and the start of every gap below it."""
+        top = self.max_id(cur, key, table)
+        cur.execute(
+            f"""SELECT a.{key} + 1 FROM {table} a
+            LEFT JOIN {table} b ON b.{key} = a.{key} + 1
+            WHERE b.{key} IS NULL AND a.{key} < ?""",
+            (top,),
+        )
+        free = [row[0] for row in cur.fetchall()]
+        heapq.heapify(free)
+        self.state[(key, table)] = [free, top + 1]
+
+    def release(self, key, table, ids):
+        """Return deleted ids to the free-list. Ids below 1 are never
+        handed out (gig_id 0 is the workspace)."""
+        with self.lock:
+            state = self.state.get((key, table))
+            if state is None:
+                return
+            for i in ids:
+                heapq.heappush(state[0], i) if 0 < i < state[1] else None
+
+    def reset(self):
+        """Forget everything, eg. after a rollback undid allocated rows."""
+        with self.lock:
+            self.state.clear()
+
+    @staticmethod
+    def in_use(cur, key, table, i) -> bool:
+        cur.execute(f"SELECT 1 FROM {table} WHERE {key}=?", (i,))
+        return cur.fetchone() is not None
+
+    @staticmethod
+    def max_id(cur, key, table) -> int:
+        """Return the max id in the table, 0 if empty."""
+        cur.execute(f"SELECT MAX({key}) FROM {table}")
+        top = cur.fetchone()[0]
+        return top if top is not None else 0
 
 def sql_q_marks(n):
     """Return '(?, ?, ... ?)' with n '?' marks. Used for SQLite VALUES."""
     return "(" + ", ".join(["?"] * n) + ")"
 
+# alternate versions (song_id != library_id) not referenced by any setlist
+# or pool. library songs are never orphans, even if nothing uses them. NOT IN
+# over the union builds one ephemeral index instead of probing both tables
+# per song.
+ORPHANED_SONG_IDS = """SELECT song_id FROM song_meta WHERE song_id != library_id AND song_id NOT IN (
+    SELECT song_id FROM setlist_songs WHERE song_id IS NOT NULL
+    UNION SELECT song_id FROM pool_data WHERE song_id IS NOT NULL
+    )"""
+
+# older sqlite builds cap bound parameters per statement at 999, so
+# 'WHERE x IN (...)' queries are issued in chunks of this size.
+MAX_VARIABLES = 900
+
+# full text search. song_search rows share their rowid with the song_id.
+SEARCH_COLUMNS = ("title", "lyrics", "comments", "key")
+# bm25 weights, in SEARCH_COLUMNS order. a title hit beats a lyric hit.
+SEARCH_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+SEARCH_LIMIT = 500
+# ranking costs a little per hit, so queries broader than this (one or two
+# letters typed) come back unranked. they narrow as you keep typing.
+SEARCH_RANK_MAX = 2000
+# song_meta columns searched with LIKE when sqlite has no fts5, by
+# SEARCH_COLUMNS name. lyrics have no column of their own.
+LIKE_COLUMNS = {"title": "title", "comments": "comments", "key": "default_key"}
+# filters on song version, by search option
+SEARCH_OPTIONS = {
+    "library": "AND song_meta.song_id == song_meta.library_id",
+    "alternates": "AND song_meta.song_id != song_meta.library_id",
+    "all": "",
+}
+# script tags that aren't lyrics and shouldn't be searchable as such
+SEARCH_SKIP_TAGS = ("chord", "slashchord", "key", "bar", "tagon", "tagoff")
+
+def search_text(script) -> str:
+    """Return the searchable lyric text of a script."""
+    if not script:
+        return ""
+    return "".join(tup[2] for tup in script if tup[1] not in SEARCH_SKIP_TAGS)
+
+def search_key(script):
+    """Return the first key found in a script, if any."""
+    for tup in script or ():
+        if tup[1] == "key":
+            return tup[2]
+    return None
+
+def fts_query(query: str, columns=None) -> str:
+    """Turn a user query into an fts5 MATCH expression. Every word must
+    match, and the last word can be a prefix (search as you type).
+    Restricts the match to columns if given. Returns '' for no words."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    expr = " AND ".join(terms)
+    if columns:
+        expr = f"{{{' '.join(columns)}}} : ({expr})"
+    return expr
+
+def like_query(query: str, columns=None) -> tuple:
+    """The search used when sqlite has no fts5: a (where clause, params)
+    pair matching song_meta rows with every word of query somewhere in
+    columns. Lyrics aren't searchable this way, they're only in the index.
+    Returns ('', []) if there's nothing to search for."""
+    words = re.findall(r"\w+", query)
+    names = [LIKE_COLUMNS[c] for c in columns or SEARCH_COLUMNS if c in LIKE_COLUMNS]
+    if not words or not names:
+        return "", []
+    any_column = "(" + " OR ".join(f"song_meta.{name} LIKE ? ESCAPE '\\'" for name in names) + ")"
+    params = []
+    for word in words:
+        pattern = "%" + word.replace("_", "\\_") + "%"
+        params.extend([pattern] * len(names))
+    return " AND ".join([any_column] * len(words)), params
+
+def has_fts5(cur) -> bool:
+    """Return True if this sqlite build can make fts5 tables."""
+    try:
+        cur.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    cur.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+def chunks(l: list, n: int = MAX_VARIABLES):
+    """Yield successive n-sized slices of a list."""
+    for i in range(0, len(l), n):
+        yield l[i:i + n]
+
 
 class DatabaseManager:
     """Handles all database interactions."""
@@ -40,18 +287,52 @@ class DatabaseManager:
     def __init__(self, app):
         self.app = app
         self.settings = self.app.settings.library
+        self.connection = ConnectionManager(self.db)
+        self.ids = IdAllocator()
+        self.connection.add_callback(self.ids.reset)
+
+        # False when sqlite has no fts5, so there's no song_search to keep
+        # up to date and search_songs falls back to LIKE. see check_search_index
+        self.search_index = False
+
+        # ordered schema migrations. migrations[i] upgrades a db at
+        # user_version i to i + 1. only ever append to this.
+        self.migrations = (
+            self.migrate_add_indexes,
+            self.migrate_add_script_ordinal,
+            self.migrate_add_script_blobs,
+            self.migrate_add_search_index,
+        )
+
         self.init_db(self.db)
+        self.migrate_db(self.db)
+        self.search_index = self.check_search_index()
         self.gen_db_defaults(self.db)
 
     @property
     def db(self):
         return self.app.settings.paths.db.get()
-    
+
+    def open_db(self, write=False):
+        """Return a transaction on the app database connection, see
+        ConnectionManager.transaction for write. Reconnects if the db path
+        setting has changed since the last call."""
+        if self.connection.file_name != self.db:
+            self.connection.close()
+            self.connection = ConnectionManager(self.db)
+            self.connection.add_callback(self.ids.reset)
+            self.ids.reset()
+        return self.connection.transaction(write)
+
+    def close(self):
+        """Close the app database connection. Call on quit."""
+        self.connection.close()
+
     def init_db(self, db):
         """If the db path doesn't exist, create a db with the correct tables."""
 
         logging.info(f"initializing app database: {db}")
-        with open_db(self.db) as cur:
+        with self.open_db(write=True) as cur:
             # TODO: use ISO8601 string format: "YYYY-MM-DD HH:MM:SS.SSS" on created/modified
             # I think my timestamp constructs already use this.
             cur.execute(
@@ -164,6 +445,155 @@ class DatabaseManager:
                 )"""
             )
 
+    def migrate_db(self, db):
+        """Bring the db schema up to date, tracking the schema version in
+        the user_version pragma. Each step runs in the same transaction
+        as its version bump, so a failed step leaves the db untouched."""
+
+        with self.open_db(write=True) as cur:
+            version = cur.execute("PRAGMA user_version").fetchone()[0]
+            latest = len(self.migrations)
+            if version > latest:
+                logging.warning(f"db schema v{version} is newer than app (v{latest})")
+                return
+            for i, step in enumerate(self.migrations[version:], start=version + 1):
+                logging.info(f"migrating {db} to schema v{i}: {step.__name__}")
+                step(cur)
+                cur.execute(f"PRAGMA user_version={i}")
+
+    def migrate_add_indexes(self, cur):
+        """v1: index the lookup columns. The ordering tables get covering
+        indexes so loading a pool or setlist never touches the table."""
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS setlist_songs_order "
+            "ON setlist_songs (setlist_id, pos, song_id)"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS setlist_songs_song ON setlist_songs (song_id)"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS pool_data_order ON pool_data (gig_id, pos, song_id)"
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS pool_data_song ON pool_data (song_id)")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS gig_setlists_order "
+            "ON gig_setlists (gig_id, pos, setlist_id)"
+        )
+
+    def migrate_add_script_ordinal(self, cur):
+        """v2: add an integer ordinal to song_data so scripts come back in
+        order, and index scripts by (song_id, ord). Existing rows were
+        written in script order, so rowid is a valid ordinal for them."""
+        cur.execute("ALTER TABLE song_data ADD COLUMN ord INTEGER")
+        cur.execute("UPDATE song_data SET ord = rowid")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS song_data_song ON song_data (song_id, ord)"
+        )
+
+    def migrate_add_script_blobs(self, cur):
+        """v3: add song_scripts, which holds a whole script per song as one
+        packed blob (see tools.script_packer). Rows already in song_data
+        stay readable, pack_all_scripts converts them."""
+        cur.execute(
+            """CREATE TABLE if not exists song_scripts (
+            song_id INTEGER PRIMARY KEY,
+            script BLOB,
+            FOREIGN KEY (song_id) REFERENCES song_meta(song_id)
+            )"""
+        )
+
+    def migrate_add_search_index(self, cur):
+        """v4: add song_search, an fts5 index over song titles, lyric text,
+        comments and keys, and fill it from the existing library. Left out
+        if sqlite has no fts5, check_search_index adds it later if it can."""
+        self.create_search_index(cur)
+
+    def create_search_index(self, cur) -> bool:
+        """Create and fill song_search. Returns False, creating nothing, if
+        this sqlite build has no fts5."""
+        if not has_fts5(cur):
+            return False
+        cur.execute(
+            f"""CREATE VIRTUAL TABLE if not exists song_search USING fts5(
+            {", ".join(SEARCH_COLUMNS)},
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '1 2 3'
+            )"""
+        )
+        self.search_index = True
+        self.rebuild_search_index(cur)
+        return True
+
+    def check_search_index(self) -> bool:
+        """Return True if song_search is there to use. A db migrated where
+        sqlite had no fts5 gets its index here, once opened where it has."""
+        with self.open_db() as cur:
+            if cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'song_search'").fetchone():
+                return True
+        with self.open_db(write=True) as cur:
+            if self.create_search_index(cur):
+                return True
+        logging.warning("sqlite has no fts5, library search falls back to LIKE without lyrics")
+        return False
+
+    def rebuild_search_index(self, cur=None) -> int:
+        """Rebuild song_search from song_meta and the stored scripts.
+        Returns the number of songs indexed, 0 if there's no index."""
+        if not self.search_index:
+            return 0
+        if cur is None:
+            with self.open_db(write=True) as cur:
+                return self.rebuild_search_index(cur)
+
+        cur.execute("DELETE FROM song_search")
+        cur.execute("SELECT song_id FROM song_meta")
+        song_ids = [row[0] for row in cur.fetchall()]
+        for chunk in chunks(song_ids):
+            metadata = self.get_many_song_metadata(cur, chunk)
+            scripts = self.get_many_song_scripts(cur, chunk)
+            cur.executemany(
+                f"INSERT INTO song_search (rowid, {', '.join(SEARCH_COLUMNS)}) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        song_id,
+                        d.get("title"),
+                        search_text(scripts.get(song_id)),
+                        d.get("comments"),
+                        d.get("default_key") or search_key(scripts.get(song_id)),
+                    )
+                    for song_id, d in metadata.items()
+                ),
+            )
+        self.optimize_search_index(cur)
+        logging.info(f"rebuild_search_index indexed {len(song_ids)} songs")
+        return len(song_ids)
+
+    def optimize_search_index(self, cur):
+        """Merge the search index down after bulk changes. Deletes leave
+        tombstones behind that slow every later query until merged."""
+        if not self.search_index:
+            return
+        cur.execute("INSERT INTO song_search (song_search) VALUES ('optimize')")
+
+    def pack_all_scripts(self) -> int:
+        """Convert every script stored as song_data rows into a packed
+        song_scripts blob. Returns the number of songs converted."""
+
+        with self.open_db(write=True) as cur:
+            cur.execute("SELECT DISTINCT song_id FROM song_data")
+            song_ids = [row[0] for row in cur.fetchall()]
+            for chunk in chunks(song_ids):
+                scripts = self.get_song_data_scripts(cur, chunk)
+                cur.executemany(
+                    "INSERT OR REPLACE INTO song_scripts (song_id, script) VALUES (?, ?)",
+                    ((k, pack_script(v)) for k, v in scripts.items()),
+                )
+            cur.execute("DELETE FROM song_data")
+
+        logging.info(f"pack_all_scripts packed {len(song_ids)} scripts")
+        return len(song_ids)
+
     def gen_db_defaults(self, db):
         """Create any default entries needed for the app to work expectedly.
         For example, gig_id 0 should always exist as a placeholder for workspace,
@@ -172,7 +602,7 @@ class DatabaseManager:
         a workspace save."""
 
         logging.info(f"gen_db_defaults in db_interface: {db}")
-        with open_db(self.db) as cur:
+        with self.open_db(write=True) as cur:
             self.gen_workspace(cur)
 
     def gen_workspace(self, cur):
@@ -187,20 +617,12 @@ class DatabaseManager:
 
     def choose_id(self, cur, key, table):
         """Choose the an unused id for a given db key.
-        Currently finds lowest available. If table is empty, starts at 0."""
-        # TODO: this is implemented a degree too nested imo
+        Currently finds lowest available. If table is empty, starts at 1."""
 
-        logging.info(f"choose_id in DatabaseManager")
-        used_ids = self.get_all_ids(cur, key, table)
-        out = lowest_unused(used_ids) if used_ids else 1
+        out = self.ids.allocate(cur, key, table)
         logging.info(f'choose_id chose the id {out}')
         return out
 
-        # TODO: old, delete once this is confirmed working
-        # query = f"SELECT {key} FROM {table}"
-        # fetched = cur.execute(query).fetchall()
-        # return lowest_unused([tup[0] for tup in fetched]) if fetched else 1
-
     def get_all_ids(self, cur, key, table):
         """Get all ids from a table."""
         query = f"SELECT {key} FROM {table}"
@@ -208,38 +630,93 @@ class DatabaseManager:
         return [tup[0] for tup in fetched] if fetched else None
 
     def dump_gig(self, gig, workspace=False):
-        """Dump the workspace back to db,
-        either as a gig or to workspace slot."""
-
-        self.assign_gig_id(gig)
-        store_id = 0 if workspace else gig.gig_id
+        """Dump the workspace back to db, either as a gig or to workspace
+        slot, on this thread. See tools.saver for saving in the background.
+        Only what changed since the last load or save is written."""
+
+        snapshot = GigSnapshot.of(gig, workspace, SaveOptions.of(self.settings))
+        if not snapshot.dirty:
+            logging.info("dump_gig: nothing changed, skipping")
+            return
+        with self.open_db(write=True) as cur:
+            result = self.dump_snapshot(snapshot, cur)
+        gig.apply_save(snapshot, result)
+
+    def dump_snapshot(self, snapshot, cur, progress=None) -> dict:
+        """Write a GigSnapshot with cursor cur. Safe to run off the tk
+        thread, as it only reads the snapshot. Runs in cur's transaction,
+        so a failure partway through leaves the previous save intact.
+
+        Only songs and orderings that changed since the gig was last
+        loaded or saved are written. Saving to a different slot than the
+        last one rewrites the orderings, but still skips clean songs.
+        progress(done, total) is called as songs are written.
+
+        Returns the ids assigned, for GigData.apply_save."""
+
+        options = snapshot.options
+        gig_id = snapshot.gig_id
+        gig_id = self.choose_id(cur, "gig_id", "gigs") if gig_id is None else gig_id
+        store_id = 0 if snapshot.workspace else gig_id
+        moved = store_id != snapshot.saved_store_id
+
+        # songs
+        changed = [song for song in snapshot.songs if song.dirty]
+        done = 0
+        song_ids = []
+        for song in snapshot.songs:
+            if song.dirty:
+                song_ids.append(self.write_song(song, cur, options))
+                done += 1
+                progress(done, len(changed)) if progress else None
+            else:
+                song_ids.append((song.song_id, song.library_id))
+        ids = [song_id for song_id, library_id in song_ids]
+
+        # pool ordering
+        if moved or snapshot.pool.dirty(ids):
+            self.dump_pool_ids(store_id, [ids[i] for i in snapshot.pool.songs], cur)
+
+        # setlists, then the gig's setlist ordering
+        setlist_ids = []
+        for setlist in snapshot.setlists:
+            setlist_id = setlist.setlist_id
+            if setlist.dirty(ids) or setlist_id is None:
+                setlist_id = self.setlist_id_strategies(setlist, cur, options)
+                self.dump_song_ids_to_setlist_songs(
+                    [ids[i] for i in setlist.songs], setlist_id, cur
+                )
+                self.dump_setlist_metadata(setlist_id, setlist.title, cur)
+            setlist_ids.append(setlist_id)
+        if moved or snapshot.saved_setlist_ids != tuple(setlist_ids):
+            self.dump_gig_setlist_ids(setlist_ids, store_id, cur)
 
-        # clear everything at the store_id
-        self.clear_db_gig_id(gig_id=store_id)
+        self.dump_gig_meta(store_id, snapshot.name, cur)
 
-        # dump gig to the store_id
-        self.dump_pool(store_id)
-        self.dump_gig_setlists(store_id)
-        self.dump_gig_meta(store_id)
+        return {
+            "gig_id": gig_id,
+            "store_id": store_id,
+            "song_ids": song_ids,
+            "setlist_ids": setlist_ids,
+            "written": len(changed),
+        }
 
     def clear_db_gig_id(self, gig_id):
         """Clear everything associated with a gig_id in the db."""
         logging.info(f'clear_db_gig_id in db_interface, gig_id={gig_id}')
-        with open_db(self.db) as cur:
+        with self.open_db(write=True) as cur:
             cur.execute("DELETE FROM gigs WHERE gig_id=?", (gig_id,))
             cur.execute("DELETE FROM gig_setlists WHERE gig_id=?", (gig_id,))
             cur.execute("DELETE FROM pool_data WHERE gig_id=?", (gig_id,))
 
-    def dump_gig_meta(self, store_id):
+    def dump_gig_meta(self, store_id, name, cur):
         """Dump the gig metadata."""
 
         # TODO: replace with dict dump
         logging.info(f"dumping gig metadata")
-        name = self.app.data.gig.name
-        with open_db(self.db) as cur:
-            cur.execute(
-                "INSERT INTO gigs (gig_id, name) VALUES (?, ?)", (store_id, name)
-            )
+        cur.execute(
+            "INSERT OR REPLACE INTO gigs (gig_id, name) VALUES (?, ?)", (store_id, name)
+        )
 
     def dump_dict_to_row(self, cur, table, d):
         """Dump a dict back into a table row."""
@@ -250,60 +727,72 @@ class DatabaseManager:
         q = f"INSERT OR REPLACE INTO {table} ({k}) VALUES {sql_q_marks(len(d))}"
         cur.execute(q, v)
 
-    def dump_pool(self, gig_id):
-        """Dump pool songs, then their ids into pool_data."""
-
-        self.dump_songs(self.app.data.pool.songs)
-        pool_ids = [song.song_id for song in self.app.data.pool.songs]
-        self.dump_pool_ids(gig_id=gig_id, pool_ids=pool_ids)
+    def dump_pool_ids(self, gig_id, pool_ids, cur):
+        """Dump pool_ids to the db, replacing any stored at the gig_id."""
 
-    def dump_pool_ids(self, gig_id, pool_ids):
-        """Dump pool_ids to the db."""
+        query = "INSERT INTO pool_data (gig_id, pos, song_id) VALUES (?, ?, ?)"
+        cur.execute("DELETE FROM pool_data WHERE gig_id=?", (gig_id,))
+        cur.executemany(query, ((gig_id, i, p) for i, p in enumerate(pool_ids)))
 
-        with open_db(self.db) as cur:
-            for i, p in enumerate(pool_ids):
-                query = "INSERT INTO pool_data (gig_id, pos, song_id) VALUES (?, ?, ?)"
-                cur.execute(query, (gig_id, i, p))
-
-    def delete_orphaned_songs(self) -> None:
+    def delete_orphaned_songs(self, dry_run=False) -> dict:
         """Delete all orphaned songs from library. An orphaned song is
         one which is not referenced in any gig or setlist, and is not
-        a main version of a song (lib_id == song_id)."""
-        orphaned_song_ids = self.get_orphaned_song_ids()
-        with open_db(self.db) as cur:
-            for song_id in orphaned_song_ids:
-                cur.execute("DELETE FROM song_data where song_id=?", (song_id,))
-                cur.execute("DELETE FROM song_meta where song_id=?", (song_id,))
-
-    def get_orphaned_song_ids(self) -> list:
+        a main version of a song (lib_id == song_id).
+
+        Returns a report dict with the orphan count, how many of them have
+        a packed script (one song_scripts blob each) and how many have an
+        unpacked one (unpacked_rows song_data rows between them), and the
+        time taken. With dry_run=True nothing is deleted, the report just
+        says what would be."""
+        start = time.perf_counter()
+        with self.open_db(write=not dry_run) as cur:
+            orphaned_song_ids = self.get_orphaned_song_ids(cur)
+            cur.execute(f"SELECT COUNT(*) FROM song_scripts WHERE song_id IN ({ORPHANED_SONG_IDS})")
+            packed_scripts = cur.fetchone()[0]
+            cur.execute(
+                f"SELECT COUNT(DISTINCT song_id), COUNT(*) FROM song_data WHERE song_id IN ({ORPHANED_SONG_IDS})"
+            )
+            unpacked_scripts, unpacked_rows = cur.fetchone()
+            if not dry_run and orphaned_song_ids:
+                cur.execute(f"DELETE FROM song_data WHERE song_id IN ({ORPHANED_SONG_IDS})")
+                cur.execute(f"DELETE FROM song_scripts WHERE song_id IN ({ORPHANED_SONG_IDS})")
+                if self.search_index:
+                    cur.execute(f"DELETE FROM song_search WHERE rowid IN ({ORPHANED_SONG_IDS})")
+                    self.optimize_search_index(cur)
+                cur.execute(f"DELETE FROM song_meta WHERE song_id IN ({ORPHANED_SONG_IDS})")
+
+        if not dry_run:
+            self.ids.release("song_id", "song_meta", orphaned_song_ids)
+
+        report = {
+            "dry_run": dry_run,
+            "orphans": len(orphaned_song_ids),
+            "packed_scripts": packed_scripts,
+            "unpacked_scripts": unpacked_scripts,
+            "unpacked_rows": unpacked_rows,
+            "seconds": time.perf_counter() - start,
+        }
+        logging.info(f"delete_orphaned_songs: {report}")
+        return report
+
+    def get_orphaned_song_ids(self, cur=None) -> list:
         """Return all orphaned song_ids in a list."""
-        with open_db(self.db) as cur:
-            all_song_ids = self.get_all_ids(cur, "song_id", "song_meta")
-        orphaned_song_ids = []
-        for song_id in all_song_ids:
-            if self.song_is_orphaned(song_id):
-                orphaned_song_ids.append(song_id)
-        return orphaned_song_ids
-
-    def song_is_orphaned(self, song_id):
-        with open_db(self.db) as cur:
-            cur.execute("SELECT * FROM setlist_songs where song_id=?", (song_id,))
-            if cur.fetchone():
-                return False
-            cur.execute("SELECT * FROM pool_data where song_id=?", (song_id,))
-            if cur.fetchone():
-                return False
-        return True
+        if cur is None:
+            with self.open_db() as cur:
+                return self.get_orphaned_song_ids(cur)
+        cur.execute(ORPHANED_SONG_IDS)
+        return [row[0] for row in cur.fetchall()]
 
     def make_gig_dict(self, gig_id):
         """Make a dict with gig_id."""
 
         # TODO: this has to be redone based on the reconfig of pool/setlists
         gig = {}
-        # load metadata
-        gig['metadata'] = self.load_gig_metadata(gig_id)
-        gig['pool'] = self.load_gig_pool(gig_id)
-        gig['setlists'] = self.load_gig_setlists(gig_id=gig_id, pool=gig.get('pool'))
+        # read everything in one transaction so the snapshot is consistent
+        with self.open_db():
+            gig['metadata'] = self.load_gig_metadata(gig_id)
+            gig['pool'] = self.load_gig_pool(gig_id)
+            gig['setlists'] = self.load_gig_setlists(gig_id=gig_id, pool=gig.get('pool'))
         # load setlists, looking up and associating song_ids with objs as you go
         # on dump, pool values get stripped into list
         return gig
@@ -313,14 +802,65 @@ class DatabaseManager:
         return self.load_many_songs_to_d(pool_song_ids)
 
     def load_many_songs_to_d(self, song_ids):
-        """Load many songs to d where song_id is key, song obj is value"""
+        """Load many songs to d where song_id is key, song dict is value.
+        Metadata and scripts for the whole batch are fetched with one
+        query each (per chunk of ids) instead of two per song."""
         logging.info(f'load_many_songs_to_d recieved song_ids: {song_ids}')
         if not song_ids:
             return {}
+        song_ids = list(dict.fromkeys(song_ids))
+        with self.open_db() as cur:
+            metadata = self.get_many_song_metadata(cur, song_ids)
+            scripts = self.get_many_song_scripts(cur, song_ids)
         pool = {}
         for song_id in song_ids:
-            pool[song_id] = self.load_song(song_id)
-        return pool 
+            song = metadata.get(song_id, {})
+            song["tk_tuples"] = scripts.get(song_id)
+            pool[song_id] = song
+        return pool
+
+    def get_many_song_metadata(self, cur, song_ids: list) -> dict:
+        """Return dict of song_id: metadata dict for many song_ids."""
+        metadata = {}
+        for chunk in chunks(song_ids):
+            query = f"SELECT * FROM song_meta WHERE song_id IN {sql_q_marks(len(chunk))}"
+            cur.execute(query, chunk)
+            k = [c[0] for c in cur.description]
+            for row in cur.fetchall():
+                d = dict(zip(k, row))
+                metadata[d["song_id"]] = d
+        return metadata
+
+    def get_many_song_scripts(self, cur, song_ids: list) -> dict:
+        """Return dict of song_id: script for many song_ids, each script
+        a list of (pos, flag, content) tuples in stored order. Packed
+        scripts are read first, anything else comes from song_data rows."""
+        scripts = {}
+        for chunk in chunks(song_ids):
+            query = (
+                "SELECT song_id, script FROM song_scripts "
+                f"WHERE song_id IN {sql_q_marks(len(chunk))}"
+            )
+            cur.execute(query, chunk)
+            for song_id, blob in cur.fetchall():
+                scripts[song_id] = unpack_script(blob)
+
+        unpacked = [song_id for song_id in song_ids if song_id not in scripts]
+        scripts.update(self.get_song_data_scripts(cur, unpacked))
+        return scripts
+
+    def get_song_data_scripts(self, cur, song_ids: list) -> dict:
+        """Return dict of song_id: script read from song_data rows."""
+        scripts = {song_id: [] for song_id in song_ids}
+        for chunk in chunks(song_ids):
+            query = (
+                "SELECT song_id, pos, flag, content FROM song_data "
+                f"WHERE song_id IN {sql_q_marks(len(chunk))} ORDER BY song_id, ord"
+            )
+            cur.execute(query, chunk)
+            for song_id, pos, flag, content in cur:
+                scripts[song_id].append((pos, flag, content))
+        return scripts
 
     def load_many_songs_from_pool(self, song_ids, pool):
         """Return an ordered list of song dicts from provided song_ids."""
@@ -335,8 +875,10 @@ class DatabaseManager:
 
     def get_pool_song_ids(self, gig_id):
         """Get song_ids for a gig_ids pool."""
-        with open_db(self.db) as cur:
-            cur.execute("SELECT song_id FROM pool_data WHERE gig_id=?", (gig_id,))
+        with self.open_db() as cur:
+            cur.execute(
+                "SELECT song_id FROM pool_data WHERE gig_id=? ORDER BY pos", (gig_id,)
+            )
             sel = cur.fetchall()
             if sel:
                 return list(zip(*sel))[0]
@@ -348,7 +890,7 @@ class DatabaseManager:
     def row_to_dict(self, table: str, row: str, value: str or int) -> dict:
         """Return dict of a single row of a table
         where key is the column header."""
-        with open_db(self.db) as cur:
+        with self.open_db() as cur:
             query = f"SELECT * from {table} WHERE {row}=?"
             cur.execute(query, (value,))
             k = [c[0] for c in cur.description] if cur.description else []
@@ -357,28 +899,39 @@ class DatabaseManager:
             return dict(zip(k, v))
 
     def get_gig_setlist_ids(self, gig_id):
-        with open_db(self.db) as cur:
-            cur.execute("SELECT setlist_id FROM gig_setlists WHERE gig_id=?", (gig_id,))
+        """Return list of setlist_ids for a gig_id, in gig order."""
+        with self.open_db() as cur:
+            cur.execute(
+                "SELECT setlist_id FROM gig_setlists WHERE gig_id=? ORDER BY pos",
+                (gig_id,),
+            )
             sel = cur.fetchall()
             if sel:
-                return sel[0]
+                return list(zip(*sel))[0]
 
     def load_gig_setlists(self, gig_id, pool) -> list:
-        """Return list of setlists for a gig_id."""
+        """Return list of setlists for a gig_id. Songs referenced by a
+        setlist but missing from the pool are batch loaded into it."""
         setlists = []
         sids = self.get_gig_setlist_ids(gig_id)
         if sids is None:
             return setlists
 
+        song_ids = self.get_many_setlist_song_ids(sids)
+        missing = [i for ids in song_ids.values() for i in ids if i not in pool]
+        pool.update(self.load_many_songs_to_d(missing))
+
         for sid in sids:
-            setlists.append(self.load_setlist(setlist_id=sid, pool=pool))
+            setlists.append(
+                self.load_setlist(setlist_id=sid, pool=pool, song_ids=song_ids.get(sid))
+            )
         return setlists
 
-    def load_setlist(self, setlist_id, pool):
+    def load_setlist(self, setlist_id, pool, song_ids=None):
         setlist = {}
         # TODO: retrieve + apply metadata
-        # TODO: redundant song load here, done again at gig load
-        song_ids = self.get_setlist_song_ids(setlist_id)
+        if song_ids is None:
+            song_ids = self.get_setlist_song_ids(setlist_id)
         setlist["song_ids"] = song_ids
         setlist["songs"] = self.load_many_songs_from_pool(song_ids=song_ids, pool=pool)
 
@@ -387,7 +940,7 @@ class DatabaseManager:
     def get_setlist_song_ids(self, setlist_id):
         """Return list of song_ids for a setlist_id."""
         logging.info(f'get_setlist_song_ids recieved setlist_id: {setlist_id}')
-        with open_db(self.db) as cur:
+        with self.open_db() as cur:
             cur.execute(
                 "SELECT song_id FROM setlist_songs WHERE setlist_id=? ORDER BY pos",
                 (setlist_id,),
@@ -397,33 +950,87 @@ class DatabaseManager:
                 return list(zip(*sel))[0]
             # return list(zip(*cur.fetchall()))[0]
 
+    def get_many_setlist_song_ids(self, setlist_ids) -> dict:
+        """Return dict of setlist_id: ordered song_ids for many setlists."""
+        song_ids = {setlist_id: [] for setlist_id in setlist_ids}
+        with self.open_db() as cur:
+            for chunk in chunks(list(song_ids)):
+                query = (
+                    "SELECT setlist_id, song_id FROM setlist_songs "
+                    f"WHERE setlist_id IN {sql_q_marks(len(chunk))} "
+                    "ORDER BY setlist_id, pos"
+                )
+                cur.execute(query, chunk)
+                for setlist_id, song_id in cur:
+                    song_ids[setlist_id].append(song_id)
+        return song_ids
+
 
     def dump_song(self, song):
         """Dump a song to the db."""
-        with open_db(self.db) as cur:
-            self.assign_song_ids(song, cur)
-            self.dump_song_script(song, cur)
-            self.dump_song_meta(song, cur)
+        with self.open_db(write=True) as cur:
+            snapshot = SongSnapshot.of(song, full=True)
+            song.song_id, song.library_id = self.write_song(snapshot, cur)
         logging.info(f"added song {song.name} to {self.db}")
 
-    def assign_song_ids(self, song, cur):
-        """Assigns id tags to the song if they don't exist."""
-        song.song_id = self.song_id_strategies(song, cur)
-        song.library_id = self.library_id_strategies(song, cur)
-
-    def dump_song_script(self, song, cur):
-        """Dump song script tuples to db rows."""
-        for tup in song.tk_tuples:
-            self.dump_script_tuple(cur, tup, song.song_id)
-
-    def dump_script_tuple(self, cur, tup, song_id):
-        """Dump the song script (a list of tuples) to the db."""
-        pos, tag, word = tup
-        data = (song_id, pos, tag, word)
+    def write_song(self, song, cur, options=None) -> tuple:
+        """Write a SongSnapshot, returning the (song_id, library_id)
+        it was stored with."""
+        old_id = song.song_id
+        song = replace(song, song_id=self.song_id_strategies(song, cur, options))
+        song = replace(song, library_id=self.library_id_strategies(song, cur))
+        # overwriting in place, so drop the old script first
+        self.clear_song_script(old_id, cur) if song.song_id == old_id else None
+        self.dump_song_script(song, cur, options)
+        self.dump_song_meta(song, cur)
+        self.dump_song_search(song, cur)
+        return song.song_id, song.library_id
+
+    def clear_song_script(self, song_id, cur):
+        """Delete the script stored at a song_id, in either format."""
+        cur.execute("DELETE FROM song_data WHERE song_id=?", (song_id,))
+        cur.execute("DELETE FROM song_scripts WHERE song_id=?", (song_id,))
+
+    def dump_song_script(self, song, cur, options=None):
+        """Dump song script, packed into one blob if the library
+        setting is on, otherwise as song_data rows in one batch."""
+        options = options or SaveOptions.of(self.settings)
+        if options.pack_scripts:
+            self.dump_packed_script(song, cur)
+            return
+
+        song_id = song.song_id
+        rows = (
+            (song_id, i, pos, tag, word)
+            for i, (pos, tag, word) in enumerate(song.tk_tuples)
+        )
         query = (
-            "INSERT INTO song_data (song_id, pos, flag, content) VALUES (?, ?, ?, ?)"
+            "INSERT INTO song_data (song_id, ord, pos, flag, content) "
+            "VALUES (?, ?, ?, ?, ?)"
+        )
+        cur.executemany(query, rows)
+
+    def dump_packed_script(self, song, cur):
+        """Dump song script as a single packed blob."""
+        query = "INSERT OR REPLACE INTO song_scripts (song_id, script) VALUES (?, ?)"
+        cur.execute(query, (song.song_id, pack_script(song.tk_tuples)))
+
+    def dump_song_search(self, song, cur):
+        """Replace the song's row in the search index."""
+        if not self.search_index:
+            return
+        cur.execute("DELETE FROM song_search WHERE rowid=?", (song.song_id,))
+        cur.execute(
+            f"INSERT INTO song_search (rowid, {', '.join(SEARCH_COLUMNS)}) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                song.song_id,
+                song.name,
+                search_text(song.tk_tuples),
+                song.info,
+                song.key or search_key(song.tk_tuples),
+            ),
         )
-        cur.execute(query, data)
 
     def temp_song_dict(self, song):
         """TEMP FUNCTION TO MAKE A SONG METADATA DICT"""
@@ -447,41 +1054,31 @@ class DatabaseManager:
         song_meta = self.temp_song_dict(d)
         self.dump_dict_to_row(cur, "song_meta", song_meta)
 
-    def dump_gig_setlists(self, gig_id):
-        """Dump ALL the open setlists."""
-        setlists = self.app.data.setlists
-        self.dump_setlists(setlists)
-        self.dump_gig_setlist_ids([s.setlist_id for s in setlists], gig_id)
-
     def dump_setlists(self, setlists):
         for setlist in setlists:
             self.dump_setlist(setlist)
 
-    def dump_gig_setlist_ids(self, setlist_ids, gig_id):
-        """Track which setlists are associated with the gig."""
-        logging.info("dump_gig_setlist_ids")
-        with open_db(self.db) as cur:
-            for i, s in enumerate(setlist_ids):
-                query = "INSERT INTO gig_setlists (gig_id, pos, setlist_id) VALUES (?, ?, ?)"
-                logging.info(
-                    f"inserted into gig_setlists gig_id:{gig_id}, pos:{i}, setlist_id: {s}"
-                )
-                cur.execute(query, (gig_id, i, s))
+    def dump_gig_setlist_ids(self, setlist_ids, gig_id, cur):
+        """Track which setlists are associated with the gig, replacing
+        any stored at the gig_id."""
+        logging.info(f"dump_gig_setlist_ids gig_id:{gig_id}, setlist_ids: {setlist_ids}")
+        query = "INSERT INTO gig_setlists (gig_id, pos, setlist_id) VALUES (?, ?, ?)"
+        cur.execute("DELETE FROM gig_setlists WHERE gig_id=?", (gig_id,))
+        cur.executemany(query, ((gig_id, i, s) for i, s in enumerate(setlist_ids)))
 
     def dump_setlist(self, setlist, dump_songs=False):
         """Dump a single setlist. Pass dump_songs=True if you want
         to dump setlists songs. This is False by default because
-        dump_gig_setlists dumps the entire setlist pool at once, and
-        re-dumping would be redundant."""
+        dump_gig dumps the entire pool at once, and re-dumping would
+        be redundant."""
 
-        self.dump_songs(setlist.songs) if dump_songs else None
-
-        with open_db(self.db) as cur:
+        with self.open_db(write=True) as cur:
+            self.dump_songs(setlist.songs) if dump_songs else None
             self.assign_setlist_id(setlist, cur)
             self.dump_song_ids_to_setlist_songs(
                 self.get_song_ids(setlist), setlist.setlist_id, cur
             )
-            self.dump_setlist_metadata(setlist, cur)
+            self.dump_setlist_metadata(setlist.setlist_id, setlist.title, cur)
 
     def get_song_ids(self, setlist):
         """Get all song ids from setlist."""
@@ -493,50 +1090,50 @@ class DatabaseManager:
         return song_ids
 
     def dump_songs(self, songs: list):
-        """Dump all songs from setlist."""
-        for song in songs:
-            self.dump_song(song)
+        """Dump all songs from setlist in one transaction."""
+        with self.open_db(write=True):
+            for song in songs:
+                self.dump_song(song)
 
     def dump_song_ids_to_setlist_songs(self, song_ids, setlist_id, cur):
         """Dump song_ids and pos info to setlist_songs. This allows setlists
-        to be restored with correct references in the correct order."""
+        to be restored with correct references in the correct order.
+        Replaces any ordering already stored at the setlist_id."""
 
-        for i, song_id in enumerate(song_ids):
-            query = (
-                "INSERT INTO setlist_songs (setlist_id, pos, song_id) VALUES (?, ?, ?)"
-            )
-            cur.execute(query, (setlist_id, i, song_id))
+        query = "INSERT INTO setlist_songs (setlist_id, pos, song_id) VALUES (?, ?, ?)"
+        cur.execute("DELETE FROM setlist_songs WHERE setlist_id=?", (setlist_id,))
+        cur.executemany(
+            query, ((setlist_id, i, song_id) for i, song_id in enumerate(song_ids))
+        )
 
-    def dump_setlist_metadata(self, setlist, cur):
+    def dump_setlist_metadata(self, setlist_id, title, cur):
         """Dump setlist metadata to table."""
 
         # TODO: additional metadata
-        query = "INSERT INTO setlist_meta (setlist_id, name) VALUES (?, ?)"
-        cur.execute(query, (setlist.setlist_id, setlist.title))
+        query = "INSERT OR REPLACE INTO setlist_meta (setlist_id, name) VALUES (?, ?)"
+        cur.execute(query, (setlist_id, title))
 
     def assign_setlist_id(self, setlist, cur):
-        """Assign an appropriate setlist_id for storing to database
+        """Assign an appropriate setlist_id for storing to database."""
+        setlist.setlist_id = self.setlist_id_strategies(setlist, cur)
+
+    def setlist_id_strategies(self, setlist, cur, options=None):
+        """Return an appropriate setlist_id for storing to database
         based on overwrite settings, whether setlist exists in db already,
         etc."""
 
-        if self.settings.overwrite_setlists.get():
+        options = options or SaveOptions.of(self.settings)
+        if options.overwrite_setlists:
             if setlist.setlist_id is not None:
-                return
-        setlist.setlist_id = self.choose_id(cur, "setlist_id", "setlist_meta")
-
-    def assign_gig_id(self, gig):
-        """Return an appropriate gig_id for storing to database."""
-
-        with open_db(self.db) as cur:
-            if gig.gig_id is None:
-                gig.gig_id = self.choose_id(cur, "gig_id", "gigs")
-        # TODO: overwrite setting (see assign_setlist_id)
+                return setlist.setlist_id
+        return self.choose_id(cur, "setlist_id", "setlist_meta")
 
-    def song_id_strategies(self, song, cur):
+    def song_id_strategies(self, song, cur, options=None):
         """Return an appropriate song_id for storing to database
         based on overwrite settings, whether song exists in db already, etc."""
 
-        if self.settings.overwrite_songs.get():
+        options = options or SaveOptions.of(self.settings)
+        if options.overwrite_songs:
             if song.song_id is not None:
                 return song.song_id
 
@@ -567,10 +1164,71 @@ class DatabaseManager:
             "all": "SELECT * FROM song_meta",
         }
 
-        with open_db(self.db) as cur:
+        with self.open_db() as cur:
             cur.execute(options.get(option))
             return cur.fetchall()
 
+    def search_songs(self, query, columns=None, option="all", gig_id=None,
+            limit=SEARCH_LIMIT) -> list:
+        """Full text search the library. Returns song_meta rows, best match
+        first, in the same format as get_all_song_meta_from_db.
+
+        columns limits which of SEARCH_COLUMNS are searched (all if None).
+        option filters to library or alternate versions, as in
+        get_all_song_meta_from_db. gig_id limits results to songs in that
+        gig's pool. Without the search index (sqlite has no fts5) it's a
+        LIKE search of title, comments and key, sorted by title."""
+
+        if not self.search_index:
+            return self.search_songs_like(query, columns, option, gig_id, limit)
+
+        match = fts_query(query, columns)
+        if not match:
+            return []
+
+        params = [match]
+        gig_filter = ""
+        if gig_id is not None:
+            gig_filter = "AND song_search.rowid IN (SELECT song_id FROM pool_data WHERE gig_id=?)"
+            params.append(gig_id)
+        params.append(limit)
+
+        with self.open_db() as cur:
+            cur.execute("SELECT count(*) FROM song_search WHERE song_search MATCH ?", (match,))
+            ranked = cur.fetchone()[0] <= SEARCH_RANK_MAX
+            order = (
+                f"ORDER BY bm25(song_search, {', '.join(map(str, SEARCH_WEIGHTS))})"
+                if ranked else ""
+            )
+            query = f"""SELECT song_meta.* FROM song_search
+                JOIN song_meta ON song_meta.song_id = song_search.rowid
+                WHERE song_search MATCH ? {SEARCH_OPTIONS.get(option)} {gig_filter}
+                {order} LIMIT ?"""
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    def search_songs_like(self, query, columns=None, option="all", gig_id=None,
+            limit=SEARCH_LIMIT) -> list:
+        """search_songs for when there's no search index, see like_query."""
+        where, params = like_query(query, columns)
+        if not where:
+            return []
+
+        gig_filter = ""
+        if gig_id is not None:
+            gig_filter = "AND song_meta.song_id IN (SELECT song_id FROM pool_data WHERE gig_id=?)"
+            params.append(gig_id)
+        params.append(limit)
+
+        with self.open_db() as cur:
+            cur.execute(
+                f"""SELECT song_meta.* FROM song_meta
+                WHERE {where} {SEARCH_OPTIONS.get(option)} {gig_filter}
+                ORDER BY song_meta.title COLLATE NOCASE LIMIT ?""",
+                params,
+            )
+            return cur.fetchall()
+
     def make_song_dict_from_db(self, song_id):
         """Construct and return a dictionary for the song from db"""
         song_data = self.get_song_metadata(song_id)
@@ -578,7 +1236,7 @@ class DatabaseManager:
         return song_data
 
     def load_song(self, song_id):
-        return self.make_song_dict_from_db(song_id)
+        return self.load_many_songs_to_d([song_id]).get(song_id)
 
     def get_song_metadata(self, song_id):
         """Pull everything from the metadata table for the given song_id
@@ -587,10 +1245,6 @@ class DatabaseManager:
 
     def get_song_script(self, song_id):
         """Return song script as list of tuples."""
-        with open_db(self.db) as cur:
-            # TODO: sort!!!
-            cur.execute(
-                "SELECT pos, flag, content FROM song_data WHERE song_id=?", (song_id,)
-            )
-            script = cur.fetchall()
+        with self.open_db() as cur:
+            script = self.get_many_song_scripts(cur, [song_id]).get(song_id)
         return script
@@ -26,6 +26,9 @@ class SongDeck(PrompToolsAPI):
         # refresh function assigned when a song is cued from pool / setlist 
         self.refresh = None
 
+        # render cued songs ahead of going live
+        self.add_callback("cued", self.tools.cue_buffer.prepare_soon)
+
     def add_callback(self, param, callback, *args, **kwargs):
         """Add an observer & callback to the param dict."""
         # TODO: this is... not really working. *args and **kwargs mainly
@@ -0,0 +1,239 @@
+# bulk import of a directory tree of charts into the library. parsing (rtf
+# stripping + auto tagging) runs across a process pool, finished songs are
+# streamed into the db in batched transactions on a background thread.
+import os
+import functools
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from tools.api import PrompToolsAPI
+from tools.db_interface import ConnectionManager
+from tools.snapshot import SaveOptions, SongSnapshot
+from tools.song import Song, SongFactory
+
+# songs written per db transaction
+BATCH_SIZE = 200
+# charts handed to a worker process at a time
+CHUNK_SIZE = 8
+# how often the tk thread checks on a running import
+POLL_MS = 100
+
+# one factory per worker process, built on first use
+_factory = None
+
+
+# helpers
+def find_charts(root: str, valid_ext: tuple) -> list:
+    """Return paths of all charts under root, sorted. root can also be a
+    single chart."""
+    if os.path.isfile(root):
+        return [root]
+    paths = []
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        paths.extend(
+            os.path.join(folder, f) for f in sorted(files)
+            if f.endswith(valid_ext) and not f.startswith('.')
+        )
+    return paths
+
+def parse_chart(path: str, split_books=False) -> tuple:
+    """Parse a chart file into SongSnapshots ready for the db. That's one
+    song, or one per song in an rtf book if split_books. Runs in a worker
+    process, so it has no app. Returns (path, snapshots, error)."""
+    global _factory
+    try:
+        _factory = SongFactory() if _factory is None else _factory
+        if split_books and path.endswith(".rtf"):
+            return path, [SongSnapshot.of(song) for song in _factory.ingest_rtf_book(path)], None
+
+        if path.endswith(".rtf"):
+            with _factory.rtf_importer.open_file(path) as f:
+                string = _factory.rtf_importer.strip(f.read(), path)
+        else:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                string = f.read()
+
+        song = Song(None)
+        song.meta.file = path
+        song = _factory.ingest_string_new(song, string)
+        song = _factory.name_song(song, string)
+        return path, [SongSnapshot.of(song)], None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+class BulkImporter(PrompToolsAPI):
+    """Imports every chart under a directory into the library without
+    blocking the tk mainloop. A coordinator thread farms parsing out to a
+    process pool and writes results through its own db connection in
+    batches. Progress comes back to the tk thread by polling with after()."""
+
+    def __init__(self, app):
+        PrompToolsAPI.__init__(self, app)
+
+        self.messages = queue.Queue()
+        self.thread = None
+        self.cancelled = threading.Event()
+        self.on_done = None
+
+    @property
+    def busy(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, root: str, on_done=None, workers=None, split_books=None) -> bool:
+        """Start importing root in the background. on_done(report) is called
+        on the tk thread when finished. split_books defaults to the importer
+        setting. Returns False if already running."""
+        if self.busy:
+            self.helper.popup("An import is already running.")
+            return False
+
+        options = SaveOptions.of(self.settings.library)
+        valid_ext = tuple(self.settings.importer.valid_ext)
+        if split_books is None:
+            split_books = self.settings.importer.split_rtf_books.get()
+        self.on_done = on_done
+        self.cancelled.clear()
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(root, valid_ext, options, workers, split_books),
+            name="BulkImporter",
+            daemon=True,
+        )
+        self.thread.start()
+        self.gui.after(POLL_MS, self.poll)
+        return True
+
+    def cancel(self):
+        """Stop after the batch in progress. Songs already written stay."""
+        self.cancelled.set()
+
+    def run(self, root, valid_ext, options, workers=None, split_books=False):
+        """Coordinator thread."""
+        try:
+            report = self.import_directory(
+                root, valid_ext, options, workers, self.report, split_books
+            )
+        except Exception as e:
+            logging.exception("BulkImporter: import failed")
+            self.messages.put(("failed", f"{type(e).__name__}: {e}"))
+            return
+        self.messages.put(("done", report))
+
+    def report(self, report):
+        self.messages.put(("progress", report))
+
+    def import_directory(
+        self, root, valid_ext, options, workers=None, progress=None, split_books=False
+    ) -> dict:
+        """Parse every chart under root across a process pool and write them
+        to the library in batches. Returns a report dict with counts (total
+        and done are files, imported is songs), the failed paths and
+        songs/sec. progress(report) is called after each batch. If
+        split_books, rtf files are split into a song per page / heading."""
+
+        start = time.perf_counter()
+        paths = find_charts(root, valid_ext)
+        report = {
+            "root": root,
+            "total": len(paths),
+            "done": 0,
+            "imported": 0,
+            "failed": [],
+            "cancelled": False,
+            "seconds": 0.0,
+            "songs_per_sec": 0.0,
+        }
+        logging.info(f"BulkImporter: importing {len(paths)} charts from {root}")
+        if not paths:
+            return report
+
+        db_interface = self.tools.db_interface
+        connection = ConnectionManager(db_interface.db)
+        connection.add_callback(db_interface.ids.reset)
+
+        # spawn, not fork. forking a process that's running tk is unsafe.
+        context = multiprocessing.get_context("spawn")
+        parse = functools.partial(parse_chart, split_books=split_books)
+        batch = []
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                for path, songs, error in executor.map(parse, paths, chunksize=CHUNK_SIZE):
+                    if self.cancelled.is_set():
+                        report["cancelled"] = True
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        break
+                    report["done"] += 1
+                    if error:
+                        report["failed"].append((path, error))
+                    batch.extend((path, song) for song in songs or ())
+                    if len(batch) >= BATCH_SIZE:
+                        self.write_batch(connection, batch, options, report)
+                        self.update_rate(report, start)
+                        progress(dict(report)) if progress else None
+                        batch = []
+            self.write_batch(connection, batch, options, report)
+        finally:
+            connection.close()
+
+        self.update_rate(report, start)
+        logging.info(
+            f"BulkImporter: imported {report['imported']} songs from {report['total']} charts, "
+            f"{len(report['failed'])} failed, {report['songs_per_sec']:.0f} songs/sec"
+        )
+        for path, error in report["failed"]:
+            logging.warning(f"BulkImporter: failed to import {path}: {error}")
+        return report
+
+    @staticmethod
+    def update_rate(report, start):
+        report["seconds"] = time.perf_counter() - start
+        report["songs_per_sec"] = report["imported"] / report["seconds"] if report["seconds"] else 0.0
+
+    def write_batch(self, connection, batch, options, report):
+        """Write a batch of parsed songs in one transaction. If it fails,
+        the whole batch is marked failed and the import carries on."""
+        if not batch:
+            return
+        db_interface = self.tools.db_interface
+        try:
+            with connection.transaction(write=True) as cur:
+                for path, song in batch:
+                    db_interface.write_song(song, cur, options)
+            report["imported"] += len(batch)
+        except Exception as e:
+            logging.exception("BulkImporter: batch write failed")
+            report["failed"].extend((path, f"{type(e).__name__}: {e}") for path, song in batch)
+
+    def poll(self):
+        """Handle messages from the coordinator on the tk thread."""
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind, report = message
+            if kind == "progress":
+                self.helper.set(
+                    f"Importing... {report['done']}/{report['total']} "
+                    f"({report['songs_per_sec']:.0f} songs/sec)"
+                )
+            elif kind == "done":
+                self.finish(report)
+                return
+            elif kind == "failed":
+                self.helper.popup(f"Import failed: {report}", 6000)
+                return
+        self.gui.after(POLL_MS, self.poll)
+
+    def finish(self, report):
+        msg = f"Imported {report['imported']} songs from {report['total']} charts"
+        msg += f", {len(report['failed'])} failed" if report["failed"] else ""
+        msg += " (cancelled)" if report["cancelled"] else ""
+        self.helper.popup(f"{msg}.", 6000)
+        self.on_done(report) if self.on_done else None
@@ -3,6 +3,7 @@ from tools.song import Song
 from tkinter import font
 
 from tools.api import PrompToolsAPI
+from tools.tk_text_interface import insert_segments
 
 
 # helpers
@@ -69,25 +70,25 @@ class LoadTool(PrompToolsAPI):
 
         return widget.cget("state"), widget.yview()
 
-    def update_song_mods(self, song: Song, key: str):
-        """Pass current transpose / formatting settings
-        to song so it is up to date when shown."""
+    def update_song_mods(self, song: Song, key: str) -> tuple:
+        """Return song's script with the current transpose / formatting
+        settings applied. The song itself is left alone."""
 
         # TODO: redundant, weed this out
-        self.transpose_song(song=song, key=key) if self.keychange_enabled else None
+        return self.transpose_song(song=song, key=key) if self.keychange_enabled else song.tk_tuples
 
     @property
     def keychange_enabled(self):
         return self.app.settings.transposer.enabled.get()
 
-    def transpose_song(self, song, key):
-        """Pass song & key into the transposer."""
+    def transpose_song(self, song, key) -> tuple:
+        """Return song's script transposed to key."""
 
         transposer = self.app.tools.transposer
-        transposer.transpose_tk(song=song, target=key)
+        return transposer.view(song=song, target=key)
 
     def reset_song(self, song):
-        """Reset song to original key."""
+        """Forget song's transposed views."""
         self.app.tools.transposer.reset(song=song)
 
     def add_size_tag(self, text):
@@ -143,8 +144,8 @@ class LoadTool(PrompToolsAPI):
         key = self.get_key()
 
         # TODO: preview transposition hinges on this call. backwards logic...
-        self.update_song_mods(song, key)
-        self.on_load(frame, song)
+        script = self.update_song_mods(song, key)
+        self.on_load(frame, song, script)
         self.add_size_tag(frame.text)
 
         # TODO: decorator wrapper function for frame state
@@ -162,15 +163,21 @@ class LoadTool(PrompToolsAPI):
         logging.info('TODO: write LoadTool show_plain method')
         pass
 
-    def show_colors(self, frame, song): 
+    def show_colors(self, frame, song, script=None):
+        """Show script in frame's text widget, emptied by push. The layout
+        comes from the cue buffer, prepared when the song was cued."""
         self.configure_text_tags(frame.text)
-        self.tools.transposer.show_colors_tk(frame, song)
+        layout = self.tools.cue_buffer.layout(song, script)
+        self.tools.transposer.render_tk(frame, layout)
 
     def cue_from_file(self, filename=None):
-        """Creates song obj from file and pushes to cue."""
+        """Creates song obj from file in the background and pushes to cue."""
 
         file = self.gui.browser.files.path
-        song = self.tools.factory.new_song(file=file)
+        self.tools.song_builder.build_file(file, on_done=self.cue)
+
+    def cue(self, song):
+        """Push song to cue."""
         self.app.deck.cued = song
 
     def cue_from_library(self, tree_entry):
@@ -194,13 +201,15 @@ class LoadTool(PrompToolsAPI):
         # TODO: think this is duplicated...
 
         tag = ""
+        segments = []
 
         for e in dump:
             if e[0] == "tagon":
                 tag = e[1]
             elif e[0] == "text":
-                widget.insert("end", e[1], tag)
+                segments.append((e[1], tag))
 
+        insert_segments(widget, segments)
         widget.tag_add("size", "1.0", "end")
 
         return widget
@@ -0,0 +1,154 @@
+# on disk cache of parsed chart files, so cueing a file seen before skips
+# reading, rtf stripping and tagging. entries are keyed by path and checked
+# against the file's mtime and size. when those change the content hash
+# decides, so a file that was only touched or copied isn't reparsed.
+import os
+import hashlib
+import logging
+
+from tools.api import PrompToolsAPI
+from tools.db_interface import ConnectionManager
+from tools.script_packer import pack_script, unpack_script
+
+# bump whenever parsing / tagging changes, so older entries get reparsed
+PARSE_VERSION = 1
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS parsed_files (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        hash BLOB NOT NULL,
+        version INTEGER NOT NULL,
+        name TEXT,
+        key TEXT,
+        info TEXT,
+        confidence INTEGER,
+        script BLOB NOT NULL
+    )
+"""
+
+
+# helpers
+def file_hash(path: str) -> bytes:
+    """Return a digest of the file's contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class ParseCache(PrompToolsAPI):
+    """Builds songs from chart files through the factory, remembering the
+    result in a small sqlite db (settings.paths.parse_cache) so the same
+    file is only parsed again once it changes. Pass factory to parse with
+    something other than the app's (see tools.song_builder). The db is
+    opened by whichever thread uses it first, and only that thread can."""
+
+    def __init__(self, app, factory=None):
+        PrompToolsAPI.__init__(self, app)
+
+        self.file = self.settings.paths.parse_cache.get()
+        self.connection = ConnectionManager(self.file)
+        self.ready = False
+        self._factory = factory
+
+        # for tuning / sanity checks
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def factory(self):
+        return self._factory or self.tools.factory
+
+    def setup(self):
+        """Create the table on first use."""
+        if not self.ready:
+            with self.connection.transaction(write=True) as cur:
+                cur.execute(SCHEMA)
+            self.ready = True
+
+    def new_song(self, file: str):
+        """Return a new song for file. Comes from the cache if the file is
+        unchanged since it was last parsed, otherwise it's parsed by the
+        factory and cached. Hashing and parsing happen outside any
+        transaction, so the cache db is only locked for the short writes
+        and other threads using it never wait on a parse."""
+
+        path = os.path.abspath(file)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # let the factory deal with missing / unreadable files
+            return self.factory.new_song(file=file)
+
+        self.setup()
+        with self.connection.transaction() as cur:
+            row = cur.execute(
+                "SELECT mtime_ns, size, hash, version, name, key, info, confidence, script"
+                " FROM parsed_files WHERE path = ?",
+                (path,),
+            ).fetchone()
+
+        digest = None
+        if row and row[3] == PARSE_VERSION:
+            mtime_ns, size, cached_hash = row[:3]
+            if (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size):
+                return self.hit(file, row)
+            # touched, copied or restored but maybe not edited
+            digest = file_hash(path)
+            if size == stat.st_size and digest == cached_hash:
+                with self.connection.transaction(write=True) as cur:
+                    cur.execute(
+                        "UPDATE parsed_files SET mtime_ns = ? WHERE path = ? AND hash = ?",
+                        (stat.st_mtime_ns, path, digest),
+                    )
+                return self.hit(file, row)
+
+        # hash before parsing, so an edit made meanwhile is seen next time
+        digest = digest or file_hash(path)
+        song = self.factory.new_song(file=file)
+        self.misses += 1
+        with self.connection.transaction(write=True) as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO parsed_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    digest,
+                    PARSE_VERSION,
+                    song.name,
+                    song.key.default,
+                    song.info,
+                    song.confidence,
+                    pack_script(song.tk_tuples or []),
+                ),
+            )
+        logging.info(f"ParseCache: parsed {file}")
+        return song
+
+    def hit(self, file, row):
+        """Build a song from a cached row."""
+        self.hits += 1
+        name, key, info, confidence, script = row[4:]
+        song = self.factory.new_song()
+        song.meta.file = file
+        song.meta.name = name
+        song.meta.info = info
+        song.meta.confidence = confidence
+        song.key.default = key
+        song.tk_tuples = unpack_script(script)
+        logging.info(f"ParseCache: cached {file}")
+        return song
+
+    def clear(self):
+        """Forget everything."""
+        self.setup()
+        with self.connection.transaction(write=True) as cur:
+            cur.execute("DELETE FROM parsed_files")
+        self.hits = self.misses = 0
+
+    def close(self):
+        self.connection.close()
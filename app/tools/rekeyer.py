@@ -0,0 +1,255 @@
+# re-keys a whole setlist in the background, eg. for a guest vocalist. each
+# song with a target key is transposed on a worker thread, written to the
+# library as an alternate version of the original (its own song_id, the
+# original's library_id), and swapped into the setlist in the original's
+# place. the alternates' scripts are already in their new keys, so loading
+# one live costs nothing extra.
+import queue
+import logging
+import threading
+from dataclasses import dataclass, replace
+
+from tools.api import PrompToolsAPI
+from tools.db_interface import ConnectionManager
+from tools.snapshot import SaveOptions, SongSnapshot
+from tools.song import SongFactory, timestamp
+from tools.transposer import Transposer, first_key
+
+# how often the tk thread checks on a running job
+POLL_MS = 50
+
+# songs transposed per batch. progress is reported between batches
+BATCH = 8
+
+
+@dataclass(frozen=True)
+class RekeyJob:
+    """What the worker needs, read on the tk thread. sources are
+    (setlist index, SongSnapshot carrying its script, target)."""
+    sources: tuple
+    options: SaveOptions
+    db: str
+
+
+class Rekeyer(PrompToolsAPI):
+    """Transposes a setlist into alternate versions on a background thread.
+    rekey() snapshots the songs on the tk thread, the worker transposes them
+    in batches through its own transposer and writes the alternates through
+    its own connection, and progress / completion come back to the tk thread
+    by polling with after(). One job runs at a time."""
+
+    def __init__(self, app):
+        PrompToolsAPI.__init__(self, app)
+
+        self.factory = SongFactory(app, cache_songs=False)
+        self.transposer = Transposer(app)
+        self.jobs = queue.Queue()
+        self.messages = queue.Queue()
+        self.thread = None
+
+        # (setlist, originals by setlist index, on_done) being re-keyed
+        self.running = None
+
+    @property
+    def busy(self) -> bool:
+        return self.running is not None
+
+    @staticmethod
+    def key_map(setlist, keys) -> list:
+        """(index, song, target) for each song in setlist to re-key. keys
+        maps songs to targets, or is one target for every song. A target is
+        semitones from the song's key (an int, or a string like '-2') or a
+        key to move to, like 'Bb'."""
+        if isinstance(keys, dict):
+            return [
+                (i, song, keys[song]) for i, song in enumerate(setlist.songs)
+                if keys.get(song) not in (None, "")
+            ]
+        return [(i, song, keys) for i, song in enumerate(setlist.songs)]
+
+    def rekey(self, setlist, keys, on_done=None, saved=False) -> bool:
+        """Re-key setlist in the background, see key_map for keys.
+        on_done(results) is called on the tk thread once the alternates are
+        in the setlist. Returns False if there was nothing to do."""
+
+        if self.busy:
+            self.helper.popup("Already re-keying a setlist.")
+            return False
+        targets = self.key_map(setlist, keys)
+        if not targets:
+            return False
+
+        # alternates link to the original's library entry, so the originals
+        # have to be in the library first
+        if not saved and any(song.song_id is None for i, song, target in targets):
+            self.helper.set("Saving originals before re-keying...")
+            self.tools.saver.save(on_done=lambda result: self.rekey(setlist, keys, on_done, saved=True))
+            return True
+
+        job = RekeyJob(
+            sources=tuple(
+                (i, replace(SongSnapshot.of(song), tk_tuples=song.tk_tuples), target)
+                for i, song, target in targets
+            ),
+            options=SaveOptions.of(self.settings.library),
+            db=self.tools.db_interface.db,
+        )
+        self.running = (setlist, {i: song for i, song, target in targets}, on_done)
+        self.start()
+        self.jobs.put(job)
+        self.gui.after(POLL_MS, self.poll)
+        return True
+
+    def start(self):
+        """Start the worker thread if it isn't running."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.work, name="Rekeyer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the worker thread. Waits up to timeout for a running job,
+        the thread is a daemon so it can't hold up quitting."""
+        if not self.thread:
+            return
+        self.running = None
+        self.jobs.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+
+    # worker thread
+    def work(self):
+        """Worker thread loop. Opens a connection per job, as the db
+        setting may have changed in between."""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            connection = ConnectionManager(job.db)
+            connection.add_callback(self.tools.db_interface.ids.reset)
+            try:
+                with connection.transaction(write=True) as cur:
+                    results = self.run_job(job, cur)
+                self.messages.put(("done", results))
+            except Exception as e:
+                logging.exception("Rekeyer: re-keying failed")
+                self.messages.put(("failed", e))
+            finally:
+                connection.close()
+
+    def run_job(self, job, cur) -> list:
+        """Transpose and write every source, returning (setlist index,
+        alternate or None if the key didn't change, error) for each."""
+        results = []
+        total = len(job.sources)
+        for start in range(0, total, BATCH):
+            batch = job.sources[start:start + BATCH]
+            songs = [self.source_song(source) for i, source, target in batch]
+            targets = [target for i, source, target in batch]
+
+            for (i, source, target), song, script in zip(batch, songs, self.transpose(songs, targets)):
+                if isinstance(script, Exception):
+                    results.append((i, None, f"{type(script).__name__}: {script}"))
+                elif script is song.tk_tuples:
+                    results.append((i, None, None))
+                else:
+                    results.append((i, self.write_alternate(source, song, target, script, cur, job.options), None))
+
+            self.messages.put(("progress", len(results), total))
+        return results
+
+    def transpose(self, songs, targets) -> list:
+        """Batch transpose, falling back to song by song to find the ones
+        that can't be transposed. Those get the exception instead."""
+        try:
+            return self.transposer.transpose_scripts(songs, targets)
+        except Exception:
+            scripts = []
+            for song, target in zip(songs, targets):
+                try:
+                    scripts.append(self.transposer.transpose_script(song, target))
+                except Exception as e:
+                    scripts.append(e)
+            return scripts
+
+    def source_song(self, source):
+        """A detached copy of a snapshotted song to transpose."""
+        song = self.factory.make_song()
+        song.meta.name = source.name
+        song.key.default = source.key
+        song.tk_tuples = source.tk_tuples
+        return song
+
+    def new_key(self, song, target, script):
+        """The key a transposed script is in: its first key, or the song's
+        default key moved by the same amount."""
+        key = first_key(script)
+        if key:
+            return "".join(song.key.split_key(key))
+        if song.key.default is None:
+            return None
+        shift = self.transposer.convert_transposition_to_int_tk(song=song, target=target)
+        return self.transposer.transpose_key_tk(word=f"({song.key.default})", transposition=shift)[1]
+
+    def write_alternate(self, source, song, target, script, cur, options):
+        """Make the alternate version of source and write it to the library."""
+        stamp = timestamp()
+        alternate = self.factory.new_song(dictionary={
+            "title": source.name,
+            "library_id": source.library_id if source.library_id is not None else source.song_id,
+            "created": stamp,
+            "modified": stamp,
+            "confidence": source.confidence,
+            "comments": source.info,
+            "key": self.new_key(song, target, script),
+            "tk_tuples": script,
+        })
+        snapshot = SongSnapshot.of(alternate)
+        alternate.song_id, alternate.library_id = self.tools.db_interface.write_song(snapshot, cur, options)
+        alternate.mark_saved(snapshot.version)
+        return alternate
+
+    # tk thread
+    def poll(self):
+        """Handle messages from the worker on the tk thread."""
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            {
+                "progress": self.on_progress,
+                "done": self.on_done,
+                "failed": self.on_failed,
+            }[message[0]](*message[1:])
+
+        self.gui.after(POLL_MS, self.poll) if self.busy else None
+
+    def on_progress(self, done, total):
+        self.helper.set(f"Re-keying... {done}/{total} songs")
+
+    def on_done(self, results):
+        """Swap the alternates into the setlist in their originals' places."""
+        if not self.running:
+            return
+        setlist, originals, on_done = self.running
+        self.running = None
+
+        swaps = {}
+        for i, alternate, error in results:
+            if alternate is not None:
+                self.app.cache.add_song(alternate)
+                swaps[originals[i]] = alternate
+        setlist.replace(swaps)
+
+        failed = [(originals[i], error) for i, alternate, error in results if error]
+        for song, error in failed:
+            logging.warning(f"Rekeyer: couldn't re-key {song.name}: {error}")
+        self.helper.popup(
+            f"Re-keyed {len(swaps)} songs." + (f" {len(failed)} couldn't be transposed." if failed else "")
+        )
+        on_done(results) if on_done else None
+
+    def on_failed(self, error):
+        self.running = None
+        self.helper.popup(f"Re-keying failed: {error}")
@@ -0,0 +1,251 @@
+# streaming rtf to text. reads an rtf file a chunk at a time and converts it
+# token by token, so a big multi-song rtf book is never held in memory whole,
+# and can be split into songs on page breaks or heading paragraphs as it goes.
+import codecs
+
+import regex as re
+from striprtf.striprtf import destinations, specialchars
+
+# characters read from the stream at a time
+CHUNK_SIZE = 1 << 16
+
+# document codepages by control word
+CODEPAGES = {
+    "ansi": "cp1252",
+    "mac": "mac_roman",
+    "pc": "cp437",
+    "pca": "cp850",
+}
+
+# font codepages by \fcharsetN. charsets not listed use the document codepage.
+CHARSETS = {
+    77: "mac_roman",
+    128: "cp932",
+    129: "cp949",
+    134: "gbk",
+    136: "big5",
+    161: "cp1253",
+    162: "cp1254",
+    163: "cp1258",
+    177: "cp1255",
+    178: "cp1256",
+    186: "cp1257",
+    204: "cp1251",
+    222: "cp874",
+    238: "cp1250",
+}
+
+# unicode line / paragraph separators, which some writers use for line breaks
+SEPARATORS = {0x2028: "\n", 0x2029: "\n"}
+
+# control words that start a new song when splitting a book
+PAGE_BREAKS = ("page", "sect")
+
+# one rtf token per match
+TOKEN = re.compile(r'''
+    \\([a-zA-Z]{1,32})(-?\d{1,10})?[ ]?     # 1 control word, 2 parameter
+    |\\'([0-9a-fA-F]{2})                    # 3 hex byte
+    |\\([^a-zA-Z'])                         # 4 control symbol
+    |([{}])                                 # 5 group
+    |[\r\n]+                                # raw line breaks mean nothing
+    |([^\\{}\r\n]+)                         # 6 text
+    ''', re.VERBOSE)
+
+# yielded by RtfReader.pieces where a new song starts
+BREAK = object()
+
+
+# helpers
+def codepage(name, default="cp1252") -> str:
+    """Return name if python knows the codec, else default."""
+    try:
+        codecs.lookup(name)
+        return name
+    except LookupError:
+        return default
+
+
+class RtfReader:
+    """Converts rtf from a text stream to plain text incrementally. Handles
+    control words and symbols, groups and ignorable destinations, \\uN escapes
+    (with their fallback characters skipped) and \\'hh bytes in the document
+    or font codepage. Output matches striprtf, whose destination and special
+    character tables it shares."""
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def tokens(self, stream):
+        """Yield (word, arg, hex, symbol, brace, text) for each token in
+        stream, reading it in chunks. A token that might run on into the
+        next chunk is held over until it's read."""
+
+        buf, pos, eof = "", 0, False
+        while True:
+            chunk = stream.read(self.chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            n = len(buf)
+
+            while pos < n:
+                match = TOKEN.match(buf, pos)
+                if not eof and (match is None or match.end() == n):
+                    break
+                if match is None:
+                    # stray backslash at the very end, keep it as text
+                    yield None, None, None, None, None, buf[pos]
+                    pos += 1
+                    continue
+                pos = match.end()
+                if match[0][0] not in "\r\n":
+                    yield match.groups()
+
+            if eof:
+                return
+
+    def pieces(self, stream, split=False):
+        """Yield the plain text of an rtf stream a piece at a time. If split,
+        page / section breaks and heading paragraphs start a new song, marked
+        by yielding BREAK, otherwise they come through as text."""
+
+        # group state, saved on { and restored on }
+        ignorable = False
+        ucskip = 1
+        destination = None
+        font_codepage = None
+        stack = []
+
+        document_codepage = "cp1252"
+        fonts = {}  # font number: codepage, from the font table
+        font = None  # font being defined in the font table
+        curskip = 0  # fallback characters left to skip after \uN
+        pending = bytearray()  # \'hh bytes waiting to be decoded together
+        high = None  # high surrogate waiting for its pair
+
+        # paragraph state, for splitting
+        heading = False
+        paragraph_start = True
+        song_has_text = False
+        song_has_body = False  # text outside headings
+
+        for word, arg, hexbyte, symbol, brace, text in self.tokens(stream):
+
+            if hexbyte:
+                if curskip:
+                    curskip -= 1
+                elif not ignorable:
+                    pending.append(int(hexbyte, 16))
+                continue
+
+            # decode bytes in one go, so multi byte codepages work
+            out = (
+                pending.decode(font_codepage or document_codepage, "replace")
+                if pending else ""
+            )
+            pending.clear()
+            page_break = paragraph_end = False
+
+            if text:
+                if curskip:
+                    text, curskip = text[curskip:], max(0, curskip - len(text))
+                out += text if not ignorable else ""
+
+            elif word:
+                curskip = 0
+                if word in destinations:
+                    ignorable = True
+                    destination = word
+                elif word == "ansicpg":
+                    document_codepage = codepage(f"cp{arg}", document_codepage)
+                elif word in CODEPAGES:
+                    document_codepage = CODEPAGES[word]
+                elif destination == "fonttbl":
+                    font = int(arg) if word == "f" and arg else font
+                    if word == "fcharset" and arg and font is not None:
+                        fonts[font] = CHARSETS.get(int(arg))
+                elif ignorable:
+                    pass
+                elif word == "f":
+                    font_codepage = fonts.get(int(arg)) if arg else None
+                elif word == "uc":
+                    ucskip = int(arg) if arg else 1
+                elif word == "u":
+                    curskip = ucskip
+                    c = int(arg) + 0x10000 if arg and int(arg) < 0 else int(arg or 0)
+                    if 0xD800 <= c < 0xDC00:
+                        high = c
+                    elif 0xDC00 <= c < 0xE000 and high:
+                        out += chr(0x10000 + (high - 0xD800 << 10) + c - 0xDC00)
+                        high = None
+                    elif arg:
+                        out += SEPARATORS.get(c) or chr(c)
+                elif split and word in PAGE_BREAKS:
+                    page_break = True
+                elif word in specialchars:
+                    out += specialchars[word]
+                    paragraph_end = word == "par"
+                elif word == "pard":
+                    heading = False
+                elif split and (word == "outlinelevel" or word == "pagebb"):
+                    heading = True
+
+            elif symbol:
+                curskip = 0
+                if symbol == "*":
+                    ignorable = True
+                elif not ignorable:
+                    if symbol in "{}\\":
+                        out += symbol
+                    elif symbol == "~":
+                        out += "\xa0"
+                    elif symbol == "_":
+                        out += "-"
+                    elif symbol in "\r\n":
+                        out += "\n"
+                        paragraph_end = True
+
+            elif brace == "{":
+                curskip = 0
+                stack.append((ignorable, ucskip, destination, font_codepage))
+
+            elif brace == "}":
+                curskip = 0
+                # a stray } is ignored rather than ending the document
+                if stack:
+                    ignorable, ucskip, destination, font_codepage = stack.pop()
+
+            if out:
+                # a heading paragraph starts a new song, unless the song so
+                # far is only headings (a title and subtitle, say)
+                if split and heading and paragraph_start and song_has_body:
+                    yield BREAK
+                    song_has_text = song_has_body = False
+                paragraph_start = paragraph_end
+                song_has_text = song_has_text or not out.isspace()
+                song_has_body = song_has_body or not (heading or out.isspace())
+                yield out
+
+            if page_break and song_has_text:
+                yield BREAK
+                song_has_text = song_has_body = False
+                paragraph_start = True
+
+    def text(self, stream) -> str:
+        """Return the whole plain text of an rtf stream."""
+        return "".join(self.pieces(stream))
+
+    def songs(self, stream):
+        """Yield the plain text of each song in an rtf book, splitting on
+        page breaks and heading paragraphs. Only one song is held at a time."""
+        parts = []
+        for piece in self.pieces(stream, split=True):
+            if piece is not BREAK:
+                parts.append(piece)
+                continue
+            song = "".join(parts).strip("\n")
+            parts.clear()
+            if song.strip():
+                yield song
+        song = "".join(parts).strip("\n")
+        if song.strip():
+            yield song
@@ -0,0 +1,189 @@
+import queue
+import logging
+import threading
+
+from tools.api import PrompToolsAPI
+from tools.db_interface import ConnectionManager
+from tools.snapshot import GigSnapshot, SaveOptions
+
+# how often the tk thread checks on a running save
+POLL_MS = 50
+
+
+class SaveWorker(PrompToolsAPI):
+    """Saves the gig on a background thread so the tk mainloop never waits
+    on the db. save() takes a GigSnapshot on the tk thread, the worker
+    writes it through its own connection, and progress / completion come
+    back to the tk thread by polling with after(). One save runs at a time,
+    a save requested meanwhile runs once the current one finishes."""
+
+    def __init__(self, app):
+        PrompToolsAPI.__init__(self, app)
+
+        self.jobs = queue.Queue()
+        self.messages = queue.Queue()
+        self.thread = None
+
+        # (snapshot, on_done, on_failed) being written, and the next save
+        # asked for as (workspace, on_done, on_failed)
+        self.running = None
+        self.next = None
+
+        # set once the app is quitting, no more saves are started
+        self.stopping = False
+
+        # minutes since the last autosave, and its pending after() id
+        self.minutes = 0
+        self.autosave_id = None
+
+    @property
+    def busy(self) -> bool:
+        return self.running is not None
+
+    def save(self, workspace=True, on_done=None, on_failed=None) -> bool:
+        """Save the gig in the background. on_done(result) is called on the
+        tk thread once it's written, or straight away if there was nothing
+        to save. on_failed(error) is called instead if the write fails,
+        the default just reports it. Returns False if nothing needed saving
+        or the worker is stopping."""
+
+        if self.stopping:
+            logging.warning("SaveWorker: stopping, save not started")
+            return False
+
+        if self.busy:
+            # snapshot again once the running save has applied its ids
+            queued_done, queued_failed = self.next[1:] if self.next else (None, None)
+            self.next = (workspace, chain(queued_done, on_done), chain(queued_failed, on_failed))
+            return True
+
+        gig = self.gig
+        options = SaveOptions.of(self.settings.library)
+        snapshot = GigSnapshot.of(gig, workspace, options)
+        if not snapshot.dirty:
+            logging.info("SaveWorker: nothing changed, skipping")
+            on_done(None) if on_done else None
+            return False
+
+        self.running = (snapshot, on_done, on_failed)
+        self.start()
+        self.jobs.put(snapshot)
+        self.gui.after(POLL_MS, self.poll)
+        return True
+
+    def start(self):
+        """Start the worker thread if it isn't running."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.work, name="SaveWorker", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop autosaving and drop saves not started yet, then wait up to
+        timeout for a running save to finish and stop the worker thread.
+        The thread is a daemon so a stuck write can't hold up quitting, its
+        transaction is rolled back when the process exits."""
+        self.stopping = True
+        self.next = None
+        if self.autosave_id is not None:
+            self.gui.after_cancel(self.autosave_id)
+            self.autosave_id = None
+        if not self.thread:
+            return
+        self.jobs.put(None)
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            logging.warning(f"SaveWorker: save still running after {timeout}s, not waiting for it")
+        self.thread = None
+        self.poll(reschedule=False)
+
+    def work(self):
+        """Worker thread loop. Owns its own db connection."""
+        db_interface = self.tools.db_interface
+        connection = ConnectionManager(db_interface.db)
+        connection.add_callback(db_interface.ids.reset)
+        progress = lambda done, total: self.messages.put(("progress", done, total))
+        try:
+            while True:
+                snapshot = self.jobs.get()
+                if snapshot is None:
+                    return
+                try:
+                    with connection.transaction(write=True) as cur:
+                        result = db_interface.dump_snapshot(snapshot, cur, progress)
+                    self.messages.put(("done", result))
+                except Exception as e:
+                    logging.exception("SaveWorker: save failed")
+                    self.messages.put(("failed", e))
+        finally:
+            connection.close()
+
+    def poll(self, reschedule=True):
+        """Handle messages from the worker on the tk thread."""
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            {
+                "progress": self.on_progress,
+                "done": self.on_done,
+                "failed": self.on_failed,
+            }[message[0]](*message[1:])
+
+        self.gui.after(POLL_MS, self.poll) if reschedule and self.busy else None
+
+    def on_progress(self, done, total):
+        self.helper.set(f"Saving... {done}/{total} songs")
+
+    def on_done(self, result):
+        snapshot, on_done, on_failed = self.running
+        self.running = None
+        self.gig.apply_save(snapshot, result)
+        logging.info(f"SaveWorker: saved {result['written']} songs")
+        self.helper.popup("Saved.")
+        if self.stopping:
+            return
+        # start the queued save first, on_done may quit the app
+        self.run_next()
+        on_done(result) if on_done else None
+
+    def on_failed(self, error):
+        snapshot, on_done, on_failed = self.running
+        self.running = None
+        # saves queued behind this one would fail the same way
+        if self.next:
+            on_failed = chain(on_failed, self.next[2])
+            self.next = None
+        if self.stopping:
+            return
+        on_failed(error) if on_failed else self.helper.popup(f"Save failed: {error}")
+
+    def run_next(self):
+        if self.next:
+            workspace, on_done, on_failed = self.next
+            self.next = None
+            self.save(workspace, on_done, on_failed)
+
+    # autosave
+    def start_autosave(self):
+        """Start the autosave loop. Checks every minute, saves the workspace
+        when it's changed and the interval set in workspace settings has
+        passed since the last autosave."""
+        self.autosave_id = self.gui.after(60000, self.autosave_tick)
+
+    def autosave_tick(self):
+        workspace = self.settings.workspace
+        self.minutes += 1
+        if workspace.autosave.get() and self.minutes >= workspace.autosave_minutes.get():
+            self.minutes = 0
+            self.save(workspace=True) if self.gig.dirty else None
+        self.autosave_id = self.gui.after(60000, self.autosave_tick)
+
+
+# helpers
+def chain(first, second):
+    """Combine two optional callbacks taking the same argument."""
+    if not first or not second:
+        return first or second
+    return lambda arg: (first(arg), second(arg))
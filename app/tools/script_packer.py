@@ -0,0 +1,159 @@
+# compact binary format for storing a song script (list of (pos, tag, word)
+# tuples) as a single db blob instead of one song_data row per token.
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+# layout is column-oriented so unpacking runs at C speed (array.frombytes,
+# accumulate, one utf-8 decode) rather than a python loop per byte:
+#   version byte, flags byte, then the body (zlib compressed if FLAG_ZLIB):
+#   varint tag count, then each tag as varint length + utf-8
+#   varint token count n
+#   n x uint16 tag codes (0 = None, i = tag table[i - 1])
+#   n x int32 line deltas, n x uint32 columns   (or raw pos strings)
+#   n x uint32 word lengths, then all words as one utf-8 string
+# the arrays are little-endian. runs of small ints compress very well.
+VERSION = 1
+FLAG_ZLIB = 1
+FLAG_RAW_POS = 2
+
+# don't bother compressing tiny scripts
+COMPRESS_MIN = 128
+
+
+# helpers
+def write_varint(out: bytearray, n: int) -> None:
+    """Append unsigned int n to out as a LEB128 varint."""
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def read_varint(buf: bytes, i: int) -> tuple:
+    """Read a varint from buf at i, return (n, next i)."""
+    n = shift = 0
+    while True:
+        b = buf[i]
+        i += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+def write_str(out: bytearray, s: str) -> None:
+    b = s.encode("utf-8")
+    write_varint(out, len(b))
+    out += b
+
+def read_str(buf: bytes, i: int) -> tuple:
+    n, i = read_varint(buf, i)
+    return buf[i:i + n].decode("utf-8"), i + n
+
+def write_array(out: bytearray, typecode: str, values) -> None:
+    a = array(typecode, values)
+    a.byteswap() if sys.byteorder == "big" else None
+    out += a.tobytes()
+
+def read_array(buf: bytes, i: int, typecode: str, n: int) -> tuple:
+    a = array(typecode)
+    end = i + n * a.itemsize
+    a.frombytes(buf[i:end])
+    a.byteswap() if sys.byteorder == "big" else None
+    return a, end
+
+def write_strings(out: bytearray, strings: list) -> None:
+    """Write strings as a column of lengths plus one joined string."""
+    write_array(out, "I", map(len, strings))
+    write_str(out, "".join(strings))
+
+def read_strings(buf: bytes, i: int, n: int) -> tuple:
+    lengths, i = read_array(buf, i, "I", n)
+    joined, i = read_str(buf, i)
+    ends = list(accumulate(lengths))
+    starts = [0] + ends[:-1]
+    return [joined[a:b] for a, b in zip(starts, ends)], i
+
+def split_pos(pos):
+    """Split a tkinter 'line.col' pos into ints, or return None if pos
+    wouldn't survive the round trip exactly."""
+    try:
+        line, col = pos.split(".")
+        line, col = int(line), int(col)
+    except (AttributeError, ValueError):
+        return None
+    if line < 0 or col < 0 or f"{line}.{col}" != pos:
+        return None
+    return line, col
+
+
+def pack_script(script: list, compress=True) -> bytes:
+    """Pack a list of (pos, tag, word) tuples into bytes."""
+
+    split = [split_pos(tup[0]) for tup in script]
+    raw_pos = None in split
+    flags = FLAG_RAW_POS if raw_pos else 0
+
+    # intern tags
+    tags = {}
+    for tup in script:
+        tag = tup[1]
+        if tag is not None and tag not in tags:
+            tags[tag] = len(tags) + 1
+
+    body = bytearray()
+    write_varint(body, len(tags))
+    for tag in tags:
+        write_str(body, tag)
+
+    write_varint(body, len(script))
+    write_array(body, "H", (tags.get(tup[1], 0) for tup in script))
+
+    if raw_pos:
+        write_strings(body, [tup[0] for tup in script])
+    else:
+        lines = [parts[0] for parts in split]
+        write_array(body, "i", (b - a for a, b in zip([0] + lines, lines)))
+        write_array(body, "I", (parts[1] for parts in split))
+
+    write_strings(body, [tup[2] for tup in script])
+
+    if compress and len(body) >= COMPRESS_MIN:
+        packed = zlib.compress(bytes(body))
+        if len(packed) < len(body):
+            flags |= FLAG_ZLIB
+            body = packed
+
+    return bytes((VERSION, flags)) + bytes(body)
+
+
+def unpack_script(blob: bytes) -> list:
+    """Unpack bytes from pack_script back into (pos, tag, word) tuples."""
+
+    version, flags = blob[0], blob[1]
+    if version != VERSION:
+        raise ValueError(f"unknown packed script version {version}")
+
+    buf = blob[2:]
+    buf = zlib.decompress(buf) if flags & FLAG_ZLIB else buf
+
+    n, i = read_varint(buf, 0)
+    table = [None]
+    for _ in range(n):
+        tag, i = read_str(buf, i)
+        table.append(tag)
+
+    n, i = read_varint(buf, i)
+    codes, i = read_array(buf, i, "H", n)
+    tags = [table[code] for code in codes]
+
+    if flags & FLAG_RAW_POS:
+        positions, i = read_strings(buf, i, n)
+    else:
+        deltas, i = read_array(buf, i, "i", n)
+        cols, i = read_array(buf, i, "I", n)
+        positions = [f"{line}.{col}" for line, col in zip(accumulate(deltas), cols)]
+
+    words, i = read_strings(buf, i, n)
+
+    return list(zip(positions, tags, words))
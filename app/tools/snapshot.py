@@ -0,0 +1,142 @@
+# immutable copies of workspace state for saving. a snapshot is taken on the
+# tk thread, then written to the db by db_interface.dump_snapshot, possibly on
+# another thread, while the live objects keep changing.
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class SaveOptions:
+    """Library write settings, read once so a save never touches tk vars
+    off the tk thread."""
+    overwrite_songs: bool = False
+    overwrite_setlists: bool = False
+    pack_scripts: bool = True
+
+    @classmethod
+    def of(cls, library_settings):
+        return cls(
+            overwrite_songs=library_settings.overwrite_songs.get(),
+            overwrite_setlists=library_settings.overwrite_setlists.get(),
+            pack_scripts=library_settings.pack_scripts.get(),
+        )
+
+
+@dataclass(frozen=True)
+class SongSnapshot:
+    """A song's metadata and script at one version. Clean songs don't carry
+    their script, since they won't be written."""
+    version: int
+    dirty: bool
+    song_id: int = None
+    library_id: int = None
+    name: str = ''
+    created: str = None
+    modified: str = None
+    info: str = ''
+    confidence: int = None
+    key: str = None
+    tk_tuples: tuple = ()
+
+    @classmethod
+    def of(cls, song, full=False):
+        """Snapshot song. full=True keeps the script even if the song is
+        clean, for writing it out regardless (eg. dump_song)."""
+        dirty = song.dirty or song.song_id is None
+        return cls(
+            version=song.version,
+            dirty=dirty,
+            song_id=song.song_id,
+            library_id=song.library_id,
+            name=song.name,
+            created=song.created,
+            modified=song.modified,
+            info=song.info,
+            confidence=song.confidence,
+            key=song.key.default,
+            tk_tuples=tuple(song.tk_tuples or ()) if dirty or full else (),
+        )
+
+
+@dataclass(frozen=True)
+class SongListSnapshot:
+    """Ordering of a pool or setlist. songs are indexes into
+    GigSnapshot.songs, saved_ids are the song ids it was last saved with."""
+    songs: tuple
+    version: int
+    changed: bool
+    saved_ids: tuple = None
+    setlist_id: int = None
+    title: str = None
+
+    @classmethod
+    def of(cls, songlist, index: dict):
+        return cls(
+            songs=tuple(index[id(song)] for song in songlist.songs),
+            version=songlist.version,
+            changed=songlist.saved_version != songlist.version,
+            saved_ids=tuple(songlist.saved_ids) if songlist.saved_ids is not None else None,
+            setlist_id=getattr(songlist, "setlist_id", None),
+            title=getattr(songlist, "title", None),
+        )
+
+    def dirty(self, song_ids: list) -> bool:
+        """True if this ordering needs writing, given the song ids the
+        snapshot songs will have once saved."""
+        return self.changed or self.saved_ids != tuple(song_ids[i] for i in self.songs)
+
+
+@dataclass(frozen=True)
+class GigSnapshot:
+    """Everything dump_snapshot needs to save a gig."""
+    workspace: bool
+    gig_id: int
+    saved_store_id: int
+    name: str
+    saved_name: str
+    songs: tuple
+    pool: SongListSnapshot
+    setlists: tuple
+    saved_setlist_ids: tuple
+    options: SaveOptions
+    # the live objects each snapshot entry came from, in the same order.
+    # only ever touched on the tk thread, by GigData.apply_save.
+    refs: dict = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def of(cls, gig, workspace=False, options=None):
+        songs = gig.songs
+        index = {id(song): i for i, song in enumerate(songs)}
+        return cls(
+            workspace=workspace,
+            gig_id=gig.gig_id,
+            saved_store_id=gig.saved_store_id,
+            name=gig.name,
+            saved_name=gig.saved_name,
+            songs=tuple(SongSnapshot.of(song) for song in songs),
+            pool=SongListSnapshot.of(gig.pool, index),
+            setlists=tuple(SongListSnapshot.of(s, index) for s in gig.setlists),
+            saved_setlist_ids=(
+                tuple(gig.saved_setlist_ids) if gig.saved_setlist_ids is not None else None
+            ),
+            options=options or SaveOptions(),
+            refs={"songs": songs, "setlists": list(gig.setlists)},
+        )
+
+    @property
+    def store_id(self):
+        """Where the gig is being saved to, if it already has a gig_id."""
+        return 0 if self.workspace else self.gig_id
+
+    @property
+    def dirty(self) -> bool:
+        """True if saving would write anything."""
+        song_ids = [song.song_id for song in self.songs]
+        return (
+            self.saved_store_id is None
+            or self.store_id != self.saved_store_id
+            or self.name != self.saved_name
+            or any(song.dirty for song in self.songs)
+            or self.pool.dirty(song_ids)
+            or any(s.dirty(song_ids) or s.setlist_id is None for s in self.setlists)
+            or self.saved_setlist_ids != tuple(s.setlist_id for s in self.setlists)
+        )
@@ -2,8 +2,8 @@ import regex as re
 import os
 from dataclasses import dataclass
 import time
+import io
 import logging
-import striprtf.striprtf as striprtf
 
 # TODO: better import hierarchy...
 # from .res import id_slices, res.id_transposible
@@ -11,6 +11,7 @@ import common.res as res
 import common.ids as ids
 import tools.words as words
 from tools.words import WordFactory
+from tools.rtf_reader import RtfReader
 
 from common.settings import Settings
 
@@ -31,8 +32,13 @@ def timestamp():
 class SongFactory:
     """Class that constructs song objects. """
 
-    def __init__(self, app=None):
+    def __init__(self, app=None, cache_songs=True):
         self.app = app
+
+        # songs built off the tk thread (see tools.song_builder) keep out of
+        # the app cache, they're added to it once handed back
+        self.cache_songs = cache_songs
+
         self.tagger = WordFactory()
         self.rtf_importer = RtfImporter()
 
@@ -87,10 +93,14 @@ class SongFactory:
         Optionally apply pre-built metadata."""
 
         # apply metadata if it exists
-        song = Song(self.app, meta) if meta else Song(self.app)
+        song = self.make_song(meta)
 
         return self.import_text(song, **kwargs) if kwargs else song
 
+    def make_song(self, meta=None):
+        """Return an empty song, in the app cache if cache_songs."""
+        return Song(self.app if self.cache_songs else None, meta)
+
     def update_song(self, old, meta=None, **kwargs):
         """Update an existing song object."""
         
@@ -171,6 +181,9 @@ class SongFactory:
         song.key.default = d.get('key')
         song.tk_tuples = d.get('tk_tuples')
 
+        # a song with an id came from the db, so it starts out clean
+        song.mark_saved() if song.song_id is not None else None
+
         return song
 
     def name_song(self, song, string, name=None):
@@ -213,6 +226,19 @@ class SongFactory:
         # return song with tagged tuples
         return self.tagger.auto_tag(song=song, slices=filtered)
 
+    def ingest_rtf_book(self, file):
+        """Yield a new song for each song in an rtf book (split on page
+        breaks and heading paragraphs). The book is streamed, so only one
+        song's text is in memory at a time."""
+
+        for string in self.rtf_importer.read_songs(file):
+            song = self.make_song()
+            song = self.ingest_string_new(song, string)
+            # name from the first line, not the book's file name
+            song = self.name_song(song, string)
+            song.meta.file = file
+            yield song
+
     def strip_meta_from_string(self, song, string):
         """Strip metadata from string and apply to song."""
 
@@ -234,11 +260,11 @@ class SongFactory:
             Append a flag if it is a style."""
             nonlocal tag
             tag = word if word in types else tag
-            song.tk_tuples.append((pos, flag, word)) if word in styles else None
+            script.append((pos, flag, word)) if word in styles else None
 
         def text_flag():
             """If text, append with current tag"""
-            song.tk_tuples.append((pos, tag, word))
+            script.append((pos, tag, word))
 
         # TODO: need to handle tagoffs and unknowns for styling
         def tagoff_flag():
@@ -251,7 +277,7 @@ class SongFactory:
         styles = self.app.settings.tags.styles
         types = self.app.settings.tags.types
 
-        song.tk_tuples = []
+        script = []
         tag = None
 
         # TODO: tagoff, unknown warning
@@ -267,6 +293,7 @@ class SongFactory:
             for k, v in strategies.items():
                 v() if k(flag) else None
 
+        song.tk_tuples = script
         return song
 
     def ingest_formatted_tuples_new(self, song, formatted_tuples):
@@ -333,7 +360,11 @@ class SongFactory:
         contents = ""
 
         try:
-            with open(file, "r", encoding="utf-8") as f:
+            if file.endswith(".rtf"):
+                f = self.rtf_importer.open_file(file)
+            else:
+                f = open(file, "r", encoding="utf-8")
+            with f:
                 contents = f.read()
         except IsADirectoryError:
             logging.warning(f'tried to load a directory, whoops.')
@@ -342,52 +373,26 @@ class SongFactory:
 
 
 class RtfImporter:
-    """Import and convert RTF files to plain string, handling errors."""
+    """Import and convert RTF files to plain string."""
 
-    def strip(self, raw: str, file: str):
-        """Strip rtf formatting from raw rtf string."""
-        try:
-            stripped = striprtf.rtf_to_text(raw)
-        except UnicodeEncodeError:
-            # Flag this in case you have to deal with it later on.
-            print(
-                f"Unicode encode error in file '{file}'."
-                + "\nStripping header. Expect issues."
-            )
-            # drop header and sub bad unicode
-            stripped = self.drop_rtf_header(raw)
-            stripped = self.sub_unicode_errors(stripped)
-            # Try again. Haven't run into additional errors after this, but...
-            try:
-                stripped = striprtf.rtf_to_text(stripped)
-            except UnicodeDecodeError:
-                print('SECOND unicode error, yikes. passing the raw file back, which will probably look bad.')
-                stripped = raw
-
-        return stripped
+    def __init__(self):
+        self.reader = RtfReader()
 
-    @staticmethod
-    def drop_rtf_header(contents):
-        """Drops header of erroneous rtf file. Used in response to exception
-        UnicodeEncodeError when running rtf_to_text."""
-        contents = contents.split("\\cf0 ", maxsplit=1)[-1]
-        return contents
+    def strip(self, raw: str, file: str = None):
+        """Strip rtf formatting from raw rtf string."""
+        return self.reader.text(io.StringIO(raw))
 
     @staticmethod
-    def sub_unicode_errors(contents):
-        """Fix some specific unicode errors that occur after dropping header.
-        Not comprehensive, but clean up almost all the problematic files
-        in the song library. Will remove this when I get around to batch
-        processing the song library into plain text files."""
-
-        # TODO: hacky
-        contents = contents.replace("\\u8232", "\\\n")
-        contents = contents.replace("\\uc0", "")
-        # Solve most issues in 'I Don't Want To Go Home'
-        contents = contents.replace("\\'91", "")
-        contents = contents.replace("\\'92", "'")
+    def open_file(file: str):
+        """Open an rtf file as text. rtf is 7 bit, anything else comes
+        escaped, so stray 8 bit bytes are just read as latin-1."""
+        return open(file, "r", encoding="latin-1", errors="replace")
 
-        return contents
+    def read_songs(self, file: str):
+        """Yield the plain text of each song in an rtf book, streaming the
+        file rather than reading it all in."""
+        with self.open_file(file) as f:
+            yield from self.reader.songs(f)
 
 
 class Song:
@@ -396,18 +401,58 @@ class Song:
     def __init__(self, app, meta=None):
         """Init variables that will be filled in by song factory."""
 
+        # change tracking. version is bumped whenever the script or
+        # metadata is replaced, saved_version is the version last written
+        # to the db (None if never saved).
+        self.version = 0
+        self.saved_version = None
+
         # apply metadata if it exists, or init
         self.meta = meta(self) if meta else SongMetadata(self)
 
-        # tuple format (pos, tag, word) where tag/word can sometimes be flag/action
+        # transposed views of the script by (target, default key), built by
+        # Transposer.view. replaced along with the script.
+        self.views = {}
+
+        # the script compiled for tools.transpose_table, built on first
+        # transposition. replaced along with the script.
+        self.compiled = None
+
+        # tuple format (pos, tag, word) where tag/word can sometimes be flag/action.
+        # stored as a tuple, replace it rather than editing it in place.
         # TODO: dislike this attribute name >:(
         self.tk_tuples = []
 
         # track song key
         self.key = Key(self)
 
-        # add reference to cache 
-        app.cache.add_song(self)
+        # add reference to cache. songs built outside the app (eg. in bulk
+        # import worker processes) have no app and aren't cached.
+        app.cache.add_song(self) if app else None
+
+    @property
+    def tk_tuples(self):
+        return self._tk_tuples
+
+    @tk_tuples.setter
+    def tk_tuples(self, new):
+        self._tk_tuples = tuple(new) if new is not None else None
+        self.views = {}
+        self.compiled = None
+        self.touch()
+
+    def touch(self):
+        """Mark the song as changed since it was last saved."""
+        self.version += 1
+
+    def mark_saved(self, version=None):
+        """Mark the song as matching what's stored in the db. Pass the
+        version that was saved if the song may have changed since."""
+        self.saved_version = self.version if version is None else version
+
+    @property
+    def dirty(self):
+        return self.saved_version != self.version
 
     @property
     def name(self):
@@ -417,6 +462,7 @@ class Song:
     @name.setter
     def name(self, new):
         self.meta.name = new
+        self.touch()
 
     @property
     def created(self):
@@ -437,6 +483,15 @@ class Song:
     @info.setter 
     def info(self, new):
         self.meta.info = new
+        self.touch()
+
+    @property
+    def song_id(self):
+        return self.meta.song_id
+
+    @song_id.setter 
+    def song_id(self, new):
+        self.meta.song_id = new
 
     @property
     def library_id(self):
@@ -0,0 +1,169 @@
+# builds songs for cueing off the tk thread. picking a chart in the files tab
+# or a song in the library asks for a song here, a worker thread reads, rtf
+# strips and tags it (or loads it from the library), and the song comes back
+# to the tk thread by polling with after(). only the newest request counts:
+# older ones still waiting are dropped, one already running is ignored.
+import queue
+import logging
+import threading
+
+from tools.api import PrompToolsAPI
+from tools.db_interface import ConnectionManager
+from tools.parse_cache import ParseCache
+from tools.song import SongFactory
+
+# how often the tk thread checks for a finished song
+POLL_MS = 15
+
+# pending request that stops the worker
+STOP = object()
+
+
+class SongBuilder(PrompToolsAPI):
+    """Builds songs on a background thread so a slow chart never freezes
+    the operator window. build_file() and build_library_song() return
+    straight away. on_done(song) is called on the tk thread once the song is
+    built, unless a newer request, or a song cued from somewhere else, has
+    made it stale. The worker has its own factory and db connections. Songs
+    it builds join the app cache when they're delivered."""
+
+    def __init__(self, app):
+        PrompToolsAPI.__init__(self, app)
+
+        self.factory = SongFactory(app, cache_songs=False)
+        self.parse_cache = ParseCache(app, factory=self.factory)
+        self.library = None  # worker's library connection, opened on first use
+        self.messages = queue.Queue()
+        self.thread = None
+
+        # newest request not yet picked up by the worker
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.pending = None
+
+        # newest request: (ticket, on_done, song cued when it was made)
+        self.ticket = 0
+        self.waiting = None
+        self.polling = False
+
+        self.builders = {
+            "file": self.build_from_file,
+            "library": self.build_from_library,
+        }
+
+    @property
+    def busy(self) -> bool:
+        return self.waiting is not None
+
+    def build_file(self, file, on_done):
+        """Build a song from a chart file in the background."""
+        self.request("file", file, on_done)
+
+    def build_library_song(self, song_id, on_done):
+        """Build a song from the library in the background."""
+        self.request("library", int(song_id), on_done)
+
+    def request(self, kind, source, on_done):
+        """Replace whatever was asked for before with a new request."""
+        self.ticket += 1
+        self.waiting = (self.ticket, on_done, self.deck.cued)
+        self.start()
+        with self.lock:
+            self.pending = (self.ticket, kind, source, self.tools.db_interface.db)
+            self.wake.set()
+        if not self.polling:
+            self.polling = True
+            self.gui.after(POLL_MS, self.poll)
+
+    def cancel(self):
+        """Forget the newest request. A song it's building is thrown away."""
+        self.waiting = None
+        with self.lock:
+            self.pending = None if self.pending is not STOP else STOP
+
+    def start(self):
+        """Start the worker thread if it isn't running."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.work, name="SongBuilder", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the worker thread. Waits up to timeout for a song it's
+        building, the thread is a daemon so it can't hold up quitting."""
+        if not self.thread:
+            return
+        self.waiting = None
+        with self.lock:
+            self.pending = STOP
+            self.wake.set()
+        self.thread.join(timeout)
+        self.thread = None
+
+    # worker thread
+    def work(self):
+        """Worker thread loop. Builds the newest request, then sleeps until
+        there's another."""
+        try:
+            while True:
+                self.wake.wait()
+                with self.lock:
+                    job, self.pending = self.pending, None
+                    self.wake.clear()
+                if job is STOP:
+                    return
+                if job is None:
+                    continue
+                ticket, kind, source, db = job
+                try:
+                    self.messages.put((ticket, self.builders[kind](source, db), None))
+                except Exception as e:
+                    logging.exception(f"SongBuilder: couldn't build {source}")
+                    self.messages.put((ticket, None, f"{type(e).__name__}: {e}"))
+        finally:
+            self.parse_cache.close()
+            self.library.close() if self.library else None
+
+    def build_from_file(self, file, db):
+        return self.parse_cache.new_song(file)
+
+    def build_from_library(self, song_id, db):
+        """Load a song from the library db through the worker's connection,
+        reconnecting if the db setting changed."""
+        if not self.library or self.library.file_name != db:
+            self.library.close() if self.library else None
+            self.library = ConnectionManager(db)
+        db_interface = self.tools.db_interface
+        with self.library.transaction() as cur:
+            song_data = db_interface.get_many_song_metadata(cur, [song_id]).get(song_id, {})
+            song_data["tk_tuples"] = db_interface.get_many_song_scripts(cur, [song_id]).get(song_id)
+        return self.factory.new_song(dictionary=song_data)
+
+    # tk thread
+    def poll(self):
+        """Deliver the newest request's song on the tk thread. Anything else
+        that comes back is stale."""
+        while True:
+            try:
+                ticket, song, error = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if self.waiting and ticket == self.waiting[0]:
+                self.deliver(song, error)
+            else:
+                logging.info(f"SongBuilder: dropped stale request {ticket}")
+
+        self.polling = self.busy
+        self.gui.after(POLL_MS, self.poll) if self.polling else None
+
+    def deliver(self, song, error):
+        ticket, on_done, cued = self.waiting
+        self.waiting = None
+        if self.deck.cued is not cued:
+            logging.info(f"SongBuilder: something else was cued, dropped request {ticket}")
+            return
+        if error:
+            self.helper.popup(f"Couldn't load song: {error}")
+            return
+        self.app.cache.add_song(song)
+        on_done(song)
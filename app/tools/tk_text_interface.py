@@ -4,6 +4,39 @@ import logging
 
 from tools.api import PrompToolsAPI
 
+# (text, tag) segments sent per Text.insert call
+INSERT_CHUNK = 500
+
+
+# helpers
+def end_column(column, text) -> int:
+    """Column after text is inserted at column, the way Text.index
+    would report it."""
+    newline = text.rfind("\n")
+    return column + len(text) if newline < 0 else len(text) - newline - 1
+
+def coalesce(segments) -> list:
+    """Merge runs of (text, tag) segments with the same tag, dropping
+    empty text."""
+    merged = []
+    for text, tag in segments:
+        if not text:
+            continue
+        if merged and merged[-1][1] == tag:
+            merged[-1] = (merged[-1][0] + text, tag)
+        else:
+            merged.append((text, tag))
+    return merged
+
+def insert_segments(widget, segments, chunk=INSERT_CHUNK):
+    """Insert (text, tag) segments at the end of a text widget. Text.insert
+    takes any number of text / tag pairs, so this is one Tcl call per chunk
+    rather than one per segment."""
+    segments = coalesce(segments)
+    for start in range(0, len(segments), chunk):
+        widget.insert("end", *(part for segment in segments[start:start + chunk] for part in segment))
+
+
 class TkTextInterface(PrompToolsAPI):
     """Translate tk_text tag format into other formats
     for loading between modules."""
@@ -1,9 +1,15 @@
 from tools.song import Song, SongFactory
 from tools.transposer import Transposer
 from tools.loader import LoadTool
+from tools.cue_buffer import CueBuffer
 from tools.scroll import ScrollTool
 from tools.screens import Screens
 from tools.db_interface import DatabaseManager
+from tools.saver import SaveWorker
+from tools.rekeyer import Rekeyer
+from tools.importer import BulkImporter
+from tools.parse_cache import ParseCache
+from tools.song_builder import SongBuilder
 from tools.guitools import GuiTools
 from tools.helper import Helper 
 from tools.tk_text_interface import TkTextInterface
@@ -21,9 +27,18 @@ class AppTools():
         # responsible for generating song objects
         self.factory = SongFactory(app)
 
+        # remembers parsed chart files between cues and sessions
+        self.parse_cache = ParseCache(app)
+
+        # builds songs to cue in the background, so the gui never waits on a parse
+        self.song_builder = SongBuilder(app)
+
         # handle song transposition
         self.transposer = Transposer(app)
 
+        # transposes whole setlists into alternate versions in the background
+        self.rekeyer = Rekeyer(app)
+
         # handle multiple screens
         self.screens = Screens(app)
 
@@ -34,12 +49,21 @@ class AppTools():
         # TODO: this module has poor cohesion
         self.loader = LoadTool(app)
 
+        # lays out the cued song ahead of time, so going live is just an insert
+        self.cue_buffer = CueBuffer(app)
+
         # migrate the tk_text methods from loader to here
         self.tk_text_interface = TkTextInterface(app)
 
         # interface with sqlite3 database
         self.db_interface = DatabaseManager(app)
 
+        # saves the gig to the db in the background
+        self.saver = SaveWorker(app)
+
+        # imports whole folders of charts into the library
+        self.importer = BulkImporter(app)
+
         # helpbox for tooltips & user-facing exceptions
         self.helper = Helper(app)
 
@@ -0,0 +1,202 @@
+# table driven transposition. a song's transposable words (keys, chords and
+# slash chords) are compiled once into compact integer arrays: root and bass
+# note ids, ids of the text around them, and the key that picks their
+# accidentals. transposing is then (id + k) % 12 and a spelling table lookup
+# over a whole song, or a whole setlist, in one pass. numpy does the pass when
+# it's installed. output matches Transposer.transpose_tokens.
+from array import array
+from dataclasses import dataclass
+
+import common.ids as ids
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# below this many words a batch is quicker in plain python than numpy
+NUMPY_MIN_WORDS = 2000
+
+# spelling of each note id, sharps then flats (NOTE_ID_ACCIDENTALS [0] / [-1]).
+# column 12 spells 'no bass note'.
+SPELLINGS = (
+    tuple(ids.NOTE_ID_ACCIDENTALS[i][0] for i in range(12)) + ("",),
+    tuple(ids.NOTE_ID_ACCIDENTALS[i][-1] for i in range(12)) + ("",),
+)
+
+# 1 where a key root takes flats. rows: major key, minor key, and two constant
+# rows for words before any key change, which keep the default key's spelling.
+FLATS = (
+    tuple(int(i in ids.FLAT_MAJ_IDS) for i in range(12)),
+    tuple(int(i in ids.FLAT_MIN_IDS) for i in range(12)),
+    (0,) * 12,
+    (1,) * 12,
+)
+SHARP_DEFAULT, FLAT_DEFAULT = 2, 3
+
+NO_BASS = -1
+
+
+# helpers
+def split_note(chord) -> tuple:
+    """Split a chord into (note, qualities), the way transposer.slice_chord does."""
+    n = 2 if len(chord) >= 2 and chord[1] in "b#" else 1
+    return chord[:n], chord[n:]
+
+
+@dataclass(frozen=True)
+class CompiledScript:
+    """A song's transposable words as parallel arrays, one entry per word.
+    The word at script[index[i]] is
+    head + note(root) + mid [+ note(bass) + tail], spelled with the
+    accidentals of key row gov_row at gov_root, both shifted like the notes."""
+    script: tuple
+    default: str  # the song's default key when compiled
+    strings: list  # the table the text ids index into
+    index: array
+    root: array
+    bass: array
+    head: array
+    mid: array
+    tail: array
+    gov_root: array
+    gov_row: array
+
+    def __len__(self):
+        return len(self.index)
+
+
+class TransposeTable:
+    """Compiles songs to CompiledScripts and transposes them in batches.
+    Text around the notes is interned in one table shared by every song."""
+
+    def __init__(self, use_numpy=None):
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        self.strings = []
+        self.string_ids = {}
+        self.intern("")
+
+    def intern(self, string) -> int:
+        i = self.string_ids.get(string)
+        if i is None:
+            i = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return i
+
+    def compile(self, song):
+        """Return song's script compiled, or None if a word in it can't be
+        encoded (Transposer.transpose_tokens raises on those). Cached on the
+        song until its script or default key changes."""
+        compiled = song.compiled
+        if compiled is not None and compiled.default == song.key.default and compiled.strings is self.strings:
+            return compiled
+        try:
+            compiled = self.compile_script(song.tk_tuples, song.key.default, song.key.key_to_acc)
+        except (IndexError, TypeError, ValueError, KeyError):
+            compiled = None
+        song.compiled = compiled
+        return compiled
+
+    def compile_script(self, script, default, key_to_acc) -> CompiledScript:
+        """Encode every key, chord and slash chord in script. Raises if a word
+        isn't one the transposer can handle."""
+        columns = [array("i") for _ in range(6)] + [array("b") for _ in range(3)]
+        index, head, mid, tail, gov_root_ids, _, root, bass, gov_rows = columns
+
+        # words before the first key change are spelled like the default key
+        gov = (0, FLAT_DEFAULT if key_to_acc(default) == -1 else SHARP_DEFAULT)
+        note_id = ids.NOTE_IDS.__getitem__
+
+        for i, (pos, tag, word) in enumerate(script):
+            if tag == "key":
+                lbr, chd, rbr = word[0], word[1:-1], word[-1]
+                note, minor = (chd[:-1], chd[-1]) if chd[-1] in "-m" else (chd, "")
+                gov = (note_id(note), 1 if minor else 0)
+                entry = (lbr, gov[0], minor + rbr, NO_BASS, "")
+            elif tag == "chord":
+                note, qualities = split_note(word)
+                entry = ("", note_id(note), qualities, NO_BASS, "")
+            elif tag == "slashchord":
+                top, under = word.split("/")
+                note, qualities = split_note(top)
+                bass_note, bass_qualities = split_note(under)
+                entry = ("", note_id(note), qualities + "/", note_id(bass_note), bass_qualities)
+            else:
+                continue
+
+            h, r, m, b, t = entry
+            index.append(i)
+            head.append(self.intern(h))
+            root.append(r)
+            mid.append(self.intern(m))
+            bass.append(b)
+            tail.append(self.intern(t))
+            gov_root_ids.append(gov[0])
+            gov_rows.append(gov[1])
+
+        return CompiledScript(
+            script, default, self.strings, index, root, bass, head, mid, tail, gov_root_ids, gov_rows
+        )
+
+    def transpose(self, batch) -> list:
+        """Transpose a batch of (CompiledScript, semitones) pairs, returning
+        the transposed script of each."""
+        batch = [(c, k % 12) for c, k in batch]
+        if not batch:
+            return []
+        total = sum(len(c) for c, k in batch)
+        numpy = self.use_numpy and np is not None and total >= NUMPY_MIN_WORDS
+        words = self.words_numpy(batch) if numpy else self.words_python(batch)
+
+        scripts = []
+        start = 0
+        for compiled, k in batch:
+            end = start + len(compiled)
+            scripts.append(self.rebuild(compiled, words[start:end]))
+            start = end
+        return scripts
+
+    def words_python(self, batch) -> list:
+        """Transposed words of the batch, one at a time."""
+        strings = self.strings
+        words = []
+        for c, k in batch:
+            for r, b, h, m, t, gr, gw in zip(c.root, c.bass, c.head, c.mid, c.tail, c.gov_root, c.gov_row):
+                spell = SPELLINGS[FLATS[gw][(gr + k) % 12]]
+                words.append(
+                    strings[h] + spell[(r + k) % 12] + strings[m]
+                    + (spell[(b + k) % 12] + strings[t] if b >= 0 else "")
+                )
+        return words
+
+    def words_numpy(self, batch) -> list:
+        """Transposed words of the batch, in one vectorised pass."""
+        def column(name):
+            arrays = [getattr(c, name) for c, k in batch]
+            return np.concatenate([np.frombuffer(a, dtype=a.typecode) for a in arrays]).astype(np.intp)
+
+        k = np.repeat([k for c, k in batch], [len(c) for c, k in batch])
+        root, bass, gov_root, gov_row = (column(name) for name in ("root", "bass", "gov_root", "gov_row"))
+
+        spellings = np.array(SPELLINGS, dtype=object)
+        strings = np.array(self.strings, dtype=object)
+        acc = np.array(FLATS)[gov_row, (gov_root + k) % 12]
+        bass = np.where(bass >= 0, (bass + k) % 12, 12)
+
+        words = (
+            strings[column("head")]
+            + spellings[acc, (root + k) % 12]
+            + strings[column("mid")]
+            + spellings[acc, bass]
+            + strings[column("tail")]
+        )
+        return words.tolist()
+
+    @staticmethod
+    def rebuild(compiled, words) -> tuple:
+        """Compiled's script with its transposable words replaced."""
+        script = list(compiled.script)
+        for i, word in zip(compiled.index, words):
+            pos, tag, _ = script[i]
+            script[i] = (pos, tag, word)
+        return tuple(script)
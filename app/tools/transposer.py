@@ -8,6 +8,8 @@ import common.res as res
 import common.ids as ids
 
 from tools.api import PrompToolsAPI
+from tools.tk_text_interface import end_column, insert_segments
+from tools.transpose_table import TransposeTable
 
 # helper functions
 # TODO: many of the Transposer class functions could go here,
@@ -27,15 +29,14 @@ def str_represents_int(s) -> bool:
 def recursive_qual_checker(quals) -> bool:
     """Used to confirm qualities are valid.
     Only pass the qualities part of a chord regex match."""
+    return ids.valid_qualities(quals)
 
-    # base case. if nothing remains, qualities were valid.
-    if not quals:
-        return True
-
-    # check that quals begin with valid quality, drop, check again.
-    for q in ids.qualities:
-        if quals.startswith(q):
-            return recursive_qual_checker(quals.split(q)[-1])
+def first_key(script):
+    """Return the first key in a script, or None."""
+    for tup in script:
+        if tup[1] == 'key':
+            return tup[2]
+    return None
 
 def match_chord(match=re.regex.Match) -> bool:
     """Evaluate transposible_ids regex match for chordiness."""
@@ -75,45 +76,92 @@ class Transposer(PrompToolsAPI):
     def __init__(self, parent):
         PrompToolsAPI.__init__(self, parent)
         self.enabled = self.settings.transposer.enabled
+        self.table = TransposeTable()
 
-    def transpose_tk(self, song, target): 
-        """Transpose a tk tuple list."""
+    def view(self, song, target) -> tuple:
+        """Return song's script transposed to target, or the script itself if
+        the transposer is off. Each target is worked out from the parsed
+        script the first time it's asked for, then cached on the song until
+        the script is replaced, so flipping between keys is a lookup."""
 
         if not self.enabled.get():
-            return
-
-        transposition = self.convert_transposition_to_int_tk(song=song, target=target)
-        if transposition == 0:
-            return
+            return song.tk_tuples
+
+        # the default key is what integer targets count from
+        view_key = (target, song.key.default)
+        view = song.views.get(view_key)
+        if view is None:
+            view = song.views[view_key] = self.transpose_script(song, target)
+        return view
+
+    def reset(self, song):
+        """Forget song's cached views."""
+        song.views = {}
+
+    def transpose_script(self, song, target) -> tuple:
+        """Transpose song's parsed script to target from scratch, leaving the
+        song alone. Chords take their accidentals from the last key before
+        them in the script, or the song's default key."""
+
+        return self.transpose_scripts([song], target)[0]
+
+    def transpose_scripts(self, songs, targets) -> list:
+        """Transpose many songs' scripts in one batched pass over the
+        transpose table. targets is one target for every song, or a list
+        with a target per song. Songs with words the table can't encode are
+        transposed a token at a time, raising what they always raised."""
+
+        targets = targets if isinstance(targets, (list, tuple)) else [targets] * len(songs)
+        shifts = [
+            self.convert_transposition_to_int_tk(song=song, target=target)
+            for song, target in zip(songs, targets)
+        ]
+        compiled = [self.table.compile(song) if shift else None for song, shift in zip(songs, shifts)]
+        batch = [(c, shift) for c, shift in zip(compiled, shifts) if c is not None]
+        logging.info(f'transposing {len(batch)} of {len(songs)} songs by table')
+        transposed = iter(self.table.transpose(batch))
+
+        scripts = []
+        for song, shift, c in zip(songs, shifts, compiled):
+            if shift == 0:
+                scripts.append(song.tk_tuples)
+            elif c is not None:
+                scripts.append(next(transposed))
+            else:
+                scripts.append(self.transpose_tokens(song, shift))
+        return scripts
+
+    def transpose_tokens(self, song, transposition) -> tuple:
+        """Transpose song's parsed script by transposition semitones, a word
+        at a time."""
 
         logging.info(f'transposing {song.name}')
 
-        parts = song.tk_tuples
-        updated = []
-
         strategies = {
-        'key': self.transpose_key_tk,
         'chord': self.transpose_chord_tk,
         'slashchord': self.transpose_slashchord_tk,
         }
 
-        for i, tup in enumerate(parts):
-            pos, tag, word = tup
+        current = song.key.default
+        acc = song.key.key_to_acc(current)
+        updated = []
+
+        for pos, tag, word in song.tk_tuples:
 
             # transpose transposible words with appropriate strategy
-            for k, v in strategies.items():
-                if tag == k:
-                    word = v(word=word, song=song, transposition=transposition)
-                    break
+            if tag == 'key':
+                word, current = self.transpose_key_tk(word=word, transposition=transposition)
+                acc = song.key.key_to_acc(current)
+            elif tag in strategies:
+                word = strategies[tag](word=word, acc=acc, transposition=transposition)
 
-            # modified entry back into updated.
             updated.append((pos, tag, word))
 
-        # dump updated tuples back to song obj
-        song.tk_tuples = updated
+        return tuple(updated)
 
-    def transpose_key_tk(self, word, song, transposition):
-        """Transpose key, updating songs current key to ensure correct accidentals."""
+    def transpose_key_tk(self, word, transposition) -> tuple:
+        """Transpose key, returning (word, new key) so the chords after it
+        get the right accidentals."""
 
         lbr, note, minor, rbr = slice_key(word)
         flats = ids.FLAT_MIN_IDS if minor else ids.FLAT_MAJ_IDS
@@ -121,23 +169,21 @@ class Transposer(PrompToolsAPI):
         old_id = ids.NOTE_IDS.get(note)
         new_id = (old_id + transposition) % 12
         acc = -1 if new_id in flats else 0
-        note = ids.NOTE_ID_ACCIDENTALS[new_id][acc]
-
-        song.key.current = note + minor
+        key = ids.NOTE_ID_ACCIDENTALS[new_id][acc] + minor
 
-        return lbr + song.key.current + rbr
+        return lbr + key + rbr, key
 
-    def transpose_chord_tk(self, word, song, transposition):
-        """Transpose chord."""
+    def transpose_chord_tk(self, word, acc, transposition):
+        """Transpose chord, spelling it with accidental index acc."""
 
         old_note, qualities = slice_chord(word)
         note_id = ids.NOTE_IDS.get(old_note)
         new_id = (note_id + transposition) % 12
-        new_note = ids.NOTE_ID_ACCIDENTALS[new_id][song.key.current_acc]
+        new_note = ids.NOTE_ID_ACCIDENTALS[new_id][acc]
 
         return new_note + qualities
 
-    def transpose_slashchord_tk(self, word, song, transposition):
+    def transpose_slashchord_tk(self, word, acc, transposition):
         """Transpose slash chord."""
 
         logging.info(f'transpose_slashchord_tk recieved "{word}"')
@@ -146,13 +192,13 @@ class Transposer(PrompToolsAPI):
 
         new_top = self.transpose_chord_tk(
             word=old_note+qualities,
-            song=song,
+            acc=acc,
             transposition=transposition
             )
 
         new_bass = self.transpose_chord_tk(
             word=bass,
-            song=song,
+            acc=acc,
             transposition=transposition
             )
 
@@ -188,8 +234,27 @@ class Transposer(PrompToolsAPI):
                 return s[1]()
 
 
-    def show_colors_tk(self, frame, song):
-        """Show colors from the tk formatted rep."""
+    def show_colors_tk(self, frame, song, script=None):
+        """Show colors from the tk formatted rep. script is what to show of
+        song, eg. a transposed view, the song's own script by default. The
+        text is laid out in python first, then inserted a chunk of
+        segments per call instead of a Tcl round trip or two per word."""
+
+        end = frame.text.index('end-1c')
+        self.render_tk(frame, self.layout_tk(song, script, column=int(end.split('.')[1])))
+
+    def render_tk(self, frame, layout):
+        """Insert a layout from layout_tk into frame's text widget."""
+
+        segments, styles = layout
+        insert_segments(frame.text, segments)
+        for style, start, stop in styles:
+            frame.text.tag_add(style, start, stop)
+
+    def layout_tk(self, song, script=None, column=0) -> tuple:
+        """Lay out a script for a text widget whose end is at column.
+        Returns ((text, tag) segments to insert, (style, start, end) ranges
+        to tag), with nashville numbers and whitespace compensation done."""
 
         def style_strat():
             """Strategy for managing style tags in tk text."""
@@ -208,19 +273,18 @@ class Transposer(PrompToolsAPI):
             logging.info(f'added tag {style} to active')
 
         def pop_tag():
-            """Apply tag to text range and remove from active."""
+            """Queue the style for the text range and remove from active."""
 
             nonlocal active_styles
-            nonlocal frame
 
             style = word
 
             for i, tup in enumerate(active_styles):
                 if tup[1] == style:
 
-                    # apply the style tag then pop from active
+                    # queue the style tag then pop from active
                     start = tup[0]
-                    frame.text.tag_add(style, start, pos)
+                    styles.append((style, start, pos))
                     active_styles.pop(i)
                     logging.info(f'popped tag {style} from active')
                     break
@@ -273,11 +337,8 @@ class Transposer(PrompToolsAPI):
             """Compensate for whitespace offset due to chord length change."""
 
             nonlocal word
-            nonlocal pos 
-            nonlocal end
 
             ws_len = len(word)
-            column = int(end.split('.')[1])
             expected = int(pos.split('.')[1])
 
             offset = expected - column
@@ -288,13 +349,14 @@ class Transposer(PrompToolsAPI):
 
 
         # TODO: messy
-        tups = song.tk_tuples
-        key_id = song.key.initial_id
+        tups = script if script is not None else song.tk_tuples
+        key_id = song.key.key_to_id(first_key(tups))
         minor = ''
         nashville = self.settings.transposer.nashville.get()
-        end = frame.text.index('end-1c')
 
         active_styles = []
+        segments = []
+        styles = []
 
         # choose what to do based on tuple contents
         strategies = {
@@ -305,15 +367,16 @@ class Transposer(PrompToolsAPI):
         lambda: tag == 'ws' and i > 0 and tups[i-1] != 'nl': lambda: ws_strat(),
         }
 
-        #iterate over the list of tuples, dumping to tktext and managing various tags
+        # iterate over the list of tuples, laying out text and managing various tags
         for i, tup in enumerate(tups):
             pos, tag, word = tup
 
             for k,v in strategies.items():
                 v() if k() else None
 
-            # add anything that's not a style tag and update end marker
+            # add anything that's not a style tag and track the end column
             if tag not in ('tagon', 'tagoff'):
-                frame.text.insert('end', word, tag)
-            end = frame.text.index('end-1c')
+                segments.append((word, tag))
+                column = end_column(column, word)
 
+        return segments, styles
@@ -3,6 +3,9 @@
 # from abc import ABC
 import regex as re
 import logging
+import functools
+import itertools
+from collections import Counter
 
 # tuples for chord id & transposition
 import common.ids as ids
@@ -10,6 +13,11 @@ import common.ids as ids
 import common.res as res
 
 
+# words whose out of context tags WordFactory remembers. chart vocabularies
+# are small, a library rarely has more distinct words than this.
+CACHE_SIZE = 4096
+
+
 # Helper functions
 def assign(part):
     """Instead of returning 'None' return ''."""
@@ -44,7 +52,7 @@ class WordFactory:
     """Class that takes a list of strings, identifies types
     and applies appropriate tags."""
 
-    def __init__(self):
+    def __init__(self, cache_size=CACHE_SIZE):
         """init any references that get used repeatedly"""
 
         # these tags are ignored for purposes of calculating most common word
@@ -64,6 +72,13 @@ class WordFactory:
         # these tags as neighbors to Am / A generally mean Am / A is a chord
         self.chordy_neighbors = ("chord", "slashchord", 'slash', "bar")
 
+        # tags with a low false positive rate, left alone by resolve_ambiguities
+        self.settled = frozenset(("ws", "key", "bar", "nl", "chord", "slashchord"))
+
+        # what the first telling neighbor makes an A / Am
+        self.a_am_context = dict.fromkeys(self.chordy_neighbors, "chord")
+        self.a_am_context.update(header="header", lyric="lyric")
+
         # strategies for different stages of ID
 
         # strategies for transposibles using regex
@@ -82,54 +97,52 @@ class WordFactory:
             # self.flag_ambiguous: 'ambiguous'
         }
 
-        # strategies should return appropriate tag if match, or None if not.
-        # TODO: move outside function
-        self.ambiguous_strategies = (
-            self.ambiguous_a_am,
-            self.ambiguous_digit,
-            self.ambiguous_to_most,
-        )
+        # classify() equivalents of the strategies above
+        self.chromatics = frozenset(ids.chromatics)
+        self.token_tags = {
+            "nl": "nl",
+            "ws": "ws",
+            "bar": "bar",
+            "mark": "header",
+        }
 
-        # strategies for reassigning already assigned words.
-        self.reassign_strategies = (
-            self.reassign_header_precedence,
-            self.reassign_most_precedence,
-        )
+        # context free tagging is cached per word. resolve_ambiguities still
+        # runs on every line, so context is never cached.
+        self.lookup = functools.lru_cache(maxsize=cache_size)(self.tag_word)
 
     def auto_tag(self, song, slices):
         """Automatically identify and tag a list of words, returning a list of
         tuples in the format (pos, tag, word)."""
 
-        # TODO: reorder tests based on relative frequency. i think the order should be
-        # lyric, whitespace, chord, newline, header, etc.
+        # assign back to song
+        song.tk_tuples = self.tag_slices(slices, song)
+
+        return song
+
+    def tag_slices(self, slices, song=None, first_line=1):
+        """Tag a list of words, returning (pos, tag, word) tuples. first_line
+        is the tk line number of the first word, so a run of lines from the
+        middle of a song can be retagged on its own. The first key found
+        becomes song's default key, if it has none."""
+
         # TODO: allow multiple tags, then filter by priority. much later
         # can do something on line level.
 
         # pointers obj generates the pos for each tuple
         pointers = CoordPointers()
+        pointers.y_pos = first_line
         output = []  # output may be longer than slices due to typo splits etc.
         line = []  # keep line as a unit to resolve ambiguities
 
         for i, word in enumerate(slices):
-            match = re.match(res.id_transposible, word)
-            typos = self.flag_typos(match)
-
-            # logging.info(f'word: "{word}", match: "{match[0] if match != None else None}"')
-
-            # tag strategies
-            tag = "ambiguous" if self.flag_ambiguous(word) else None
-            tag = (
-                self.try_tag(match, self.match_strategies) if match and not tag else tag
-            )
-            tag = self.try_tag(word, self.word_strategies) if not tag else tag
-            tag = "lyric" if not tag else tag
+            tag, match, typos = self.lookup(word)
 
             # after tagging, do one or more of the following based on assigned tag
 
             # at keychange, pass new key along to song
             self.update_key(
                 song=song, match=match
-            ) if tag == "key" and not song.key.default else None
+            ) if tag == "key" and song and not song.key.default else None
 
             # append word to line with extra typos list at [3]
             line.append((pointers.pos, tag, word, typos))
@@ -141,10 +154,81 @@ class WordFactory:
             # update pointers before moving on to next word.
             pointers.update(word)
 
-        # assign back to song
-        song.tk_tuples = output
+        return output
 
-        return song
+    def tag_word(self, word):
+        """Return (tag, match, typos) for a word out of context. Called
+        through self.lookup, which caches it."""
+
+        tag, match = self.classify(word)
+        typos = self.flag_typos(match)
+
+        return tag, match, tuple(typos) if typos is not None else None
+
+    def cache_info(self) -> dict:
+        """Hit / miss counters of the word cache, for tuning CACHE_SIZE."""
+
+        info = self.lookup.cache_info()
+        lookups = info.hits + info.misses
+
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+
+    def clear_cache(self):
+        """Forget cached words and reset the counters."""
+
+        self.lookup.cache_clear()
+
+    def classify(self, word):
+        """Tag a word out of context in one scan of res.id_token. Returns
+        (tag, match), match being the transposible part or None. Gives the
+        same tags as classify_by_strategies."""
+
+        token = res.id_token.match(word)
+        match = token if token and token[1] else None
+
+        if word in self.ambiguous or word.isdigit():
+            return "ambiguous", match
+
+        if match:
+            quals = match[4]
+            if match[2] and match[5] and match[3] in self.chromatics and (
+                not quals or self._match_minor(quals)
+            ):
+                return "key", match
+            if match[6]:
+                return "slashchord", match
+            if not match[2] and not match[5] and (
+                not quals or self.recursive_qual_checker(quals)
+            ):
+                return "chord", match
+
+        elif token:
+            return self.token_tags[token.lastgroup], None
+
+        # header (uppercase words) takes precedence over stray whitespace
+        if word.isupper():
+            return "header", match
+
+        return ("ws" if " " in word else "lyric"), match
+
+    def classify_by_strategies(self, word):
+        """Tag a word out of context by running each strategy in turn. This
+        is the reference classify() must agree with."""
+
+        match = re.match(res.id_transposible, word)
+
+        tag = "ambiguous" if self.flag_ambiguous(word) else None
+        tag = self.try_tag(match, self.match_strategies) if match and not tag else tag
+        tag = self.try_tag(word, self.word_strategies) if not tag else tag
+        tag = "lyric" if not tag else tag
+
+        return tag, match
 
     def finalize_line(self, elements, line):
         """When you reach the end of a line, resolve typos and ambiguities."""
@@ -234,87 +318,66 @@ class WordFactory:
             # TODO: split elements need to be reevaluated for type.
 
     def resolve_ambiguities(self, line):
-        """consider word context and reassign tags if appropriate."""
+        """consider word context and reassign tags if appropriate. The line's
+        tags are counted once up front, so this is linear in line length."""
 
         # TODO: skip this if nothing is ambiguous
 
-        edited = [None] * len(line)
-        tags = [e[1] for e in line if e[1] not in self.ignore]
+        tags = [tup[1] for tup in line]
+        counts = Counter(tag for tag in tags if tag not in self.ignore)
 
-        # most common non ambiguous type on line
-        most = max(tags, key=tags.count) if tags else None
-        count = tags.count(most) if tags else 0
+        # most common non ambiguous type on line. ties go to the type seen first
+        most = max(counts, key=counts.__getitem__) if counts else None
+        count = counts[most]
+
+        # TODO: review the logic here...
+        # if line begins with a header, everything should be a header except transposibles.
+        header_line = len(tags) > 1 and tags[1] == "header"
 
-        ignore = ("ws", "key", "bar", "nl", "chord", "slashchord")
+        # first two words that say what an A / Am is, as (index, tag)
+        telling = list(itertools.islice(
+            ((w, self.a_am_context[t]) for w, t in enumerate(tags) if t in self.a_am_context),
+            2
+        )) if counts["ambiguous"] else None
 
-        # TODO: mess!
+        edited = []
         for i, tup in enumerate(line):
-            pos, tag, word = self.unpack_tk_tuple(tup)
+            pos, tag, word = tup[0], tup[1], tup[2]
 
             # ignore tags with low false positive rate
-            if tag in ignore:
+            if tag in self.settled:
                 pass
             # deal with ambiguous elements
             elif tag == "ambiguous":
-                tag = self.do_strategies(
-                    strategies=self.ambiguous_strategies,
-                    default=tag,
-                    line=line,
-                    i=i,
-                    most=most,
-                    count=count,
-                )
+                tag = self.resolve_ambiguous(word, i, tags, most, telling)
             # deal with lyrics in headers, and headers in lyrics
-            else:
-                tag = self.do_strategies(
-                    strategies=self.reassign_strategies,
-                    default=tag,
-                    line=line,
-                    i=i,
-                    most=most,
-                    count=count,
-                )
-
-            # repack to line
-            edited[i] = (pos, tag, word)
-
-        return edited
-
-    def do_strategies(self, strategies, default, **kwargs):
-        """Try a list of strategies, return match or default if no match."""
+            elif header_line:
+                tag = "header"
+            # reassign to most, if most is a significant value.
+            elif tag != most and count > 2:
+                tag = most
 
-        for test in strategies:
-            match = test(**kwargs)
-            if match:
-                return match
+            edited.append((pos, tag, word))
 
-        return default
-
-    def ambiguous_a_am(self, line, i, most, count):
-        """Return True if A or Am are chord."""
+        return edited
 
-        # TODO: rewrite this, doesn't catch everything correctly.
+    def resolve_ambiguous(self, word, i, tags, most, telling):
+        """Return the tag for ambiguous word i on a line with tags."""
 
-        pos, tag, word = self.unpack_tk_tuple(line[i])
+        # A or Am take after the first telling word on the line, other than
+        # themselves. TODO: doesn't catch everything correctly.
+        if word == "A" or word == "Am":
+            for w, tag in telling:
+                if w != i:
+                    return tag
+            return "lyric"
 
-        if word != "A" and word != "Am":
-            return False
+        # numbers take after the word two back (the one before the space)
+        if word.isdigit():
+            return tags[i - 2] if i >= 2 else "lyric"
 
-        for w, tup in enumerate(line):
-
-            # TODO: strategy
-            # ignore the word in question or it's
-            # ambiguity will trigger chord assignment!
-            if w == i:
-                continue
-            elif tup[1] in self.chordy_neighbors:
-                return "chord"
-            elif tup[1] == "header":
-                return "header"
-            elif tup[1] == "lyric":
-                return "lyric"
-
-        return "lyric"
+        # otherwise go with the line
+        return most or "ambiguous"
 
     def unpack_tk_tuple(self, tup):
         """Unpack tk tuple, ignores any extra info at tup[3]"""
@@ -325,54 +388,6 @@ class WordFactory:
 
         return pos, tag, word
 
-    def get_neighbors(self, line, requested: list):
-        """Get tuples of requested line neighbors."""
-
-        linel = len(line)
-        neighbors = []
-        for n in requested:
-            neighbors.append(line[n] if n <= linel and n >= 0 else False)
-        return neighbors
-
-    def ambiguous_digit(self, line, i, most, count):
-        """Return appropriate tag for ambiguous digit."""
-
-        pos, tag, word = self.unpack_tk_tuple(line[i])
-
-        if not word.isdigit():
-            return False
-
-        nl = self.get_neighbors(line=line, requested=[i - 2])[0]
-
-        return nl[1] if nl else "lyric"
-
-    def ambiguous_to_most(self, most, **kwargs):
-        """If the line has a higher number of one tag, assign ambiguous to that."""
-
-        return most if most else False
-
-    def ambiguous_to_header(self, line, **kwargs):
-        """Conditions to assign ambiguous to header."""
-
-        # TODO: nothing seems to trigger this, investigate...
-        logging.info("ambiguous_to_header in WordFactory")
-        word = line[i][2]
-
-        return "header" if word == "I" or word.isdigit() else False
-
-    def reassign_header_precedence(self, line, **kwargs):
-        """If line begins with a header, everything should be a header except transposibles."""
-
-        # TODO: review the logic here...
-        # logging.info(f'reassign_header_precedence: line[0][1]: {line[1][1]}')
-        return "header" if line[1][1] == "header" else False
-
-    def reassign_most_precedence(self, line, i, most, count):
-        """Reassign to most, if most is a significant value."""
-
-        pos, tag, word = self.unpack_tk_tuple(line[i])
-        return most if tag != most and count > 2 else False
-
     def flag_ambiguous(self, word):
         """Return True if word type can not be determined with certainty out of
         context. For example, 'A' (Chord, header, or lyric) 'Am' (Chord or lyric),
@@ -497,24 +512,10 @@ class WordFactory:
         """Used to confirm qualities are valid. Only pass the qualities part
         of a chord regex match."""
 
-        # TODO: As you're splitting off these quals you could probably make
+        # TODO: As you're walking these quals you could probably make
         # a list for ingestion by ChordQualities class.
 
-        # TODO: This is very similar to recursive_qual_id below, albeit
-        # not tied into recursive_chord_id. Maybe combinable???
-
-        # base case. if quals have been filtered down to nothing, all parts
-        # passed the check and qualities are therefore valid.
-        if not quals:
-            return True
-
-        # check that quals begin with quality, filter it out, check again.
-        for q in ids.qualities:
-            if quals.startswith(q):
-                split = quals.split(q)[-1]
-                return self.recursive_qual_checker(split)
-
-        return False
+        return ids.valid_qualities(quals)
 
     def recursive_chord_id(self, chord, slash_flag=False):
         """This and the following method will break apart a string
@@ -533,39 +534,31 @@ class WordFactory:
             logging.info("recursive_chord_id: chord candidate ended with slash :/")
             return False
 
+        # strip the root and any accidentals by index, jumping past the last
+        # occurrence of each like the old split()[-1] did.
         for t in ids.diatonics:
 
             if chord.startswith(t):
 
-                chord = chord.split(t)[-1]
+                i = chord.rfind(t) + 1
                 for a in ids.accidentals:
-                    chord = chord.split(a)[-1] if chord.startswith(a) else chord
-                return (
-                    False
-                    if chord
-                    else True
-                    if slash_flag
-                    else self.recursive_qual_id(chord)
-                )
+                    i = chord.rfind(a, i) + 1 if chord.startswith(a, i) else i
+
+                # anything left over means it isn't a chord
+                return i == len(chord)
 
         return False
 
     def recursive_qual_id(self, chord):
         """Companion method to recursive_chord_id for checking qualities."""
 
-        # Base case
-        if not chord:
-            return True
+        # strip qualities, then anything left has to be a slash and a bass note
+        i = ids.skip_qualities(chord)
 
-        # Strip slash
-        if chord.startswith("/"):
-            chord = chord.split("/")[-1]
-            return self.recursive_chord_id(chord, slash_flag=True)
+        if i == len(chord):
+            return True
 
-        # Strip a quality
-        for q in ids.qualities:
-            if chord.startswith(q):
-                chord = chord.split(q)[-1]
-                return self.recursive_qual_id(chord)
+        if chord[i] == "/":
+            return self.recursive_chord_id(chord[chord.rfind("/") + 1:], slash_flag=True)
 
         return False